@@ -0,0 +1,139 @@
+"""Import throughput for CSV, JSON Lines and Parquet files of the same products.
+
+Run from the Import Service directory:
+
+    python benchmarks/bench_import_formats.py [--rows N] [--directory DIR]
+
+Parquet rows are skipped when the optional pyarrow package is not installed.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../import_service/lambda_func'))
+from catalog_writer import BatchPipeline, validate_row, write_requests  # noqa: E402
+from import_file_parser import open_reader  # noqa: E402
+from parquet_rows import pyarrow, pq  # noqa: E402
+
+# write_requests names the tables; nothing is written to them
+os.environ.setdefault('PRODUCTS_TABLE_NAME', 'products')
+os.environ.setdefault('STOCKS_TABLE_NAME', 'stocks')
+
+class LocalS3:
+    """Serves files from disk through the S3 calls the parser makes, ranged GETs included"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def head_object(self, Bucket, Key):
+        return {'ContentLength': os.path.getsize(os.path.join(self.directory, Key)), 'ETag': '"local"'}
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        path = os.path.join(self.directory, Key)
+        start, end = 0, os.path.getsize(path) - 1
+        if Range:
+            first, _, last = Range[len('bytes='):].partition('-')
+            start, end = int(first), int(last) if last else end
+        return {'Body': LocalBody(path, start, end - start + 1)}
+
+class LocalBody:
+    def __init__(self, path: str, start: int, length: int):
+        self.path, self.start, self.length = path, start, length
+
+    def read(self) -> bytes:
+        with open(self.path, 'rb') as f:
+            f.seek(self.start)
+            return f.read(self.length)
+
+    def iter_chunks(self, chunk_size: int):
+        with open(self.path, 'rb') as f:
+            f.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+class NullWriter(BatchPipeline):
+    """The import's writer pipeline, minus the DynamoDB round trips"""
+
+    requests_per_row = 2
+
+    def requests(self, product, product_id):
+        return write_requests(product, product_id)
+
+    def send(self, batch) -> int:
+        return 0
+
+def product(index: int) -> Dict[str, object]:
+    return {'title': f'Product {index}', 'description': f'Description of product {index}',
+            'price': round(1 + index % 10000 / 100, 2), 'count': index % 50}
+
+def write_files(directory: str, rows: int) -> List[str]:
+    """The same catalog as CSV, JSON Lines and, with pyarrow, Parquet"""
+    keys = ['catalog.csv', 'catalog.jsonl']
+    with open(os.path.join(directory, 'catalog.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['title', 'description', 'price', 'count'])
+        writer.writeheader()
+        writer.writerows(product(index) for index in range(rows))
+    with open(os.path.join(directory, 'catalog.jsonl'), 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(product(index)) + '\n' for index in range(rows))
+    if pq is not None:
+        columns = {field: [product(index)[field] for index in range(rows)]
+                   for field in ('title', 'description', 'price', 'count')}
+        pq.write_table(pyarrow.table(columns), os.path.join(directory, 'catalog.parquet'), row_group_size=100_000)
+        keys.append('catalog.parquet')
+    else:
+        print("⚠️ pyarrow is not installed; skipping Parquet")
+    return keys
+
+def parse_only(s3, key: str) -> int:
+    """Read and validate every row, as the writer would, without building requests"""
+    reader = open_reader(s3, 'local', key, s3.head_object(Bucket='local', Key=key))
+    return sum(1 for row in reader if validate_row(row)[0] is not None)
+
+def through_writer(s3, key: str) -> int:
+    """Read every row into the import's batch pipeline"""
+    reader = open_reader(s3, 'local', key, s3.head_object(Bucket='local', Key=key))
+    writer = NullWriter(key)
+    for row_number, row in enumerate(reader, start=1):
+        writer.add(row_number, row)
+    return writer.close()['written']
+
+def run(directory: str, keys: List[str], rows: int) -> None:
+    s3 = LocalS3(directory)
+    print(f"\n{'format':<10}{'MB':>8}{'parse rows/s':>16}{'import rows/s':>16}")
+    for key in keys:
+        size = os.path.getsize(os.path.join(directory, key)) / (1024 * 1024)
+        rates = []
+        for measure in (parse_only, through_writer):
+            started = time.perf_counter()
+            valid = measure(s3, key)
+            rates.append(rows / (time.perf_counter() - started))
+            if valid != rows:
+                print(f"⚠️ {key}: {valid} of {rows} rows were valid")
+        print(f"{os.path.splitext(key)[1][1:]:<10}{size:>8.1f}{rates[0]:>16,.0f}{rates[1]:>16,.0f}")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Compare import throughput for CSV, JSON Lines and Parquet')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='rows per file (default: 1,000,000)')
+    parser.add_argument('--directory', help='where to write the files (default: a temporary directory)')
+    return parser.parse_args(argv)
+
+def benchmark(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.directory or scratch
+        print(f"🚀 Writing {args.rows:,} rows per format to {directory}")
+        keys = write_files(directory, args.rows)
+        run(directory, keys, args.rows)
+
+if __name__ == "__main__":
+    benchmark()
@@ -5,7 +5,12 @@ from aws_cdk import (
 )
 from constructs import Construct
 
-def create_api_gateway(scope: Construct, import_products_lambda: _lambda.Function) -> apigateway.RestApi:
+def create_api_gateway(
+    scope: Construct,
+    import_products_lambda: _lambda.Function,
+    start_multipart_upload_lambda: _lambda.Function,
+    complete_multipart_upload_lambda: _lambda.Function
+) -> apigateway.RestApi:
     # Create API Gateway
     api = apigateway.RestApi(
         scope, 'ImportApi',
@@ -34,6 +39,29 @@ def create_api_gateway(scope: Construct, import_products_lambda: _lambda.Functio
         )
     )
 
+    # Large files: POST /import/multipart?name=&parts= starts an upload and returns
+    # a presigned URL per part; POST /import/multipart/complete assembles the parts
+    multipart_resource = import_resource.add_resource('multipart')
+
+    multipart_resource.add_method(
+        'POST',
+        apigateway.LambdaIntegration(start_multipart_upload_lambda),
+        request_parameters={
+            'method.request.querystring.name': True,
+            'method.request.querystring.parts': True
+        },
+        # request_validator_options would add a second construct named 'validator'
+        request_validator=api.add_request_validator(
+            'MultipartParametersValidator',
+            validate_request_parameters=True
+        )
+    )
+
+    multipart_resource.add_resource('complete').add_method(
+        'POST',
+        apigateway.LambdaIntegration(complete_multipart_upload_lambda)
+    )
+
     # Output the API URL
     CfnOutput(
         scope, 'ApiUrl',
@@ -0,0 +1,54 @@
+from aws_cdk import (
+    aws_lambda as _lambda,
+    aws_lambda_event_sources as event_sources,
+    aws_dynamodb as dynamodb,
+    aws_sqs as sqs,
+    Duration
+)
+from constructs import Construct
+from typing import Optional
+
+def create_catalog_batch_process_lambda(
+    scope: Construct,
+    catalog_items_queue: sqs.IQueue,
+    products_table: dynamodb.ITable,
+    stocks_table: dynamodb.ITable,
+    batch_size: int,
+    batching_window_seconds: int,
+    catalog_meta_table: Optional[dynamodb.ITable] = None
+) -> _lambda.Function:
+
+    # Create catalogBatchProcess Lambda
+    catalog_batch_process = _lambda.Function(
+        scope, 'CatalogBatchProcess',
+        runtime=_lambda.Runtime.PYTHON_3_9,
+        handler='catalog_batch_process.lambda_handler',
+        code=_lambda.Code.from_asset('import_service/lambda_func/'),
+        environment={
+            'PRODUCTS_TABLE_NAME': products_table.table_name,
+            'STOCKS_TABLE_NAME': stocks_table.table_name
+        },
+        timeout=Duration.seconds(30),
+        memory_size=256
+    )
+
+    # Grant DynamoDB permissions to Lambda
+    products_table.grant_write_data(catalog_batch_process)
+    stocks_table.grant_write_data(catalog_batch_process)
+
+    # Bump the Product Service catalog version so cached product pages pick up imports
+    if catalog_meta_table is not None:
+        catalog_batch_process.add_environment('CATALOG_META_TABLE_NAME', catalog_meta_table.table_name)
+        catalog_meta_table.grant_write_data(catalog_batch_process)
+
+    # Consume the queue in batches; only failed messages are retried
+    catalog_batch_process.add_event_source(
+        event_sources.SqsEventSource(
+            catalog_items_queue,
+            batch_size=batch_size,
+            max_batching_window=Duration.seconds(batching_window_seconds),
+            report_batch_item_failures=True
+        )
+    )
+
+    return catalog_batch_process
@@ -1,11 +1,16 @@
 from aws_cdk import (
+    Duration,
     Stack,
     aws_s3 as s3,
+    aws_dynamodb as dynamodb,
+    aws_sqs as sqs,
 )
 from constructs import Construct
 from .api_gateway import create_api_gateway
 from .import_products_lambda import create_import_products_lambda
 from .parse_products_lambda import create_parse_products_lambda
+from .catalog_batch_process_lambda import create_catalog_batch_process_lambda
+from .multipart_upload_lambdas import create_multipart_upload_lambdas
 
 class ImportServiceStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
@@ -17,6 +22,53 @@ class ImportServiceStack(Stack):
             bucket_name='myimportservicebucket'
         )
 
+        # Reference the Product Service tables
+        products_table = dynamodb.Table.from_table_name(
+            self, 'ProductsTable',
+            table_name='products'
+        )
+
+        stocks_table = dynamodb.Table.from_table_name(
+            self, 'StocksTable',
+            table_name='stocks'
+        )
+
+        # The Product Service's generated CatalogMetaTable name, if imports should invalidate its cache
+        catalog_meta_table_name = self.node.try_get_context('catalogMetaTableName')
+        catalog_meta_table = dynamodb.Table.from_table_name(
+            self, 'CatalogMetaTable',
+            table_name=catalog_meta_table_name
+        ) if catalog_meta_table_name else None
+
+        # Byte offset and row number reached by each import, expiring after a week
+        import_jobs_table = dynamodb.Table(
+            self, 'ImportJobsTable',
+            partition_key=dynamodb.Attribute(
+                name='import_id',
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute='expires_at'
+        )
+
+        # Parsed rows wait here for catalogBatchProcess; poison messages end up in the DLQ
+        catalog_items_dlq = sqs.Queue(
+            self, 'CatalogItemsDeadLetterQueue',
+            queue_name='catalogItemsDeadLetterQueue',
+            retention_period=Duration.days(14)
+        )
+
+        catalog_items_queue = sqs.Queue(
+            self, 'CatalogItemsQueue',
+            queue_name='catalogItemsQueue',
+            # Six times the consumer timeout, as recommended for Lambda event sources
+            visibility_timeout=Duration.seconds(180),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=5,
+                queue=catalog_items_dlq
+            )
+        )
+
         # Create Lambda functions
         import_products_lambda = create_import_products_lambda(
             self, 
@@ -25,13 +77,32 @@ class ImportServiceStack(Stack):
 
         parse_products_lambda = create_parse_products_lambda(
             self, 
+            import_bucket,
+            catalog_items_queue,
+            import_jobs_table
+        )
+
+        create_catalog_batch_process_lambda(
+            self,
+            catalog_items_queue,
+            products_table,
+            stocks_table,
+            batch_size=int(self.node.try_get_context('catalogBatchSize') or 100),
+            batching_window_seconds=int(self.node.try_get_context('catalogBatchWindowSeconds') or 5),
+            catalog_meta_table=catalog_meta_table
+        )
+
+        start_multipart_upload_lambda, complete_multipart_upload_lambda = create_multipart_upload_lambdas(
+            self,
             import_bucket
         )
 
         # Create API Gateway
         api = create_api_gateway(
             self, 
-            import_products_lambda
+            import_products_lambda,
+            start_multipart_upload_lambda,
+            complete_multipart_upload_lambda
         )
 
         
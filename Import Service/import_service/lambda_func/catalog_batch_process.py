@@ -0,0 +1,64 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+from clients import get_resource
+from catalog_writer import (
+    BATCH_WRITE_MAX_ITEMS,
+    WRITE_WORKERS,
+    bump_catalog_version,
+    validate_row,
+    write_batch,
+    write_requests
+)
+
+PRODUCTS_PER_WRITE = BATCH_WRITE_MAX_ITEMS // 2  # product + stock per message
+
+def parse_message(record: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """Validated product and its id from one SQS record"""
+    message = json.loads(record['body'])
+    product, error = validate_row(message)
+    if product is None or not message.get('id'):
+        raise ValueError(error or 'Missing product id')
+    return product, message['id']
+
+def lambda_handler(event, context):
+    """Create the products in a batch of catalog items messages; returns partial batch failures"""
+    records = event.get('Records', [])
+    print(f"Received {len(records)} catalog items")
+
+    # One write per product id: BatchWriteItem rejects a request that puts the same key twice
+    writes: Dict[str, Tuple[List[str], list]] = {}
+    for record in records:
+        try:
+            product, product_id = parse_message(record)
+        except (ValueError, TypeError) as e:
+            # Redelivery cannot fix a malformed message, so it is dropped rather than failed
+            print(f"Dropping invalid message {record['messageId']}: {str(e)}")
+            continue
+        # The last message wins; every duplicate is acknowledged or retried with it
+        message_ids, _ = writes.get(product_id, ([], None))
+        writes[product_id] = (message_ids + [record['messageId']], write_requests(product, product_id))
+
+    entries = list(writes.values())
+    chunks = [entries[i:i + PRODUCTS_PER_WRITE] for i in range(0, len(entries), PRODUCTS_PER_WRITE)]
+    client = get_resource('dynamodb').meta.client
+
+    def run(chunk):
+        try:
+            write_batch(client, [request for _, requests in chunk for request in requests])
+            return []
+        except Exception as e:
+            print(f"Error writing {len(chunk)} products: {str(e)}")
+            return [message_id for message_ids, _ in chunk for message_id in message_ids]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(WRITE_WORKERS, len(chunks) or 1))) as executor:
+        failed = [message_id for message_ids in executor.map(run, chunks) for message_id in message_ids]
+
+    written = sum(len(message_ids) for message_ids, _ in entries) - len(failed)
+    if written:
+        # Once per batch rather than per chunk, so concurrent chunks do not contend on the version item
+        bump_catalog_version(client)
+
+    print(f"Wrote {len(entries)} products from {len(records)} messages, {len(failed)} messages to retry")
+    # Only the failed messages become visible again; the rest are deleted
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failed]}
@@ -0,0 +1,272 @@
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from botocore.exceptions import ClientError
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+BATCH_WRITE_MAX_ITEMS = 25  # DynamoDB limit per BatchWriteItem request
+WRITE_WORKERS = int(os.environ.get('WRITE_WORKERS', '4'))
+WRITE_QUEUE_BATCHES = int(os.environ.get('WRITE_QUEUE_BATCHES', '8'))
+WRITE_MAX_ATTEMPTS = int(os.environ.get('WRITE_MAX_ATTEMPTS', '8'))
+WRITE_BASE_DELAY = float(os.environ.get('WRITE_BASE_DELAY', '0.05'))
+WRITE_MAX_DELAY = float(os.environ.get('WRITE_MAX_DELAY', '2.0'))
+
+REQUIRED_FIELDS = ['title', 'description', 'price', 'count']
+THROTTLING_ERRORS = (
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded'
+)
+
+# Product Service index attributes (see its indexes.py) so imports show up in sorted listings
+CATALOG_PARTITION_ATTRIBUTE = 'catalog'
+CATALOG_PARTITION_VALUE = 'products'
+TITLE_SORT_ATTRIBUTE = 'title_lower'
+
+# Product Service catalog version item (see its catalog_cache.py); bumping it drops cached list pages
+CATALOG_VERSION_KEY = {'id': 'catalog'}
+
+# Row ids derive from the file and row number, so re-importing a file overwrites instead of duplicating
+ROW_ID_NAMESPACE = uuid.UUID('6f1c1c52-3c1e-4f43-9a51-0d4bb1d0e6a3')
+
+class WriteError(Exception):
+    """Raised when a batch cannot be written after every retry"""
+
+class ValidatedRow(dict):
+    """A product a reader has already validated and converted, e.g. a column at a time"""
+
+def validate_row(row: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Apply the create_product rules to a parsed row; returns (product, '') or (None, error)"""
+    if isinstance(row, ValidatedRow):
+        return row, ""
+    if not isinstance(row, dict):
+        return None, "Row must be an object"
+    for field in REQUIRED_FIELDS:
+        if row.get(field) in (None, ''):
+            return None, f"Missing required field: {field}"
+    # Typed formats can carry other values; CSV fields are always text
+    for field in ('title', 'description'):
+        if not isinstance(row[field], str):
+            return None, f"{field.capitalize()} must be text"
+
+    try:
+        price = Decimal(str(row['price']).strip())
+    except InvalidOperation:
+        return None, "Price must be a positive number"
+    if not price.is_finite() or price <= 0:
+        return None, "Price must be a positive number"
+
+    try:
+        count = int(str(row['count']).strip())
+    except ValueError:
+        return None, "Count must be a non-negative integer"
+    if count < 0:
+        return None, "Count must be a non-negative integer"
+
+    return {
+        'title': row['title'],
+        'description': row['description'],
+        'price': price,
+        'count': count
+    }, ""
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(WRITE_MAX_DELAY, WRITE_BASE_DELAY * (2 ** attempt)))
+
+def write_requests(product: Dict[str, Any], product_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """Product and stock PutRequests for one validated row"""
+    return [
+        (os.environ['PRODUCTS_TABLE_NAME'], {'PutRequest': {'Item': {
+            'id': product_id,
+            'title': product['title'],
+            'description': product['description'],
+            'price': product['price'],
+            CATALOG_PARTITION_ATTRIBUTE: CATALOG_PARTITION_VALUE,
+            TITLE_SORT_ATTRIBUTE: product['title'].lower()
+        }}}),
+        (os.environ['STOCKS_TABLE_NAME'], {'PutRequest': {'Item': {
+            'product_id': product_id,
+            'count': product['count']
+        }}})
+    ]
+
+def bump_catalog_version(client) -> None:
+    """Increment the catalog version once products are written; a no-op without CATALOG_META_TABLE_NAME"""
+    table_name = os.environ.get('CATALOG_META_TABLE_NAME')
+    if not table_name:
+        return
+    try:
+        client.update_item(
+            TableName=table_name,
+            Key=CATALOG_VERSION_KEY,
+            UpdateExpression='ADD #version :one',
+            ExpressionAttributeNames={'#version': 'version'},
+            ExpressionAttributeValues={':one': 1}
+        )
+    except ClientError as e:
+        # The products are written; cached pages just live until their TTL
+        print(f"Failed to bump catalog version: {str(e)}")
+
+def write_batch(client, batch: List[Tuple[str, Dict[str, Any]]]) -> int:
+    """BatchWriteItem with retries of UnprocessedItems and throttling errors; returns retries"""
+    request_items: Dict[str, List[Dict[str, Any]]] = {}
+    for table_name, request in batch:
+        request_items.setdefault(table_name, []).append(request)
+
+    attempt = 0
+    while request_items:
+        try:
+            response = client.batch_write_item(RequestItems=request_items)
+            request_items = response.get('UnprocessedItems') or {}
+        except ClientError as e:
+            if e.response['Error']['Code'] not in THROTTLING_ERRORS:
+                raise
+        else:
+            if not request_items:
+                break
+        attempt += 1
+        if attempt >= WRITE_MAX_ATTEMPTS:
+            raise WriteError(f'BatchWriteItem still throttled after {attempt} attempts')
+        time.sleep(backoff_delay(attempt))
+    return attempt
+
+class BatchPipeline:
+    """Sends validated rows in fixed-size batches on a worker pool.
+
+    add() blocks while the queue of pending batches is full, so parsing pauses
+    whenever the destination falls behind instead of buffering the file in memory.
+    Subclasses define the batch size, the requests per row and how a batch is sent.
+    """
+
+    batch_limit = BATCH_WRITE_MAX_ITEMS
+    requests_per_row = 1
+
+    def __init__(self, source: str, workers: int = WRITE_WORKERS,
+                 queue_batches: int = WRITE_QUEUE_BATCHES):
+        self.source = source
+        self.batches: queue.Queue = queue.Queue(maxsize=max(1, queue_batches))
+        self.pending: List[Any] = []
+        self.lock = threading.Lock()
+        self.errors: List[BaseException] = []
+        self.rows = 0
+        self.written = 0
+        self.invalid = 0
+        self.retries = 0
+        self.started = time.monotonic()
+        self.workers = [threading.Thread(target=self._work, daemon=True) for _ in range(max(1, workers))]
+        for worker in self.workers:
+            worker.start()
+
+    def requests(self, product: Dict[str, Any], product_id: str) -> List[Any]:
+        raise NotImplementedError
+
+    def send(self, batch: List[Any]) -> int:
+        """Deliver one batch; returns how many retries it took"""
+        raise NotImplementedError
+
+    def _work(self) -> None:
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                self.batches.task_done()
+                return
+            try:
+                if not self.errors:
+                    retries = self.send(batch)
+                    with self.lock:
+                        self.written += len(batch) // self.requests_per_row
+                        self.retries += retries
+            except BaseException as e:
+                with self.lock:
+                    self.errors.append(e)
+            finally:
+                self.batches.task_done()
+
+    def _flush(self) -> None:
+        if self.pending:
+            self.batches.put(self.pending)
+            self.pending = []
+
+    def flush(self) -> None:
+        """Send the pending rows and wait until every queued batch has been delivered"""
+        if self.errors:
+            raise self.errors[0]
+        self._flush()
+        self.batches.join()
+        if self.errors:
+            raise self.errors[0]
+
+    def add(self, row_number: int, row: Dict[str, Any]) -> Optional[str]:
+        """Queue one parsed row; returns the validation error if it was rejected"""
+        if self.errors:
+            raise self.errors[0]
+        self.rows += 1
+        product, error = validate_row(row)
+        if product is None:
+            self.invalid += 1
+            return error
+
+        product_id = str(uuid.uuid5(ROW_ID_NAMESPACE, f'{self.source}#{row_number}'))
+        # All requests for a row travel in the same batch
+        if len(self.pending) + self.requests_per_row > self.batch_limit:
+            self._flush()
+        self.pending.extend(self.requests(product, product_id))
+        return None
+
+    def abort(self) -> None:
+        """Stop the workers after a failure elsewhere, dropping unsent batches"""
+        with self.lock:
+            self.errors.append(WriteError('Import aborted'))
+        for _ in self.workers:
+            self.batches.put(None)
+        for worker in self.workers:
+            worker.join()
+
+    def close(self) -> Dict[str, Any]:
+        """Flush, wait for the workers and return throughput stats"""
+        if not self.errors:
+            self._flush()
+        for _ in self.workers:
+            self.batches.put(None)
+        for worker in self.workers:
+            worker.join()
+        if self.errors:
+            raise self.errors[0]
+
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'rows': self.rows,
+            'written': self.written,
+            'invalid': self.invalid,
+            'retries': self.retries,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(self.rows / elapsed, 1)
+        }
+
+class CatalogWriter(BatchPipeline):
+    """Writes product and stock items straight to DynamoDB in 25-item batches"""
+
+    batch_limit = BATCH_WRITE_MAX_ITEMS
+    requests_per_row = 2
+
+    def __init__(self, client, source: str, workers: int = WRITE_WORKERS,
+                 queue_batches: int = WRITE_QUEUE_BATCHES):
+        self.client = client
+        super().__init__(source, workers, queue_batches)
+
+    def requests(self, product: Dict[str, Any], product_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        return write_requests(product, product_id)
+
+    def send(self, batch: List[Tuple[str, Dict[str, Any]]]) -> int:
+        return write_batch(self.client, batch)
+
+    def close(self) -> Dict[str, Any]:
+        stats = super().close()
+        if stats['written']:
+            bump_catalog_version(self.client)
+        return stats
@@ -0,0 +1,68 @@
+import os
+import threading
+import boto3
+from botocore.config import Config
+from typing import Any, Dict, Optional, Tuple
+
+# Shared settings for every AWS client created in this container.
+# Clients live at module level, so warm invocations reuse their connection pools.
+CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '50')),
+    tcp_keepalive=True,
+    connect_timeout=float(os.environ.get('AWS_CONNECT_TIMEOUT', '2')),
+    read_timeout=float(os.environ.get('AWS_READ_TIMEOUT', '10')),
+    retries={
+        'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', '5')),
+        'mode': 'adaptive'
+    }
+)
+
+# Per-service overrides merged on top of CLIENT_CONFIG
+SERVICE_CONFIG = {
+    's3': Config(signature_version='s3v4')
+}
+
+_registry: Dict[Tuple[str, str], Any] = {}
+_lock = threading.Lock()
+
+def _region() -> Optional[str]:
+    return os.environ.get('REGION') or os.environ.get('AWS_REGION')
+
+def _get_or_create(kind: str, service_name: str, factory) -> Any:
+    key = (kind, service_name)
+    instance = _registry.get(key)
+    if instance is None:
+        with _lock:
+            instance = _registry.get(key)
+            if instance is None:
+                config = CLIENT_CONFIG
+                if service_name in SERVICE_CONFIG:
+                    config = config.merge(SERVICE_CONFIG[service_name])
+                instance = factory(service_name, region_name=_region(), config=config)
+                _registry[key] = instance
+    return instance
+
+def get_client(service_name: str) -> Any:
+    """Get the container-wide boto3 client for a service, creating it on first use"""
+    return _get_or_create('client', service_name, boto3.client)
+
+def get_resource(service_name: str) -> Any:
+    """Get the container-wide boto3 resource for a service, creating it on first use.
+
+    Resources are not thread safe; worker threads share resource.meta.client, which is
+    and still converts attribute values to Python types.
+    """
+    return _get_or_create('resource', service_name, boto3.resource)
+
+def set_client(service_name: str, client: Any) -> None:
+    """Register a client instance, e.g. a stub in tests"""
+    _registry[('client', service_name)] = client
+
+def set_resource(service_name: str, resource: Any) -> None:
+    """Register a resource instance, e.g. a stub in tests"""
+    _registry[('resource', service_name)] = resource
+
+def reset() -> None:
+    """Drop every cached client and resource"""
+    with _lock:
+        _registry.clear()
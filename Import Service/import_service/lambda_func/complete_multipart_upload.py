@@ -0,0 +1,49 @@
+import json
+import os
+from botocore.exceptions import ClientError
+from clients import get_client
+from multipart_upload import CLIENT_ERRORS, UPLOAD_MAX_PARTS, UPLOAD_PREFIX, create_response
+
+def lambda_handler(event, context):
+    """Assemble the uploaded parts into the object under uploaded/, which starts the import"""
+    try:
+        try:
+            data = json.loads(event.get('body') or '{}')
+        except json.JSONDecodeError:
+            return create_response(400, {'error': 'Invalid JSON in request body'})
+
+        key = data.get('key')
+        upload_id = data.get('uploadId')
+        parts = data.get('parts')
+        if not isinstance(key, str) or not key.startswith(UPLOAD_PREFIX) or not upload_id:
+            return create_response(400, {'error': 'key under uploaded/ and uploadId are required'})
+        if not isinstance(parts, list) or not 1 <= len(parts) <= UPLOAD_MAX_PARTS:
+            return create_response(400, {'error': f'parts must list 1 to {UPLOAD_MAX_PARTS} uploaded parts'})
+        try:
+            # S3 wants the parts in ascending order; clients finish them in any order
+            completed = sorted(
+                ({'PartNumber': int(part['partNumber']), 'ETag': str(part['etag'])} for part in parts),
+                key=lambda part: part['PartNumber']
+            )
+        except (KeyError, TypeError, ValueError):
+            return create_response(400, {'error': 'Each part needs a partNumber and an etag'})
+
+        # Get the shared S3 client (SigV4, reused across warm invocations)
+        s3_client = get_client('s3')
+        try:
+            response = s3_client.complete_multipart_upload(
+                Bucket=os.environ['BUCKET_NAME'],
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': completed}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] in CLIENT_ERRORS:
+                return create_response(400, {'error': e.response['Error'].get('Message', e.response['Error']['Code'])})
+            raise
+
+        return create_response(200, {'key': key, 'etag': response.get('ETag')})
+
+    except Exception as e:
+        print(f"Error completing multipart upload: {str(e)}")
+        return create_response(500, {'error': str(e)})
@@ -0,0 +1,88 @@
+import gzip
+import itertools
+import os
+from typing import Iterable, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional; only needed for .csv.zst uploads
+    zstandard = None
+
+DECOMPRESS_CHUNK_SIZE = int(os.environ.get('DECOMPRESS_CHUNK_SIZE', str(256 * 1024)))
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+
+SUFFIXES = {'.gz': GZIP, '.gzip': GZIP, '.zst': ZSTD, '.zstd': ZSTD}
+CONTENT_ENCODINGS = {'gzip': GZIP, 'x-gzip': GZIP, 'zstd': ZSTD}
+MAGIC_BYTES = {GZIP: b'\x1f\x8b', ZSTD: b'\x28\xb5\x2f\xfd'}
+SNIFF_BYTES = max(len(magic) for magic in MAGIC_BYTES.values())
+
+def compression_of(key: str, content_encoding: Optional[str] = None) -> Optional[str]:
+    """Compression named by the object's Content-Encoding or its key suffix, if any"""
+    if content_encoding and content_encoding.lower() in CONTENT_ENCODINGS:
+        return CONTENT_ENCODINGS[content_encoding.lower()]
+    return SUFFIXES.get(os.path.splitext(key.lower())[1])
+
+def sniff(prefix: bytes) -> Optional[str]:
+    """Compression recognised from the first bytes of a file; CSV text never starts with these"""
+    for compression, magic in MAGIC_BYTES.items():
+        if prefix.startswith(magic):
+            return compression
+    return None
+
+class ChunkReader:
+    """File-like read() over an iterable of byte chunks, for the stream decompressors"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.buffer = b''
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if size < 0:
+            data, self.buffer = self.buffer, b''
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+def decompress(chunks: Iterable[bytes], chunk_size: int = DECOMPRESS_CHUNK_SIZE) -> Iterator[bytes]:
+    """Decompress a byte stream chunk by chunk, recognising the format by its magic bytes.
+
+    Both formats always start with them, so a misnamed plain CSV still reads as text.
+    """
+    chunks = iter(chunks)
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= SNIFF_BYTES:
+            break
+    chunks = itertools.chain([head], chunks)
+    compression = sniff(head)
+    if compression is None:
+        return chunks
+
+    if compression == GZIP:
+        # Handles multi-member files, as written by parallel gzip tools
+        stream = gzip.GzipFile(fileobj=ChunkReader(chunks), mode='rb')
+    elif compression == ZSTD:
+        if zstandard is None:
+            raise ValueError('Reading zstd files needs the zstandard package')
+        stream = zstandard.ZstdDecompressor().stream_reader(ChunkReader(chunks), read_across_frames=True)
+    else:
+        raise ValueError(f'Unsupported compression: {compression}')
+    # Bounded reads keep memory flat however well the file compresses
+    return iter(lambda: stream.read(chunk_size), b'')
+
+def skip_bytes(chunks: Iterable[bytes], count: int) -> Iterator[bytes]:
+    """Drop the first `count` bytes of a stream, e.g. to resume a compressed file at a checkpoint"""
+    for chunk in chunks:
+        if count >= len(chunk):
+            count -= len(chunk)
+            continue
+        yield chunk[count:]
+        count = 0
@@ -0,0 +1,62 @@
+import csv
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+CSV_CHUNK_SIZE = int(os.environ.get('CSV_CHUNK_SIZE', str(64 * 1024)))
+
+class ByteLines:
+    """Decoded lines of a byte stream, counting the bytes handed out so far"""
+
+    def __init__(self, chunks: Iterable[bytes], at_start: bool = True):
+        self.chunks = chunks
+        self.consumed = 0
+        # Only the start of the file can carry a byte order mark
+        self.encoding = 'utf-8-sig' if at_start else 'utf-8'
+
+    def _decode(self, line: bytes) -> str:
+        # '\n' never occurs inside a multi-byte character, so every line decodes on its own
+        text = line.decode(self.encoding)
+        self.encoding = 'utf-8'
+        self.consumed += len(line)
+        return text
+
+    def __iter__(self) -> Iterator[str]:
+        pending = b''
+        for chunk in self.chunks:
+            pending += chunk
+            # Only '\n' ends a line; '\r' stays on the line for csv to strip
+            *lines, pending = pending.split(b'\n')
+            for line in lines:
+                yield self._decode(line + b'\n')
+        if pending:
+            yield self._decode(pending)
+
+class CsvRows:
+    """csv.DictReader over byte chunks that knows the byte offset just past the last row returned"""
+
+    def __init__(self, chunks: Iterable[bytes], start: int = 0, fieldnames: Optional[List[str]] = None):
+        self.start = start
+        self.offset = start
+        self.lines = ByteLines(chunks, at_start=start == 0)
+        # csv joins the lines of a quoted multi-line field itself, and reads no further than the row
+        self.reader = csv.DictReader(self.lines, fieldnames=fieldnames)
+
+    @property
+    def fieldnames(self) -> Optional[List[str]]:
+        return self.reader.fieldnames
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        row = next(self.reader)
+        self.offset = self.start + self.lines.consumed
+        return row
+
+def iter_csv_rows(body, chunk_size: int = CSV_CHUNK_SIZE, start: int = 0,
+                  fieldnames: Optional[List[str]] = None) -> CsvRows:
+    """Stream rows from an S3 StreamingBody without holding the file in memory.
+
+    A body read from byte `start` onwards has no header, so its fieldnames are passed in.
+    """
+    return CsvRows(body.iter_chunks(chunk_size), start, fieldnames)
@@ -1,56 +1,216 @@
 import json
-import csv
-import boto3
 import os
-from io import StringIO
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from urllib.parse import unquote_plus
+from clients import get_client, get_resource
+from csv_stream import CSV_CHUNK_SIZE, CsvRows
+from csv_compression import SNIFF_BYTES, compression_of, decompress, skip_bytes, sniff
+from catalog_writer import REQUIRED_FIELDS, CatalogWriter
+from import_formats import CSV, FORMAT_NAMES, JSON_LINES, PARQUET, format_of
+from json_lines import JsonLinesRows
+from parquet_rows import ParquetRows, S3File
+from queue_publisher import QueuePublisher
+from ranged_csv import RANGE_THRESHOLD_BYTES, RangedCsvReader
+from s3_copy import copy_object
+from import_jobs import (
+    CHECKPOINT_INTERVAL_SECONDS,
+    IN_PROGRESS,
+    MAX_RESUMES,
+    PARSED,
+    STOP_MARGIN_MILLIS,
+    checkpoints_enabled,
+    load_checkpoint,
+    save_checkpoint
+)
+
+FILE_CONCURRENCY = int(os.environ.get('FILE_CONCURRENCY', '4'))
+
+def create_sink(source: str):
+    """Where parsed rows go: the catalog items queue, or straight to DynamoDB without one"""
+    queue_url = os.environ.get('CATALOG_ITEMS_QUEUE_URL')
+    if queue_url:
+        return QueuePublisher(get_client('sqs'), queue_url, source)
+    return CatalogWriter(get_resource('dynamodb').meta.client, source)
+
+def text_rows(file_format: str, chunks, start: int, fieldnames):
+    """Rows of a text format's byte stream, from offset `start`"""
+    if file_format == JSON_LINES:
+        return JsonLinesRows(chunks, start)
+    return CsvRows(chunks, start, fieldnames)
+
+def open_reader(s3_client, bucket: str, key: str, head: Dict[str, Any], start: int = 0, fieldnames=None):
+    """Rows of the object from offset `start`, which is 0 or a checkpointed row boundary.
+
+    Offsets are bytes of the (decompressed) text for CSV and JSON Lines, and a row index for Parquet.
+    """
+    size = head['ContentLength']
+    etag = head.get('ETag', '')
+    file_format = format_of(key)
+    if file_format == PARQUET:
+        # Parquet needs random access to its footer and row groups, which ranged GETs provide
+        return ParquetRows(S3File(s3_client, bucket, key, size, etag), start)
+
+    compression = compression_of(key, head.get('ContentEncoding'))
+    if compression is None and (start or (file_format == CSV and size >= RANGE_THRESHOLD_BYTES)):
+        # Byte ranges only line up with rows in plain text, so check the magic bytes first
+        prefix = s3_client.get_object(Bucket=bucket, Key=key, Range=f'bytes=0-{SNIFF_BYTES - 1}')['Body'].read()
+        compression = sniff(prefix)
+
+    if compression is None:
+        if file_format == CSV and size - start >= RANGE_THRESHOLD_BYTES:
+            # Large files are fetched as parallel byte ranges and parsed on a worker pool, in file order
+            print(f"Reading {size - start} bytes of {key} in parallel ranges")
+            return RangedCsvReader(s3_client, bucket, key, size, etag, start=start, fieldnames=fieldnames)
+        if start:
+            response = s3_client.get_object(Bucket=bucket, Key=key, Range=f'bytes={start}-', IfMatch=etag)
+            return text_rows(file_format, response['Body'].iter_chunks(CSV_CHUNK_SIZE), start, fieldnames)
+
+    # Parse the text as it streams in, so memory does not grow with file size. Compressed files
+    # are decompressed on the fly and, when resuming, re-read up to the checkpointed offset.
+    response = s3_client.get_object(Bucket=bucket, Key=key)
+    chunks = decompress(response['Body'].iter_chunks(CSV_CHUNK_SIZE))
+    if start:
+        chunks = skip_bytes(chunks, start)
+    return text_rows(file_format, chunks, start, fieldnames)
+
+def process_file(s3_client, bucket: str, key: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """Import one uploaded CSV, JSON Lines or Parquet file and move it to parsed/; returns the writer stats.
+
+    With an import jobs table, progress is checkpointed and the import stops at `deadline`
+    (a time.monotonic() value); stats['completed'] is then False and a later call resumes.
+    """
+    print(f"Processing file: {key} from bucket: {bucket}")
+
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    import_id = f"{bucket}/{key}/{head.get('ETag', '')}"
+
+    jobs = get_resource('dynamodb').meta.client if checkpoints_enabled() else None
+    checkpoint = load_checkpoint(jobs, import_id) if jobs else None
+    if checkpoint and checkpoint['status'] == PARSED:
+        # Only the move to parsed/ was left
+        print(f"All rows of {key} were already sent")
+        stats = {'rows': 0, 'written': 0, 'invalid': 0, 'retries': 0, 'seconds': 0, 'rows_per_second': 0}
+    else:
+        start, row_number, fieldnames = 0, 0, None
+        if checkpoint:
+            start, row_number, fieldnames = checkpoint['offset'], checkpoint['row_number'], checkpoint['fieldnames']
+            print(f"Resuming {key} at offset {start}, after row {row_number}")
+
+        reader = open_reader(s3_client, bucket, key, head, start, fieldnames)
+        missing = [field for field in REQUIRED_FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{FORMAT_NAMES[format_of(key)]} is missing columns: {', '.join(missing)}")
+
+        # Valid rows are sent on in batches; parsing waits whenever sending falls behind
+        writer = create_sink(import_id)
+        checkpointed_at = time.monotonic()
+        stopped = False
+        try:
+            for row_number, row in enumerate(reader, start=row_number + 1):
+                error = writer.add(row_number, row)
+                if error:
+                    print(f"Skipping row {row_number}: {error} - {json.dumps(row, default=str)}")
+                if not jobs:
+                    continue
+                if deadline is not None and time.monotonic() >= deadline:
+                    stopped = True
+                    break
+                if time.monotonic() - checkpointed_at >= CHECKPOINT_INTERVAL_SECONDS:
+                    # A checkpoint may only cover rows that have actually been sent
+                    writer.flush()
+                    save_checkpoint(jobs, import_id, reader.offset, row_number, reader.fieldnames)
+                    checkpointed_at = time.monotonic()
+        except Exception:
+            writer.abort()
+            raise
+        stats = writer.close()
+
+        print(f"Sent {stats['written']} products from {key}: {stats['invalid']} invalid rows, "
+              f"{stats['rows_per_second']} rows/s over {stats['seconds']}s")
+
+        if jobs:
+            save_checkpoint(jobs, import_id, reader.offset, row_number, reader.fieldnames,
+                            IN_PROGRESS if stopped else PARSED)
+        if stopped:
+            print(f"Stopping {key} at offset {reader.offset} before the function times out")
+            return {**stats, 'completed': False, 'offset': reader.offset}
+
+    # Move file to parsed folder
+    new_key = key.replace('uploaded/', 'parsed/', 1)
+    copy_object(s3_client, bucket, key, new_key, head)
+
+    # Delete the file from uploaded folder
+    s3_client.delete_object(Bucket=bucket, Key=key)
+    return {**stats, 'completed': True}
+
+def continue_later(context, records, resumes: int) -> None:
+    """Invoke this function again, asynchronously, for the files that stopped at a checkpoint"""
+    get_client('lambda').invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType='Event',
+        Payload=json.dumps({'Records': records, 'checkpointResumes': resumes})
+    )
 
 def lambda_handler(event, context):
     try:
-        # Get S3 client
-        s3_client = boto3.client('s3')
-        
-        # Get bucket and file details from the S3 event
-        bucket = event['Records'][0]['s3']['bucket']['name']
-        key = event['Records'][0]['s3']['object']['key']
-        
-        print(f"Processing file: {key} from bucket: {bucket}")
-        
-        # Get the object from S3
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        
-        # Read the content of the file
-        file_content = response['Body'].read().decode('utf-8')
-        
-        # Create a StringIO object for CSV parsing
-        csv_file = StringIO(file_content)
-        
-        # Parse CSV
-        csv_reader = csv.DictReader(csv_file)
-        
-        # Process each row
-        for row in csv_reader:
-            # Log each record
-            print(f"Parsed record: {json.dumps(row)}")
-            
-        # Move file to parsed folder
-        new_key = key.replace('uploaded/', 'parsed/')
-        s3_client.copy_object(
-            Bucket=bucket,
-            CopySource={'Bucket': bucket, 'Key': key},
-            Key=new_key
-        )
-        
-        # Delete the file from uploaded folder
-        s3_client.delete_object(Bucket=bucket, Key=key)
-        
+        # Get the shared S3 client; it is thread safe
+        s3_client = get_client('s3')
+
+        # S3 can batch several notifications; keys arrive URL-encoded with '+' for spaces
+        records = event.get('Records', [])
+        files = [
+            (record['s3']['bucket']['name'], unquote_plus(record['s3']['object']['key']))
+            for record in records
+        ]
+
+        # Stop early enough to flush, checkpoint and hand over to a fresh invocation
+        resumes = event.get('checkpointResumes', 0)
+        deadline = None
+        if checkpoints_enabled() and hasattr(context, 'get_remaining_time_in_millis'):
+            if resumes >= MAX_RESUMES:
+                raise RuntimeError(f'Import stopped after {resumes} resumed invocations')
+            remaining = context.get_remaining_time_in_millis() - STOP_MARGIN_MILLIS
+            deadline = time.monotonic() + max(remaining, 0) / 1000
+
+        def run(file):
+            bucket, key = file
+            try:
+                stats = process_file(s3_client, bucket, key, deadline)
+                status = 'success' if stats['completed'] else 'checkpointed'
+                return {'bucket': bucket, 'key': key, 'status': status, 'stats': stats}
+            except Exception as e:
+                # One bad file must not hold back the others
+                print(f"Error processing file {key}: {str(e)}")
+                return {'bucket': bucket, 'key': key, 'status': 'failed', 'error': str(e)}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(FILE_CONCURRENCY, len(files) or 1))) as executor:
+            results = list(executor.map(run, files))
+
+        unfinished = [record for record, result in zip(records, results) if result['status'] == 'checkpointed']
+        if unfinished:
+            continue_later(context, unfinished, resumes + 1)
+
+        errors = [f"{result['key']}: {result['error']}" for result in results if result['status'] == 'failed']
+        if errors:
+            return {
+                'statusCode': 500,
+                'body': json.dumps({'error': '; '.join(errors), 'results': results})
+            }
+        if unfinished:
+            return {
+                'statusCode': 202,
+                'body': json.dumps({'message': 'CSV processing continues in a new invocation', 'results': results})
+            }
         return {
             'statusCode': 200,
-            'body': json.dumps('CSV processing completed successfully')
+            'body': json.dumps({'message': 'CSV processing completed successfully', 'results': results})
         }
-        
+
     except Exception as e:
         print(f"Error processing file: {str(e)}")
         return {
             'statusCode': 500,
-            'body': json.dumps(f'Error processing file: {str(e)}')
+            'body': json.dumps({'error': f'Error processing file: {str(e)}'})
         }
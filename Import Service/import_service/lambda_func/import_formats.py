@@ -0,0 +1,28 @@
+import os
+from typing import Dict
+from csv_compression import SUFFIXES, compression_of
+
+CSV = 'csv'
+JSON_LINES = 'jsonl'
+PARQUET = 'parquet'
+
+FORMAT_SUFFIXES = {'.csv': CSV, '.jsonl': JSON_LINES, '.ndjson': JSON_LINES, '.parquet': PARQUET}
+CONTENT_TYPES = {CSV: 'text/csv', JSON_LINES: 'application/x-ndjson', PARQUET: 'application/vnd.apache.parquet'}
+FORMAT_NAMES = {CSV: 'CSV', JSON_LINES: 'JSON Lines file', PARQUET: 'Parquet file'}
+
+def format_of(key: str) -> str:
+    """File format named by the key suffix, looking past a compression suffix; CSV by default"""
+    stem, suffix = os.path.splitext(key.lower())
+    if suffix in SUFFIXES:
+        suffix = os.path.splitext(stem)[1]
+    return FORMAT_SUFFIXES.get(suffix, CSV)
+
+def upload_headers(file_name: str) -> Dict[str, str]:
+    """Headers for an uploaded file: its format's content type, and the encoding of compressed text"""
+    file_format = format_of(file_name)
+    headers = {'ContentType': CONTENT_TYPES[file_format]}
+    compression = compression_of(file_name)
+    # Parquet compresses its own pages
+    if compression and file_format != PARQUET:
+        headers['ContentEncoding'] = compression
+    return headers
@@ -0,0 +1,69 @@
+import os
+import time
+from botocore.exceptions import ClientError
+from typing import Any, Dict, List, Optional
+
+CHECKPOINT_INTERVAL_SECONDS = float(os.environ.get('CHECKPOINT_INTERVAL_SECONDS', '10'))
+STOP_MARGIN_MILLIS = int(os.environ.get('STOP_MARGIN_MILLIS', '10000'))
+MAX_RESUMES = int(os.environ.get('MAX_RESUMES', '50'))
+IMPORT_JOB_TTL_SECONDS = int(os.environ.get('IMPORT_JOB_TTL_SECONDS', str(7 * 24 * 60 * 60)))
+
+IN_PROGRESS = 'in_progress'
+PARSED = 'parsed'  # every row sent; only the move to parsed/ may be left
+
+def checkpoints_enabled() -> bool:
+    return bool(os.environ.get('IMPORT_JOBS_TABLE_NAME'))
+
+def load_checkpoint(client, import_id: str) -> Optional[Dict[str, Any]]:
+    """Last checkpoint of an import (bucket/key/ETag), or None when it has not started"""
+    response = client.get_item(
+        TableName=os.environ['IMPORT_JOBS_TABLE_NAME'],
+        Key={'import_id': import_id},
+        ConsistentRead=True
+    )
+    item = response.get('Item')
+    if not item:
+        return None
+    return {
+        'offset': int(item['offset']),
+        'row_number': int(item['row_number']),
+        'fieldnames': list(item.get('fieldnames') or []),
+        'status': item['status']
+    }
+
+def save_checkpoint(client, import_id: str, offset: int, row_number: int,
+                    fieldnames: List[str], status: str = IN_PROGRESS) -> bool:
+    """Record that every row up to `offset` has been sent; False if a further checkpoint already exists"""
+    now = int(time.time())
+    try:
+        client.update_item(
+            TableName=os.environ['IMPORT_JOBS_TABLE_NAME'],
+            Key={'import_id': import_id},
+            UpdateExpression=(
+                'SET #offset = :offset, #row_number = :row_number, #fieldnames = :fieldnames, '
+                '#status = :status, #updated_at = :now, #expires_at = :expires_at'
+            ),
+            # A slower duplicate invocation must not move the checkpoint backwards
+            ConditionExpression='attribute_not_exists(#offset) OR #offset <= :offset',
+            ExpressionAttributeNames={
+                '#offset': 'offset',
+                '#row_number': 'row_number',
+                '#fieldnames': 'fieldnames',
+                '#status': 'status',
+                '#updated_at': 'updated_at',
+                '#expires_at': 'expires_at'
+            },
+            ExpressionAttributeValues={
+                ':offset': offset,
+                ':row_number': row_number,
+                ':fieldnames': fieldnames,
+                ':status': status,
+                ':now': now,
+                ':expires_at': now + IMPORT_JOB_TTL_SECONDS
+            }
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+    return True
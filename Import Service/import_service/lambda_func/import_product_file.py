@@ -1,54 +1,39 @@
-import json
 import os
-import boto3
-from botocore.config import Config
 from urllib.parse import unquote
+from clients import get_client
+from import_formats import upload_headers
+from multipart_upload import UPLOAD_PREFIX, create_response
 
 def lambda_handler(event, context):
     try:
         # Get the query parameter
-        file_name = event['queryStringParameters']['name']
-        
+        params = event.get('queryStringParameters') or {}
+        if not params.get('name'):
+            return create_response(400, {'error': 'Missing name parameter'})
+
         # Decode the filename in case it's URL encoded
-        file_name = unquote(file_name)
+        file_name = unquote(params['name'])
         
-        # Configure S3 client with custom configuration
-        config = Config(
-            signature_version='v4',
-            region_name=os.environ['AWS_REGION']
-        )
-        s3_client = boto3.client('s3', config=config)
+        # Get the shared S3 client (SigV4, reused across warm invocations)
+        s3_client = get_client('s3')
         
         # Generate signed URL
         bucket_name = os.environ['BUCKET_NAME']
-        key = f'uploaded/{file_name}'
+        key = f'{UPLOAD_PREFIX}{file_name}'
         
+        # Signed with the file's Content-Type (and Content-Encoding when compressed),
+        # which the client must send with the upload
         signed_url = s3_client.generate_presigned_url(
             'put_object',
             Params={
                 'Bucket': bucket_name,
                 'Key': key,
-                'ContentType': 'text/csv'
+                **upload_headers(file_name)
             },
             ExpiresIn=3600  # URL expires in 1 hour
         )
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Credentials': True,
-                'Access-Control-Allow-Methods' : 'OPTIONS,GET,POST,PUT,DELETE',
-            },
-            'body': signed_url
-        }
-        
+        return create_response(200, signed_url)
+
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Credentials': True
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return create_response(500, {'error': str(e)})
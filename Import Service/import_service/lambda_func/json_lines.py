@@ -0,0 +1,36 @@
+import json
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, List, Optional
+from catalog_writer import REQUIRED_FIELDS
+from csv_stream import ByteLines
+
+class JsonLinesRows:
+    """Objects of a JSON Lines stream, parsed line by line, that know the byte offset past the last one.
+
+    Every object names its own fields, so there is no header to check: fieldnames are the
+    required fields, and an object missing one is rejected as a row like any other.
+    """
+
+    fieldnames: List[str] = REQUIRED_FIELDS
+
+    def __init__(self, chunks: Iterable[bytes], start: int = 0, fieldnames: Optional[List[str]] = None):
+        self.start = start
+        self.offset = start
+        self.lines = ByteLines(chunks, at_start=start == 0)
+        self.line_iter = iter(self.lines)
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        for line in self.line_iter:
+            self.offset = self.start + self.lines.consumed
+            if not line.strip():
+                continue
+            try:
+                # Decimal keeps prices exact, as DynamoDB needs them
+                return json.loads(line, parse_float=Decimal)
+            except ValueError:
+                # Handed on as text, so the writer reports it as an invalid row
+                return line.strip()
+        raise StopIteration
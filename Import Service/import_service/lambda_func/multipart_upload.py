@@ -0,0 +1,23 @@
+import json
+import os
+from typing import Any, Dict
+
+UPLOAD_PREFIX = 'uploaded/'
+UPLOAD_MAX_PARTS = int(os.environ.get('UPLOAD_MAX_PARTS', '1000'))  # keeps the URL list well under 6 MB
+UPLOAD_URL_EXPIRES_SECONDS = int(os.environ.get('UPLOAD_URL_EXPIRES_SECONDS', '3600'))
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Credentials': True,
+    'Access-Control-Allow-Methods': 'OPTIONS,GET,POST,PUT,DELETE',
+}
+
+# Errors caused by the request rather than by S3 or this function
+CLIENT_ERRORS = ('InvalidPart', 'InvalidPartOrder', 'NoSuchUpload', 'EntityTooSmall', 'MalformedXML')
+
+def create_response(status_code: int, body: Any) -> Dict[str, Any]:
+    return {
+        'statusCode': status_code,
+        'headers': CORS_HEADERS,
+        'body': json.dumps(body)
+    }
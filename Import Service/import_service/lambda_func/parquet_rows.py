@@ -0,0 +1,153 @@
+import io
+import os
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional
+from catalog_writer import REQUIRED_FIELDS, ValidatedRow
+
+try:
+    import pyarrow
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # optional; only needed for .parquet uploads
+    pyarrow = pc = pq = None
+
+PARQUET_BATCH_ROWS = int(os.environ.get('PARQUET_BATCH_ROWS', '10000'))
+
+class S3File(io.RawIOBase):
+    """Seekable, read-only view of one version of an S3 object; every read is a ranged GET"""
+
+    def __init__(self, s3_client, bucket: str, key: str, size: int, etag: str):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size}[whence]
+        self.position = min(max(base + offset, 0), self.size)
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.size if size is None or size < 0 else min(self.position + size, self.size)
+        if end <= self.position:
+            return b''
+        # IfMatch fails the read if the object is replaced mid-import
+        data = self.s3_client.get_object(
+            Bucket=self.bucket, Key=self.key, Range=f'bytes={self.position}-{end - 1}', IfMatch=self.etag
+        )['Body'].read()
+        self.position += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def plain(column):
+    return column.dictionary_decode() if pyarrow.types.is_dictionary(column.type) else column
+
+def valid_mask(batch):
+    """Rows passing the create_product rules, checked a column at a time; None if a type needs the row-by-row path"""
+    title, description, price, count = (plain(batch.column(field)) for field in REQUIRED_FIELDS)
+    types = pyarrow.types
+    if not all(types.is_string(column.type) or types.is_large_string(column.type) for column in (title, description)):
+        return None
+    if not (types.is_integer(price.type) or types.is_floating(price.type) or types.is_decimal(price.type)):
+        return None
+    # validate_row rejects 3.0 as a count, so float columns go row by row to get the same answer
+    if not types.is_integer(count.type):
+        return None
+
+    checks = [pc.greater(pc.utf8_length(title), 0), pc.greater(pc.utf8_length(description), 0),
+              pc.greater(price, 0), pc.greater_equal(count, 0)]
+    if types.is_floating(price.type):
+        checks.append(pc.is_finite(price))
+    mask = checks[0]
+    for check in checks[1:]:
+        mask = pc.and_(mask, check)
+    # Nulls compare as null, and a missing value fails
+    return mask.fill_null(False)
+
+def products_of(batch) -> List[ValidatedRow]:
+    """Typed products from rows that passed valid_mask, converted a column at a time"""
+    title, description, price, count = (plain(batch.column(field)) for field in REQUIRED_FIELDS)
+    if pyarrow.types.is_decimal(price.type):
+        prices = price.to_pylist()
+    else:
+        # Through the shortest text form, so 10.99 stays 10.99 rather than its binary expansion
+        prices = [Decimal(text) for text in pc.cast(price, pyarrow.string()).to_pylist()]
+    counts = pc.cast(count, pyarrow.int64()).to_pylist()
+    return [
+        ValidatedRow(title=values[0], description=values[1], price=values[2], count=values[3])
+        for values in zip(title.to_pylist(), description.to_pylist(), prices, counts)
+    ]
+
+def rows_of(batch) -> List[Dict[str, Any]]:
+    """The batch's rows in file order: typed products where valid, raw values for the writer to reject"""
+    mask = valid_mask(batch)
+    if mask is None:
+        return batch.to_pylist()
+    valid = mask.to_pylist()
+    if all(valid):
+        return products_of(batch)
+    products = iter(products_of(batch.filter(mask)))
+    rejected = iter(batch.filter(pc.invert(mask)).to_pylist())
+    return [next(products) if ok else next(rejected) for ok in valid]
+
+class ParquetRows:
+    """Rows of a Parquet file, read in row group batches with ranged GETs and validated a column at a time.
+
+    offset counts the rows returned so far, so a checkpoint resumes at a row index rather than a byte.
+    """
+
+    def __init__(self, source, start: int = 0, fieldnames: Optional[List[str]] = None,
+                 batch_rows: int = PARQUET_BATCH_ROWS):
+        if pq is None:
+            raise ValueError('Reading Parquet files needs the pyarrow package')
+        # pre_buffer coalesces a row group's column chunks into as few reads as possible
+        self.file = pq.ParquetFile(source, pre_buffer=True)
+        self.fieldnames = self.file.schema_arrow.names
+        self.start = start
+        self.offset = start
+        self.batch_rows = batch_rows
+        self.rows = self._rows()
+
+    def _batches(self):
+        metadata = self.file.metadata
+        skip, first = self.start, 0
+        # Row groups before the checkpoint are never fetched
+        while first < metadata.num_row_groups and skip >= metadata.row_group(first).num_rows:
+            skip -= metadata.row_group(first).num_rows
+            first += 1
+        if first == metadata.num_row_groups:
+            return
+        row_groups = list(range(first, metadata.num_row_groups))
+        batches = self.file.iter_batches(batch_size=self.batch_rows, row_groups=row_groups, columns=REQUIRED_FIELDS)
+        for batch in batches:
+            if skip:
+                dropped = min(skip, batch.num_rows)
+                batch, skip = batch.slice(dropped), skip - dropped
+            yield batch
+
+    def _rows(self) -> Iterator[Dict[str, Any]]:
+        for batch in self._batches():
+            yield from rows_of(batch)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        row = next(self.rows)
+        self.offset += 1
+        return row
@@ -0,0 +1,69 @@
+import json
+import time
+from botocore.exceptions import ClientError
+from typing import Any, Dict, List
+from catalog_writer import (
+    WRITE_MAX_ATTEMPTS,
+    WRITE_QUEUE_BATCHES,
+    WRITE_WORKERS,
+    BatchPipeline,
+    WriteError,
+    backoff_delay
+)
+
+SEND_MESSAGE_BATCH_MAX_ENTRIES = 10  # SQS limit per SendMessageBatch request
+SQS_THROTTLING_ERRORS = ('ThrottlingException', 'RequestThrottled', 'ServiceUnavailable')
+
+def product_message(product: Dict[str, Any], product_id: str) -> str:
+    """Queue message for one validated row; the id makes redelivered messages idempotent"""
+    return json.dumps({
+        'id': product_id,
+        'title': product['title'],
+        'description': product['description'],
+        # Sent as text so the consumer gets the exact decimal back
+        'price': str(product['price']),
+        'count': product['count']
+    })
+
+def send_batch(client, queue_url: str, bodies: List[str]) -> int:
+    """SendMessageBatch with retries of failed entries; returns retries"""
+    entries = [{'Id': str(index), 'MessageBody': body} for index, body in enumerate(bodies)]
+    attempt = 0
+    while entries:
+        try:
+            response = client.send_message_batch(QueueUrl=queue_url, Entries=entries)
+        except ClientError as e:
+            if e.response['Error']['Code'] not in SQS_THROTTLING_ERRORS:
+                raise
+        else:
+            failed = response.get('Failed', [])
+            sender_faults = [entry for entry in failed if entry.get('SenderFault')]
+            if sender_faults:
+                raise WriteError(f"SQS rejected message: {sender_faults[0].get('Message', sender_faults[0]['Code'])}")
+            failed_ids = {entry['Id'] for entry in failed}
+            entries = [entry for entry in entries if entry['Id'] in failed_ids]
+            if not entries:
+                break
+        attempt += 1
+        if attempt >= WRITE_MAX_ATTEMPTS:
+            raise WriteError(f'SendMessageBatch still failing after {attempt} attempts')
+        time.sleep(backoff_delay(attempt))
+    return attempt
+
+class QueuePublisher(BatchPipeline):
+    """Publishes validated rows to the catalog items queue, 10 messages per call"""
+
+    batch_limit = SEND_MESSAGE_BATCH_MAX_ENTRIES
+    requests_per_row = 1
+
+    def __init__(self, client, queue_url: str, source: str, workers: int = WRITE_WORKERS,
+                 queue_batches: int = WRITE_QUEUE_BATCHES):
+        self.client = client
+        self.queue_url = queue_url
+        super().__init__(source, workers, queue_batches)
+
+    def requests(self, product: Dict[str, Any], product_id: str) -> List[str]:
+        return [product_message(product, product_id)]
+
+    def send(self, batch: List[str]) -> int:
+        return send_batch(self.client, self.queue_url, batch)
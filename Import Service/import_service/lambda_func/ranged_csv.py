@@ -0,0 +1,131 @@
+import csv
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from csv_stream import ByteLines
+
+RANGE_THRESHOLD_BYTES = int(os.environ.get('RANGE_THRESHOLD_BYTES', str(128 * 1024 * 1024)))
+RANGE_PART_SIZE = int(os.environ.get('RANGE_PART_SIZE', str(4 * 1024 * 1024)))
+RANGE_CONCURRENCY = int(os.environ.get('RANGE_CONCURRENCY', '8'))
+
+# Neither byte occurs inside a multi-byte UTF-8 character, so parts can be scanned undecoded.
+# Quote parity assumes RFC 4180 quoting; a stray quote inside an unquoted field shifts row boundaries.
+QUOTE = b'"'
+NEWLINE = b'\n'
+
+def row_boundaries(data: bytes) -> Tuple[int, Dict[int, Optional[int]]]:
+    """Quote count of a part, and where its last complete row ends for either quote parity at its start"""
+    quotes = data.count(QUOTE)
+    boundaries: Dict[int, Optional[int]] = {0: None, 1: None}
+    end = len(data)
+    quotes_before = quotes
+    while None in boundaries.values():
+        newline = data.rfind(NEWLINE, 0, end)
+        if newline < 0:
+            break
+        quotes_before -= data.count(QUOTE, newline, end)
+        # The newline ends a row when the quotes before it, including the starting parity, are balanced
+        if boundaries[quotes_before % 2] is None:
+            boundaries[quotes_before % 2] = newline + 1
+        if quotes_before == 0:
+            # Every earlier newline has the same parity, so the other case has no boundary in this part
+            break
+        end = newline
+    return quotes, boundaries
+
+def ordered_map(executor: ThreadPoolExecutor, fn: Callable, items: Iterable, window: int) -> Iterator[Any]:
+    """executor.map with at most `window` calls in flight, yielding results in input order"""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+class RangedCsvReader:
+    """csv.DictReader over an S3 object fetched as parallel byte ranges and parsed on a worker pool"""
+
+    def __init__(self, s3_client, bucket: str, key: str, size: int, etag: str = '',
+                 part_size: int = RANGE_PART_SIZE, concurrency: int = RANGE_CONCURRENCY,
+                 start: int = 0, fieldnames: Optional[List[str]] = None):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.part_size = part_size
+        self.concurrency = max(1, concurrency)
+        # A read from a row boundary other than 0 has no header, so its fieldnames are passed in
+        self.start = start
+        self.offset = start
+        self._rows = self._iter_rows()
+        self._fieldnames = fieldnames
+
+    def _fetch(self, start: int) -> Tuple[bytes, int, Dict[int, Optional[int]]]:
+        end = min(start + self.part_size, self.size) - 1
+        # IfMatch fails the import if the object is replaced while its ranges are being read
+        extra = {'IfMatch': self.etag} if self.etag else {}
+        data = self.s3_client.get_object(
+            Bucket=self.bucket, Key=self.key, Range=f'bytes={start}-{end}', **extra
+        )['Body'].read()
+        return (data, *row_boundaries(data))
+
+    def _segments(self, parts: Iterable[Tuple[bytes, int, Dict[int, Optional[int]]]]) -> Iterator[Tuple[int, bytes]]:
+        """Re-cut the parts so each segment ends on a row boundary, carrying quote parity across parts"""
+        position = self.start
+        parity = 0
+        carry = b''
+        for data, quotes, boundaries in parts:
+            cut = boundaries[parity]
+            if cut is None:
+                # No row ends in this part, e.g. a long quoted field
+                carry += data
+            else:
+                segment = carry + data[:cut]
+                yield position, segment
+                position += len(segment)
+                carry = data[cut:]
+            parity = (parity + quotes) % 2
+        if carry:
+            yield position, carry
+
+    @staticmethod
+    def _parse(item: Tuple[int, bytes]) -> List[Tuple[List[str], int]]:
+        """Rows of one segment, each with the file offset just past it"""
+        position, segment = item
+        lines = ByteLines([segment], at_start=position == 0)
+        return [(row, position + lines.consumed) for row in csv.reader(lines)]
+
+    def _iter_rows(self) -> Iterator[Tuple[List[str], int]]:
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            starts = range(self.start, self.size, self.part_size)
+            parts = ordered_map(executor, self._fetch, starts, self.concurrency)
+            # Segments are parsed in parallel but read back in file order, so row numbers stay stable
+            for rows in ordered_map(executor, self._parse, self._segments(parts), self.concurrency):
+                yield from rows
+
+    @property
+    def fieldnames(self) -> Optional[List[str]]:
+        if self._fieldnames is None:
+            self._fieldnames = next((row for row, _ in self._rows if row), None)
+        return self._fieldnames
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        fieldnames = self.fieldnames
+        if fieldnames is None:
+            raise StopIteration
+        row, self.offset = next(self._rows)
+        while not row:
+            row, self.offset = next(self._rows)
+        # Same shape as csv.DictReader: missing fields are None, extra ones go under the None key
+        record: Dict[Any, Any] = dict(zip(fieldnames, row))
+        if len(row) > len(fieldnames):
+            record[None] = row[len(fieldnames):]
+        for field in fieldnames[len(row):]:
+            record[field] = None
+        return record
@@ -0,0 +1,65 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+COPY_THRESHOLD_BYTES = int(os.environ.get('COPY_THRESHOLD_BYTES', str(256 * 1024 * 1024)))
+COPY_PART_SIZE = int(os.environ.get('COPY_PART_SIZE', str(64 * 1024 * 1024)))
+COPY_CONCURRENCY = int(os.environ.get('COPY_CONCURRENCY', '8'))
+
+# S3 multipart limits
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+def part_ranges(size: int, part_size: int) -> List[Tuple[int, int]]:
+    """Inclusive byte ranges for the parts, growing the part size if the object needs more than 10,000"""
+    part_size = max(part_size, MIN_PART_SIZE, -(-size // MAX_PARTS))
+    return [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+def multipart_copy(s3_client, bucket: str, key: str, new_key: str, head: Dict[str, Any],
+                   part_size: int = COPY_PART_SIZE, concurrency: int = COPY_CONCURRENCY) -> int:
+    """Copy an object with parallel upload_part_copy calls; returns the number of parts"""
+    # Multipart copies do not carry the source's headers over, so they are set on the upload
+    extra = {name: head[name] for name in ('ContentType', 'ContentEncoding', 'Metadata') if head.get(name)}
+    upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=new_key, **extra)['UploadId']
+
+    def copy_part(numbered_range):
+        part_number, (start, end) = numbered_range
+        response = s3_client.upload_part_copy(
+            Bucket=bucket,
+            Key=new_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            CopySource={'Bucket': bucket, 'Key': key},
+            CopySourceRange=f'bytes={start}-{end}',
+            # Every part must come from the version that was imported
+            CopySourceIfMatch=head['ETag']
+        )
+        return {'PartNumber': part_number, 'ETag': response['CopyPartResult']['ETag']}
+
+    try:
+        ranges = part_ranges(head['ContentLength'], part_size)
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(ranges)))) as executor:
+            parts = list(executor.map(copy_part, enumerate(ranges, start=1)))
+        s3_client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=new_key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+    except Exception:
+        # Uploaded parts are billed until the upload is aborted
+        s3_client.abort_multipart_upload(Bucket=bucket, Key=new_key, UploadId=upload_id)
+        raise
+    return len(parts)
+
+def copy_object(s3_client, bucket: str, key: str, new_key: str, head: Dict[str, Any]) -> None:
+    """Server-side copy within the bucket; large objects go through a parallel multipart copy"""
+    if head['ContentLength'] < COPY_THRESHOLD_BYTES:
+        s3_client.copy_object(
+            Bucket=bucket,
+            CopySource={'Bucket': bucket, 'Key': key},
+            Key=new_key
+        )
+        return
+    parts = multipart_copy(s3_client, bucket, key, new_key, head, COPY_PART_SIZE, COPY_CONCURRENCY)
+    print(f"Copied {key} to {new_key} in {parts} parts")
@@ -0,0 +1,62 @@
+import os
+from urllib.parse import unquote
+from clients import get_client
+from import_formats import upload_headers
+from multipart_upload import UPLOAD_MAX_PARTS, UPLOAD_PREFIX, UPLOAD_URL_EXPIRES_SECONDS, create_response
+
+def lambda_handler(event, context):
+    """Start a multipart upload and presign an upload_part URL for every part"""
+    try:
+        params = event.get('queryStringParameters') or {}
+        if not params.get('name'):
+            return create_response(400, {'error': 'Missing name parameter'})
+        try:
+            part_count = int(params.get('parts', ''))
+        except ValueError:
+            part_count = 0
+        if not 1 <= part_count <= UPLOAD_MAX_PARTS:
+            return create_response(400, {'error': f'parts must be an integer from 1 to {UPLOAD_MAX_PARTS}'})
+
+        # Decode the filename in case it's URL encoded
+        file_name = unquote(params['name'])
+        bucket_name = os.environ['BUCKET_NAME']
+        key = f'{UPLOAD_PREFIX}{file_name}'
+
+        # Get the shared S3 client (SigV4, reused across warm invocations)
+        s3_client = get_client('s3')
+        # Headers are fixed when the upload starts, so the part URLs need none
+        upload_id = s3_client.create_multipart_upload(
+            Bucket=bucket_name,
+            Key=key,
+            **upload_headers(file_name)
+        )['UploadId']
+
+        # Signing is local, so even a thousand URLs cost no extra S3 calls.
+        # A URL can be reused to retry its part until it expires.
+        parts = [
+            {
+                'partNumber': part_number,
+                'url': s3_client.generate_presigned_url(
+                    'upload_part',
+                    Params={
+                        'Bucket': bucket_name,
+                        'Key': key,
+                        'UploadId': upload_id,
+                        'PartNumber': part_number
+                    },
+                    ExpiresIn=UPLOAD_URL_EXPIRES_SECONDS
+                )
+            }
+            for part_number in range(1, part_count + 1)
+        ]
+
+        return create_response(200, {
+            'key': key,
+            'uploadId': upload_id,
+            'expiresIn': UPLOAD_URL_EXPIRES_SECONDS,
+            'parts': parts
+        })
+
+    except Exception as e:
+        print(f"Error starting multipart upload: {str(e)}")
+        return create_response(500, {'error': str(e)})
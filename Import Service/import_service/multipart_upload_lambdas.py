@@ -0,0 +1,47 @@
+from typing import Tuple
+from aws_cdk import (
+    aws_lambda as _lambda,
+    aws_s3 as s3,
+    Duration
+)
+from constructs import Construct
+
+def create_multipart_upload_lambdas(
+    scope: Construct,
+    import_bucket: s3.IBucket
+) -> Tuple[_lambda.Function, _lambda.Function]:
+
+    # Starts a multipart upload and presigns its part URLs
+    start_multipart_upload = _lambda.Function(
+        scope, 'StartMultipartUpload',
+        runtime=_lambda.Runtime.PYTHON_3_9,
+        handler='start_multipart_upload.lambda_handler',
+        code=_lambda.Code.from_asset('import_service/lambda_func/'),
+        environment={
+            'BUCKET_NAME': import_bucket.bucket_name,
+            'UPLOAD_MAX_PARTS': '1000',
+            'UPLOAD_URL_EXPIRES_SECONDS': '3600'
+        },
+        timeout=Duration.seconds(30),
+        memory_size=256
+    )
+
+    # Assembles the uploaded parts into uploaded/<name>
+    complete_multipart_upload = _lambda.Function(
+        scope, 'CompleteMultipartUpload',
+        runtime=_lambda.Runtime.PYTHON_3_9,
+        handler='complete_multipart_upload.lambda_handler',
+        code=_lambda.Code.from_asset('import_service/lambda_func/'),
+        environment={
+            'BUCKET_NAME': import_bucket.bucket_name,
+            'UPLOAD_MAX_PARTS': '1000'
+        },
+        timeout=Duration.seconds(30),
+        memory_size=128
+    )
+
+    # Presigned part URLs act with the signer's permissions, so both need PutObject
+    import_bucket.grant_put(start_multipart_upload)
+    import_bucket.grant_put(complete_multipart_upload)
+
+    return start_multipart_upload, complete_multipart_upload
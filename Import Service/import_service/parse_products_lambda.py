@@ -1,6 +1,8 @@
 from aws_cdk import (
     aws_lambda as _lambda,
     aws_s3 as s3,
+    aws_sqs as sqs,
+    aws_dynamodb as dynamodb,
     aws_s3_notifications as s3n,
     Duration,
     aws_iam as iam
@@ -9,7 +11,9 @@ from constructs import Construct
 
 def create_parse_products_lambda(
     scope: Construct, 
-    import_bucket: s3.IBucket
+    import_bucket: s3.IBucket,
+    catalog_items_queue: sqs.IQueue,
+    import_jobs_table: dynamodb.ITable
 ) -> _lambda.Function:
 
     # Create importFileParser Lambda
@@ -19,10 +23,22 @@ def create_parse_products_lambda(
         handler='import_file_parser.lambda_handler',
         code=_lambda.Code.from_asset('import_service/lambda_func/'),
         environment={
-            'BUCKET_NAME': import_bucket.bucket_name
+            'BUCKET_NAME': import_bucket.bucket_name,
+            'CATALOG_ITEMS_QUEUE_URL': catalog_items_queue.queue_url,
+            'IMPORT_JOBS_TABLE_NAME': import_jobs_table.table_name,
+            'CHECKPOINT_INTERVAL_SECONDS': '10',
+            'STOP_MARGIN_MILLIS': '10000',
+            'FILE_CONCURRENCY': '4',
+            'RANGE_THRESHOLD_BYTES': str(128 * 1024 * 1024),
+            'RANGE_PART_SIZE': str(4 * 1024 * 1024),
+            'RANGE_CONCURRENCY': '8',
+            'COPY_THRESHOLD_BYTES': str(256 * 1024 * 1024),
+            'COPY_PART_SIZE': str(64 * 1024 * 1024),
+            'COPY_CONCURRENCY': '8'
         },
         timeout=Duration.seconds(60),
-        memory_size=256
+        # Ranged reads keep several parts in memory; Lambda also scales CPU and network with memory
+        memory_size=1024
     )
 
     # Grant S3 permissions to Lambda
@@ -31,6 +47,23 @@ def create_parse_products_lambda(
     import_bucket.grant_put(import_file_parser)
     import_bucket.grant_delete(import_file_parser)
 
+    # Parsed rows are published for catalogBatchProcess to write
+    catalog_items_queue.grant_send_messages(import_file_parser)
+
+    # Checkpoints of each import, so a timed-out import resumes instead of starting over
+    import_jobs_table.grant_read_write_data(import_file_parser)
+
+    # Unfinished imports hand over to a fresh invocation. A separate policy, because the
+    # function's default policy referencing the function itself would be a circular dependency.
+    iam.Policy(
+        scope, 'ImportFileParserSelfInvokePolicy',
+        roles=[import_file_parser.role],
+        statements=[iam.PolicyStatement(
+            actions=['lambda:InvokeFunction'],
+            resources=[import_file_parser.function_arn]
+        )]
+    )
+
     # Add S3 notification for the uploaded/ prefix
     import_bucket.add_event_notification(
         s3.EventType.OBJECT_CREATED,
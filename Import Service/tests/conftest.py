@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Add the lambda_func directory to Python path, mirroring the Lambda asset root
+sys.path.append(os.path.join(os.path.dirname(__file__), '../import_service/lambda_func'))
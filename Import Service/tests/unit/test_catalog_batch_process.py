@@ -0,0 +1,205 @@
+import json
+import threading
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+import catalog_writer
+from catalog_batch_process import lambda_handler as consume
+from import_file_parser import lambda_handler as parse
+from queue_publisher import send_batch
+
+QUEUE_URL = 'https://sqs.us-east-1.amazonaws.com/123456789012/catalogItemsQueue'
+
+class LocalQueue:
+    """In-memory stand-in for the SQS client"""
+
+    def __init__(self, fail_once=()):
+        self.lock = threading.Lock()
+        self.messages = []
+        self.calls = []
+        self.fail_once = set(fail_once)
+
+    def send_message_batch(self, QueueUrl, Entries):
+        assert len(Entries) <= 10
+        failed = []
+        with self.lock:
+            self.calls.append(len(Entries))
+            for entry in Entries:
+                if entry['MessageBody'] in self.fail_once:
+                    self.fail_once.discard(entry['MessageBody'])
+                    failed.append({'Id': entry['Id'], 'Code': 'InternalError', 'SenderFault': False})
+                    continue
+                self.messages.append(entry['MessageBody'])
+        return {'Successful': [], 'Failed': failed}
+
+    def event(self):
+        return {'Records': [
+            {'messageId': f'message-{index}', 'body': body}
+            for index, body in enumerate(self.messages)
+        ]}
+
+class LocalTables:
+    """In-memory stand-in for the DynamoDB client behind the resource"""
+
+    def __init__(self, broken_titles=()):
+        self.lock = threading.Lock()
+        self.tables = {'products': {}, 'stocks': {}}
+        self.broken_titles = set(broken_titles)
+        self.version_bumps = 0
+
+    def batch_write_item(self, RequestItems):
+        assert sum(len(requests) for requests in RequestItems.values()) <= 25
+        titles = {request['PutRequest']['Item']['title'] for request in RequestItems.get('products', [])}
+        if titles & self.broken_titles:
+            raise ClientError({'Error': {'Code': 'ValidationException', 'Message': 'broken'}}, 'BatchWriteItem')
+        for table_name, requests in RequestItems.items():
+            key = 'id' if table_name == 'products' else 'product_id'
+            if len({request['PutRequest']['Item'][key] for request in requests}) < len(requests):
+                raise ClientError({'Error': {'Code': 'ValidationException',
+                                             'Message': 'Provided list of item keys contains duplicates'}},
+                                  'BatchWriteItem')
+        with self.lock:
+            for table_name, requests in RequestItems.items():
+                key = 'id' if table_name == 'products' else 'product_id'
+                for request in requests:
+                    item = request['PutRequest']['Item']
+                    self.tables[table_name][item[key]] = item
+        return {'UnprocessedItems': {}}
+
+    def update_item(self, TableName, Key, **kwargs):
+        assert (TableName, Key) == ('catalog-meta', {'id': 'catalog'})
+        with self.lock:
+            self.version_bumps += 1
+
+def csv_body(rows):
+    payload = 'title,description,price,count\n' + ''.join(
+        f'Product {index},Desc {index},{index}.25,{index % 7}\n' for index in range(rows)
+    ) + 'Broken,No price,,1\n'
+    return {'Body': MagicMock(iter_chunks=lambda chunk_size: iter([payload.encode('utf-8')]))}
+
+@patch.dict('os.environ', {
+    'PRODUCTS_TABLE_NAME': 'products',
+    'STOCKS_TABLE_NAME': 'stocks',
+    'CATALOG_ITEMS_QUEUE_URL': QUEUE_URL
+})
+@patch.object(catalog_writer.time, 'sleep', lambda seconds: None)
+class TestCatalogBatchProcess(unittest.TestCase):
+    def run_parser(self, queue, rows):
+        s3_client = MagicMock()
+        s3_client.head_object.return_value = {'ContentLength': 1024, 'ETag': '"abc"'}
+        s3_client.get_object.return_value = csv_body(rows)
+        clients = {'s3': s3_client, 'sqs': queue}
+        event = {'Records': [{'s3': {'bucket': {'name': 'myimportservicebucket'},
+                                     'object': {'key': 'uploaded/catalog.csv'}}}]}
+        with patch('import_file_parser.get_client', side_effect=clients.get):
+            return parse(event, {})
+
+    def test_rows_flow_through_the_queue_into_the_tables(self):
+        queue, tables = LocalQueue(), LocalTables()
+
+        response = self.run_parser(queue, 25)
+
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(json.loads(response['body'])['results'][0]['stats']['invalid'], 1)
+        # 25 valid rows packed 10 per SendMessageBatch call
+        self.assertEqual(sorted(queue.calls), [5, 10, 10])
+
+        with patch('catalog_batch_process.get_resource') as get_resource:
+            get_resource.return_value.meta.client = tables
+            result = consume(queue.event(), {})
+
+        self.assertEqual(result, {'batchItemFailures': []})
+        self.assertEqual(len(tables.tables['products']), 25)
+        product = next(item for item in tables.tables['products'].values() if item['title'] == 'Product 3')
+        self.assertEqual(product['price'], Decimal('3.25'))
+        self.assertEqual(tables.tables['stocks'][product['id']]['count'], 3)
+
+    def test_redelivered_messages_do_not_duplicate_products(self):
+        queue, tables = LocalQueue(), LocalTables()
+        self.run_parser(queue, 3)
+
+        with patch('catalog_batch_process.get_resource') as get_resource:
+            get_resource.return_value.meta.client = tables
+            consume(queue.event(), {})
+            consume(queue.event(), {})
+
+        self.assertEqual(len(tables.tables['products']), 3)
+
+    def test_failed_writes_are_reported_as_partial_batch_failures(self):
+        queue = LocalQueue()
+        self.run_parser(queue, 30)
+        tables = LocalTables(broken_titles={'Product 20'})
+
+        with patch('catalog_batch_process.get_resource') as get_resource:
+            get_resource.return_value.meta.client = tables
+            event = queue.event()
+            event['Records'].append({'messageId': 'garbage', 'body': 'not json'})
+            result = consume(event, {})
+
+        failed = {failure['itemIdentifier'] for failure in result['batchItemFailures']}
+        broken = next(record['messageId'] for record in event['Records']
+                      if record['body'] != 'not json' and json.loads(record['body'])['title'] == 'Product 20')
+        # Only the 12 messages written together with the broken one are retried
+        self.assertIn(broken, failed)
+        self.assertEqual(len(failed), 12)
+        self.assertNotIn('garbage', failed)
+        self.assertEqual(len(tables.tables['products']), 18)
+
+    def test_duplicate_product_ids_are_written_once(self):
+        tables = LocalTables()
+        bodies = [
+            {'id': 'same', 'title': 'Old', 'description': 'x', 'price': '1', 'count': 1},
+            {'id': 'other', 'title': 'Other', 'description': 'x', 'price': '2', 'count': 2},
+            {'id': 'same', 'title': 'New', 'description': 'x', 'price': '3', 'count': 3},
+        ]
+        event = {'Records': [{'messageId': f'message-{index}', 'body': json.dumps(body)}
+                             for index, body in enumerate(bodies)]}
+
+        with patch('catalog_batch_process.get_resource') as get_resource:
+            get_resource.return_value.meta.client = tables
+            result = consume(event, {})
+
+        # Every duplicate message is acknowledged, and the last one wins
+        self.assertEqual(result, {'batchItemFailures': []})
+        self.assertEqual(tables.tables['products']['same']['title'], 'New')
+        self.assertEqual(tables.tables['stocks']['same']['count'], 3)
+
+    def test_duplicates_of_a_failed_product_are_all_retried(self):
+        tables = LocalTables(broken_titles={'Broken'})
+        bodies = [{'id': 'same', 'title': title, 'description': 'x', 'price': '1', 'count': 1}
+                  for title in ('First', 'Broken')]
+        event = {'Records': [{'messageId': f'message-{index}', 'body': json.dumps(body)}
+                             for index, body in enumerate(bodies)]}
+
+        with patch('catalog_batch_process.get_resource') as get_resource:
+            get_resource.return_value.meta.client = tables
+            result = consume(event, {})
+
+        self.assertEqual(result, {'batchItemFailures': [
+            {'itemIdentifier': 'message-0'}, {'itemIdentifier': 'message-1'}
+        ]})
+
+    @patch.dict('os.environ', {'CATALOG_META_TABLE_NAME': 'catalog-meta'})
+    def test_catalog_version_is_bumped_once_per_batch(self):
+        queue = LocalQueue()
+        self.run_parser(queue, 30)
+
+        with patch('catalog_batch_process.get_resource') as get_resource:
+            tables = get_resource.return_value.meta.client = LocalTables()
+            consume(queue.event(), {})
+            self.assertEqual(tables.version_bumps, 1)
+
+            # Nothing was written, so cached pages are still current
+            tables = get_resource.return_value.meta.client = LocalTables(broken_titles={'Product 0'})
+            consume({'Records': queue.event()['Records'][:1]}, {})
+            self.assertEqual(tables.version_bumps, 0)
+
+    def test_failed_queue_entries_are_resent(self):
+        queue = LocalQueue(fail_once={'second'})
+
+        retries = send_batch(queue, QUEUE_URL, ['first', 'second', 'third'])
+
+        self.assertEqual(retries, 1)
+        self.assertEqual(sorted(queue.messages), ['first', 'second', 'third'])
+        self.assertEqual(queue.calls, [3, 1])
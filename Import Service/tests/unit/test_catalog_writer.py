@@ -0,0 +1,123 @@
+import threading
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+import catalog_writer
+from catalog_writer import CatalogWriter, WriteError, validate_row, write_batch
+
+def row(index, **overrides):
+    return {'title': f'Product {index}', 'description': 'Desc', 'price': '10.50', 'count': '3', **overrides}
+
+def throttled():
+    return ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'slow down'}},
+                       'BatchWriteItem')
+
+@patch.dict('os.environ', {'PRODUCTS_TABLE_NAME': 'products', 'STOCKS_TABLE_NAME': 'stocks'})
+@patch.object(catalog_writer.time, 'sleep', lambda seconds: None)
+class TestCatalogWriter(unittest.TestCase):
+    def test_validate_row_applies_create_product_rules(self):
+        product, error = validate_row(row(1))
+        self.assertEqual(error, '')
+        self.assertEqual(product['price'], Decimal('10.50'))
+        self.assertEqual(product['count'], 3)
+
+        self.assertEqual(validate_row(row(1, count=''))[1], 'Missing required field: count')
+        self.assertEqual(validate_row(row(1, price='-1'))[1], 'Price must be a positive number')
+        self.assertEqual(validate_row(row(1, price='abc'))[1], 'Price must be a positive number')
+        self.assertEqual(validate_row(row(1, count='2.5'))[1], 'Count must be a non-negative integer')
+        self.assertEqual(validate_row(row(1, count='-1'))[1], 'Count must be a non-negative integer')
+        # Typed formats: JSON Lines values keep their JSON types
+        self.assertEqual(validate_row(row(1, price=Decimal('10.5'), count=3))[0]['price'], Decimal('10.5'))
+        self.assertEqual(validate_row(row(1, title=7))[1], 'Title must be text')
+        self.assertEqual(validate_row(['not', 'an', 'object'])[1], 'Row must be an object')
+
+    def test_rows_are_written_in_25_item_batches(self):
+        client = MagicMock()
+        client.batch_write_item.return_value = {'UnprocessedItems': {}}
+        writer = CatalogWriter(client, 'bucket/uploaded/a.csv', workers=2)
+
+        for index in range(30):
+            writer.add(index + 1, row(index))
+        writer.add(31, row(31, price='0'))
+        stats = writer.close()
+
+        sizes = sorted(
+            sum(len(requests) for requests in call.kwargs['RequestItems'].values())
+            for call in client.batch_write_item.call_args_list
+        )
+        self.assertEqual(sizes, [12, 24, 24])
+        self.assertEqual((stats['rows'], stats['written'], stats['invalid']), (31, 30, 1))
+        item = client.batch_write_item.call_args_list[0].kwargs['RequestItems']['products'][0]['PutRequest']['Item']
+        self.assertEqual(item['catalog'], 'products')
+        self.assertEqual(item['title_lower'], item['title'].lower())
+
+    @patch.dict('os.environ', {'CATALOG_META_TABLE_NAME': 'catalog-meta'})
+    def test_catalog_version_is_bumped_after_an_import(self):
+        client = MagicMock()
+        client.batch_write_item.return_value = {'UnprocessedItems': {}}
+        writer = CatalogWriter(client, 'bucket/uploaded/a.csv', workers=2)
+        for index in range(30):
+            writer.add(index + 1, row(index))
+        writer.close()
+
+        client.update_item.assert_called_once()
+        self.assertEqual(client.update_item.call_args.kwargs['TableName'], 'catalog-meta')
+
+        client.reset_mock()
+        writer = CatalogWriter(client, 'bucket/uploaded/b.csv', workers=1)
+        writer.add(1, row(1, price='0'))
+        writer.close()
+        client.update_item.assert_not_called()
+
+    def test_product_ids_are_stable_per_file_and_row(self):
+        def first_id(source):
+            client = MagicMock()
+            client.batch_write_item.return_value = {'UnprocessedItems': {}}
+            writer = CatalogWriter(client, source, workers=1)
+            writer.add(1, row(1))
+            writer.close()
+            return client.batch_write_item.call_args.kwargs['RequestItems']['products'][0]['PutRequest']['Item']['id']
+
+        self.assertEqual(first_id('bucket/a.csv/"etag"'), first_id('bucket/a.csv/"etag"'))
+        self.assertNotEqual(first_id('bucket/a.csv/"etag"'), first_id('bucket/b.csv/"etag"'))
+
+    def test_throttling_and_unprocessed_items_are_retried(self):
+        client = MagicMock()
+        leftover = {'stocks': [{'PutRequest': {'Item': {'product_id': 'x', 'count': 1}}}]}
+        client.batch_write_item.side_effect = [throttled(), {'UnprocessedItems': leftover}, {'UnprocessedItems': {}}]
+
+        retries = write_batch(client, catalog_writer.write_requests(validate_row(row(1))[0], 'x'))
+
+        self.assertEqual(retries, 2)
+        self.assertEqual(client.batch_write_item.call_args.kwargs['RequestItems'], leftover)
+
+    def test_persistent_throttling_fails_the_import(self):
+        client = MagicMock()
+        client.batch_write_item.side_effect = throttled()
+        writer = CatalogWriter(client, 'source', workers=1)
+
+        writer.add(1, row(1))
+        with self.assertRaises(WriteError):
+            writer.close()
+
+    def test_parsing_pauses_while_writes_fall_behind(self):
+        release = threading.Event()
+        client = MagicMock()
+        client.batch_write_item.side_effect = lambda **kwargs: release.wait() and {'UnprocessedItems': {}}
+        writer = CatalogWriter(client, 'source', workers=1, queue_batches=1)
+
+        def produce():
+            # 12 products per batch: one batch in the writer, one queued, then add() has to wait
+            for index in range(12 * 4):
+                writer.add(index + 1, row(index))
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        producer.join(timeout=0.5)
+        self.assertTrue(producer.is_alive())
+
+        release.set()
+        producer.join(timeout=5)
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(writer.close()['written'], 48)
@@ -0,0 +1,135 @@
+import gzip
+import tracemalloc
+import unittest
+import zlib
+from unittest.mock import MagicMock, patch
+import csv_compression
+from csv_compression import compression_of, decompress, skip_bytes, sniff
+from csv_stream import CsvRows
+from import_file_parser import open_reader, process_file
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CATALOG = ('title,description,price,count\r\n'
+           'Lamp,"Desk lamp,\nbrass",10.50,3\r\n'
+           'Café,Crème brûlée torch 🔥,12,4\r\n'
+           'Desk,Oak desk,99,1\r\n').encode('utf-8')
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def body(data, chunk_size=7):
+    return {'Body': MagicMock(
+        read=lambda: data,
+        iter_chunks=lambda size: iter(chunked(data, chunk_size))
+    )}
+
+def rows(chunks):
+    return [row['title'] for row in CsvRows(decompress(chunks))]
+
+class TestCsvCompression(unittest.TestCase):
+    def test_compression_comes_from_the_encoding_or_the_key(self):
+        self.assertEqual(compression_of('uploaded/a.csv.gz'), 'gzip')
+        self.assertEqual(compression_of('uploaded/A.CSV.ZST'), 'zstd')
+        self.assertEqual(compression_of('uploaded/a.csv'), None)
+        self.assertEqual(compression_of('uploaded/a.csv', 'gzip'), 'gzip')
+        self.assertEqual(sniff(gzip.compress(b'x')), 'gzip')
+        self.assertEqual(sniff(b'title,price'), None)
+
+    def test_gzip_streams_across_members_and_chunk_boundaries(self):
+        # Parallel gzip tools write one member per block
+        data = gzip.compress(CATALOG[:40]) + gzip.compress(CATALOG[40:])
+
+        for size in (1, 3, 64, len(data)):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(rows(chunked(data, size)), ['Lamp', 'Café', 'Desk'])
+
+    def test_plain_text_passes_through(self):
+        self.assertEqual(rows(chunked(CATALOG, 2)), ['Lamp', 'Café', 'Desk'])
+
+    @unittest.skipUnless(zstandard, 'zstandard is not installed')
+    def test_zstd_streams_across_frames(self):
+        compressor = zstandard.ZstdCompressor()
+        data = compressor.compress(CATALOG[:40]) + compressor.compress(CATALOG[40:])
+
+        for size in (1, 5, len(data)):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(rows(chunked(data, size)), ['Lamp', 'Café', 'Desk'])
+
+    def test_zstd_without_the_package_is_a_clear_error(self):
+        with patch.object(csv_compression, 'zstandard', None):
+            with self.assertRaisesRegex(ValueError, 'zstandard'):
+                list(decompress([b'\x28\xb5\x2f\xfd\x00']))
+
+    def test_skip_bytes_drops_a_prefix_across_chunks(self):
+        self.assertEqual(b''.join(skip_bytes(chunked(b'0123456789', 3), 4)), b'456789')
+        self.assertEqual(b''.join(skip_bytes(chunked(b'0123', 3), 9)), b'')
+
+    def test_memory_stays_bounded_while_decompressing(self):
+        compressor = zlib.compressobj(wbits=31)
+
+        def compressed_chunks():
+            yield compressor.compress(b'title,description,price,count\n')
+            for index in range(200_000):
+                out = compressor.compress(f'Product {index},Same description,{index}.99,{index}\n'.encode())
+                if out:
+                    yield out
+            yield compressor.flush()
+
+        tracemalloc.start()
+        try:
+            parsed = sum(1 for _ in CsvRows(decompress(compressed_chunks())))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(parsed, 200_000)
+        self.assertLess(peak, 4 * 1024 * 1024)
+
+    def test_compressed_files_are_detected_by_key_or_magic_bytes(self):
+        compressed = gzip.compress(CATALOG)
+        for key, data in (('uploaded/a.csv.gz', compressed), ('uploaded/a.csv', compressed),
+                          ('uploaded/misnamed.csv.gz', CATALOG)):
+            with self.subTest(key=key):
+                s3 = MagicMock()
+                s3.get_object.return_value = body(data)
+                head = {'ContentLength': len(data), 'ETag': '"v1"'}
+
+                reader = open_reader(s3, 'bucket', key, head)
+
+                self.assertEqual([row['title'] for row in reader], ['Lamp', 'Café', 'Desk'])
+                s3.get_object.assert_called_once_with(Bucket='bucket', Key=key)
+
+    def test_compressed_files_resume_at_a_decompressed_offset(self):
+        compressed = gzip.compress(CATALOG)
+        s3 = MagicMock()
+        s3.get_object.return_value = body(compressed)
+        head = {'ContentLength': len(compressed), 'ETag': '"v1"'}
+        offset = CATALOG.index(b'Caf')
+
+        reader = open_reader(s3, 'bucket', 'uploaded/a.csv.gz', head, offset, ['title', 'description', 'price', 'count'])
+
+        self.assertEqual([(row['title'], reader.offset) for row in reader],
+                         [('Café', CATALOG.index(b'Desk,Oak')), ('Desk', len(CATALOG))])
+        # Compressed streams cannot be entered mid-way, so the whole object is read again
+        s3.get_object.assert_called_once_with(Bucket='bucket', Key='uploaded/a.csv.gz')
+
+    @patch.dict('os.environ', {'PRODUCTS_TABLE_NAME': 'products', 'STOCKS_TABLE_NAME': 'stocks'})
+    @patch('import_file_parser.get_resource')
+    def test_gzipped_uploads_are_imported(self, mock_get_resource):
+        compressed = gzip.compress(CATALOG)
+        s3 = MagicMock()
+        s3.head_object.return_value = {'ContentLength': len(compressed), 'ETag': '"v1"', 'ContentEncoding': 'gzip'}
+        s3.get_object.return_value = body(compressed)
+        dynamodb = mock_get_resource.return_value.meta.client
+        dynamodb.batch_write_item.return_value = {'UnprocessedItems': {}}
+
+        stats = process_file(s3, 'bucket', 'uploaded/a.csv.gz')
+
+        self.assertEqual((stats['written'], stats['invalid']), (3, 0))
+        s3.copy_object.assert_called_once_with(
+            Bucket='bucket', CopySource={'Bucket': 'bucket', 'Key': 'uploaded/a.csv.gz'}, Key='parsed/a.csv.gz'
+        )
@@ -0,0 +1,96 @@
+import unittest
+import tracemalloc
+from csv_stream import ByteLines, iter_csv_rows
+
+class FakeStreamingBody:
+    """Stands in for botocore's StreamingBody, serving a payload in fixed-size chunks"""
+
+    def __init__(self, payload=None, chunks=None):
+        self.payload = payload
+        self.chunks = chunks
+
+    def iter_chunks(self, chunk_size):
+        if self.chunks is not None:
+            yield from self.chunks(chunk_size)
+            return
+        for start in range(0, len(self.payload), chunk_size):
+            yield self.payload[start:start + chunk_size]
+
+def synthetic_csv_chunks(rows, chunk_size):
+    """Generate a large CSV lazily, with multi-byte text and quoted newlines"""
+    buffer = bytearray('title,description,price\n'.encode('utf-8'))
+    for index in range(rows):
+        buffer += f'Продукт {index},"Line one\nline two, with ü and 🚀",{index}.99\r\n'.encode('utf-8')
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
+
+class TestCsvStream(unittest.TestCase):
+    def test_multibyte_characters_split_across_chunks(self):
+        payload = 'title\nCafé 🚀\n'.encode('utf-8')
+
+        # One byte per chunk splits every multi-byte character
+        text = ''.join(ByteLines(payload[i:i + 1] for i in range(len(payload))))
+
+        self.assertEqual(text, 'title\nCafé 🚀\n')
+
+    def test_byte_order_mark_is_dropped(self):
+        self.assertEqual(''.join(ByteLines([b'\xef\xbb', b'\xbftitle\n'])), 'title\n')
+        # Mid-file reads start on a row boundary, never on a byte order mark
+        self.assertEqual(''.join(ByteLines([b'\xef\xbb\xbftitle\n'], at_start=False)), '\ufefftitle\n')
+
+    def test_truncated_character_raises(self):
+        with self.assertRaises(UnicodeDecodeError):
+            list(ByteLines(['é'.encode('utf-8')[:1]]))
+
+    def test_lines_are_recut_across_chunk_boundaries(self):
+        lines = ByteLines([b'a,b\r', b'\nc,', b'd\ne'])
+        self.assertEqual(list(lines), ['a,b\r\n', 'c,d\n', 'e'])
+        self.assertEqual(lines.consumed, 10)
+
+    def test_quoted_newlines_split_across_chunks(self):
+        payload = 'title,description,price\r\n"Lamp","Warm\r\nlight",10\r\nDesk,"Oak, ünd 🚀",20'.encode('utf-8')
+
+        for chunk_size in (1, 2, 3, 7, 64):
+            rows = list(iter_csv_rows(FakeStreamingBody(payload), chunk_size))
+            self.assertEqual(rows, [
+                {'title': 'Lamp', 'description': 'Warm\r\nlight', 'price': '10'},
+                {'title': 'Desk', 'description': 'Oak, ünd 🚀', 'price': '20'}
+            ])
+
+    def test_offsets_point_past_each_row_and_resume_there(self):
+        payload = '\ufefftitle,price\r\n"Café\nlamp",10\r\n\r\nDesk,20\r\nChair,30'.encode('utf-8')
+        rows = iter_csv_rows(FakeStreamingBody(payload), 4)
+
+        offsets = [(row['title'], rows.offset) for row in rows]
+
+        self.assertEqual(offsets, [
+            ('Café\nlamp', payload.index(b'Desk') - 2),
+            ('Desk', payload.index(b'Chair')),
+            ('Chair', len(payload))
+        ])
+        resumed = iter_csv_rows(FakeStreamingBody(payload[offsets[0][1]:]), 4,
+                                start=offsets[0][1], fieldnames=['title', 'price'])
+        self.assertEqual([(row['title'], resumed.offset) for row in resumed], offsets[1:])
+
+    def test_memory_stays_bounded_for_large_files(self):
+        rows = 200_000  # ~14 MB of CSV
+        body = FakeStreamingBody(chunks=lambda chunk_size: synthetic_csv_chunks(rows, chunk_size))
+
+        tracemalloc.start()
+        try:
+            parsed = 0
+            last = None
+            for row in iter_csv_rows(body, 64 * 1024):
+                parsed += 1
+                last = row
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(parsed, rows)
+        self.assertEqual(last['description'], 'Line one\nline two, with ü and 🚀')
+        # A handful of 64 KiB chunks in flight, independent of the file size
+        self.assertLess(peak, 2 * 1024 * 1024)
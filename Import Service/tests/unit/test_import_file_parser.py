@@ -1,19 +1,24 @@
 import unittest
 from unittest.mock import patch, MagicMock, call
 import json
-from lambda.import_file_parser import lambda_handler
+from import_file_parser import lambda_handler
 
 class TestImportFileParser(unittest.TestCase):
-    @patch('lambda.import_file_parser.boto3.client')
-    def test_successful_csv_processing(self, mock_boto3_client):
+    @patch.dict('os.environ', {'PRODUCTS_TABLE_NAME': 'products', 'STOCKS_TABLE_NAME': 'stocks'})
+    @patch('import_file_parser.get_resource')
+    @patch('import_file_parser.get_client')
+    def test_successful_csv_processing(self, mock_get_client, mock_get_resource):
         # Mock S3 client and its methods
         mock_s3_client = MagicMock()
-        mock_boto3_client.return_value = mock_s3_client
+        mock_get_client.return_value = mock_s3_client
+        mock_s3_client.head_object.return_value = {'ContentLength': 128, 'ETag': '"abc"'}
+        mock_dynamodb_client = mock_get_resource.return_value.meta.client
+        mock_dynamodb_client.batch_write_item.return_value = {'UnprocessedItems': {}}
         
         # Mock S3 get_object response
         mock_s3_client.get_object.return_value = {
             'Body': MagicMock(
-                read=lambda: b'title,description,price\nProduct1,Desc1,10.99\nProduct2,Desc2,20.99'
+                iter_chunks=lambda chunk_size: iter([b'title,description,price,count\nProduct1,Desc1,10.99,3\nProduct2,Desc2,20.99,0'])
             )
         }
 
@@ -39,6 +44,11 @@ class TestImportFileParser(unittest.TestCase):
             Key='uploaded/test.csv'
         )
         
+        # Verify both rows were written with their stock
+        request_items = mock_dynamodb_client.batch_write_item.call_args.kwargs['RequestItems']
+        self.assertEqual(len(request_items['products']), 2)
+        self.assertEqual(len(request_items['stocks']), 2)
+
         # Verify file was copied to parsed folder
         mock_s3_client.copy_object.assert_called_once_with(
             Bucket='myimportservicebucket',
@@ -52,14 +62,15 @@ class TestImportFileParser(unittest.TestCase):
             Key='uploaded/test.csv'
         )
 
-    @patch('lambda.import_file_parser.boto3.client')
-    def test_invalid_csv_format(self, mock_boto3_client):
+    @patch('import_file_parser.get_client')
+    def test_invalid_csv_format(self, mock_get_client):
         # Mock S3 client with invalid CSV content
         mock_s3_client = MagicMock()
-        mock_boto3_client.return_value = mock_s3_client
+        mock_get_client.return_value = mock_s3_client
+        mock_s3_client.head_object.return_value = {'ContentLength': 128, 'ETag': '"abc"'}
         mock_s3_client.get_object.return_value = {
             'Body': MagicMock(
-                read=lambda: b'invalid,csv,format\nwithout,proper,headers'
+                iter_chunks=lambda chunk_size: iter([b'invalid,csv,format\nwithout,proper,headers'])
             )
         }
 
@@ -79,11 +90,12 @@ class TestImportFileParser(unittest.TestCase):
         # Assert error response
         self.assertEqual(response['statusCode'], 500)
 
-    @patch('lambda.import_file_parser.boto3.client')
-    def test_s3_error_handling(self, mock_boto3_client):
+    @patch('import_file_parser.get_client')
+    def test_s3_error_handling(self, mock_get_client):
         # Mock S3 client to raise an exception
         mock_s3_client = MagicMock()
-        mock_boto3_client.return_value = mock_s3_client
+        mock_get_client.return_value = mock_s3_client
+        mock_s3_client.head_object.return_value = {'ContentLength': 128, 'ETag': '"abc"'}
         mock_s3_client.get_object.side_effect = Exception('S3 Error')
 
         # Mock event
@@ -102,3 +114,46 @@ class TestImportFileParser(unittest.TestCase):
         # Assert error response
         self.assertEqual(response['statusCode'], 500)
         self.assertIn('S3 Error', json.loads(response['body'])['error'])
+
+    @patch.dict('os.environ', {'PRODUCTS_TABLE_NAME': 'products', 'STOCKS_TABLE_NAME': 'stocks'})
+    @patch('import_file_parser.get_resource')
+    @patch('import_file_parser.get_client')
+    def test_every_record_is_processed_independently(self, mock_get_client, mock_get_resource):
+        mock_s3_client = MagicMock()
+        mock_get_client.return_value = mock_s3_client
+        mock_s3_client.head_object.return_value = {'ContentLength': 128, 'ETag': '"abc"'}
+        mock_get_resource.return_value.meta.client.batch_write_item.return_value = {'UnprocessedItems': {}}
+
+        def get_object(Bucket, Key):
+            if Key == 'uploaded/broken.csv':
+                raise Exception('Access Denied')
+            return {'Body': MagicMock(
+                iter_chunks=lambda chunk_size: iter([b'title,description,price,count\nLamp,Desk lamp,10,2'])
+            )}
+
+        mock_s3_client.get_object.side_effect = get_object
+
+        # Keys in S3 events are URL-encoded, with '+' for spaces
+        event = {'Records': [
+            {'s3': {'bucket': {'name': 'myimportservicebucket'}, 'object': {'key': key}}}
+            for key in ['uploaded/spring+catalog.csv', 'uploaded/broken.csv', 'uploaded/caf%C3%A9.csv']
+        ]}
+
+        response = lambda_handler(event, {})
+
+        self.assertEqual(response['statusCode'], 500)
+        results = json.loads(response['body'])['results']
+        self.assertEqual(
+            [(result['key'], result['status']) for result in results],
+            [('uploaded/spring catalog.csv', 'success'),
+             ('uploaded/broken.csv', 'failed'),
+             ('uploaded/café.csv', 'success')]
+        )
+        self.assertEqual(results[0]['stats']['written'], 1)
+        self.assertIn('Access Denied', results[1]['error'])
+        mock_s3_client.copy_object.assert_any_call(
+            Bucket='myimportservicebucket',
+            CopySource={'Bucket': 'myimportservicebucket', 'Key': 'uploaded/spring catalog.csv'},
+            Key='parsed/spring catalog.csv'
+        )
+        self.assertEqual(mock_s3_client.delete_object.call_count, 2)
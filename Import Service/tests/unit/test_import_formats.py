@@ -0,0 +1,198 @@
+import gzip
+import io
+import re
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+import parquet_rows
+from catalog_writer import ValidatedRow, validate_row
+from import_file_parser import open_reader, process_file
+from import_formats import format_of, upload_headers
+from json_lines import JsonLinesRows
+from parquet_rows import ParquetRows, S3File
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = pq = None
+
+CATALOG_JSONL = ('{"title": "Lamp", "description": "Desk lamp", "price": 10.50, "count": 3}\n'
+                 '\n'
+                 '{"title": "Café", "description": "Crème brûlée torch 🔥", "price": "12", "count": 4}\n'
+                 '{"title": "Broken", "description": \n'
+                 '["not", "an", "object"]\n'
+                 '{"title": "Desk", "description": "Oak desk", "price": 99, "count": 1}').encode('utf-8')
+
+def s3_for(data):
+    """MagicMock S3 client serving one object, honouring ranged GETs"""
+    s3 = MagicMock()
+    s3.ranges = []
+
+    def get_object(Bucket, Key, Range=None, IfMatch=None):
+        body = data
+        if Range:
+            s3.ranges.append(Range)
+            start, end = re.match(r'bytes=(\d+)-(\d*)$', Range).groups()
+            body = data[int(start):int(end) + 1 if end else None]
+        return {'Body': MagicMock(
+            read=lambda: body,
+            iter_chunks=lambda size: (body[i:i + size] for i in range(0, len(body), size))
+        )}
+
+    s3.get_object.side_effect = get_object
+    s3.head_object.return_value = {'ContentLength': len(data), 'ETag': '"v1"'}
+    return s3
+
+def parquet_bytes(columns, row_group_size=None):
+    sink = io.BytesIO()
+    pq.write_table(pyarrow.table(columns), sink, row_group_size=row_group_size)
+    return sink.getvalue()
+
+class TestImportFormats(unittest.TestCase):
+    def test_format_comes_from_the_key_suffix(self):
+        self.assertEqual(format_of('uploaded/a.csv'), 'csv')
+        self.assertEqual(format_of('uploaded/a.JSONL'), 'jsonl')
+        self.assertEqual(format_of('uploaded/a.ndjson.gz'), 'jsonl')
+        self.assertEqual(format_of('uploaded/a.parquet'), 'parquet')
+        self.assertEqual(format_of('uploaded/no-suffix'), 'csv')
+
+    def test_upload_headers_name_the_type_and_encoding(self):
+        self.assertEqual(upload_headers('a.csv'), {'ContentType': 'text/csv'})
+        self.assertEqual(upload_headers('a.csv.gz'), {'ContentType': 'text/csv', 'ContentEncoding': 'gzip'})
+        self.assertEqual(upload_headers('a.csv.zst'), {'ContentType': 'text/csv', 'ContentEncoding': 'zstd'})
+        self.assertEqual(upload_headers('a.jsonl.gz'),
+                         {'ContentType': 'application/x-ndjson', 'ContentEncoding': 'gzip'})
+        self.assertEqual(upload_headers('a.parquet'), {'ContentType': 'application/vnd.apache.parquet'})
+
+    def test_json_lines_stream_across_chunks_with_typed_values(self):
+        for size in (1, 7, len(CATALOG_JSONL)):
+            with self.subTest(chunk_size=size):
+                chunks = [CATALOG_JSONL[i:i + size] for i in range(0, len(CATALOG_JSONL), size)]
+                rows = list(JsonLinesRows(chunks))
+
+                self.assertEqual(len(rows), 5)
+                self.assertEqual(rows[0]['price'], Decimal('10.50'))
+                self.assertEqual(rows[1]['title'], 'Café')
+                # Bad lines become invalid rows rather than failing the file
+                self.assertEqual(validate_row(rows[2])[1], 'Row must be an object')
+                self.assertEqual(validate_row(rows[3])[1], 'Row must be an object')
+                self.assertEqual(validate_row(rows[4])[0]['count'], 1)
+
+    def test_json_lines_resume_at_a_byte_offset(self):
+        reader = JsonLinesRows([CATALOG_JSONL])
+        offsets = [reader.offset for _ in reader]
+        self.assertEqual(offsets[-1], len(CATALOG_JSONL))
+
+        s3 = s3_for(CATALOG_JSONL)
+        resumed = open_reader(s3, 'bucket', 'uploaded/a.jsonl', s3.head_object(), offsets[1])
+
+        self.assertEqual([row['title'] for row in resumed if isinstance(row, dict)], ['Desk'])
+        self.assertEqual(s3.ranges, ['bytes=0-3', f'bytes={offsets[1]}-'])
+
+    @patch.dict('os.environ', {'PRODUCTS_TABLE_NAME': 'products', 'STOCKS_TABLE_NAME': 'stocks'})
+    @patch('import_file_parser.get_resource')
+    def test_gzipped_json_lines_are_imported(self, mock_get_resource):
+        s3 = s3_for(gzip.compress(CATALOG_JSONL))
+        dynamodb = mock_get_resource.return_value.meta.client
+        dynamodb.batch_write_item.return_value = {'UnprocessedItems': {}}
+
+        stats = process_file(s3, 'bucket', 'uploaded/a.jsonl.gz')
+
+        self.assertEqual((stats['written'], stats['invalid']), (3, 2))
+        prices = [request['PutRequest']['Item']['price']
+                  for request in dynamodb.batch_write_item.call_args.kwargs['RequestItems']['products']]
+        self.assertEqual(prices, [Decimal('10.50'), Decimal('12'), Decimal('99')])
+
+    def test_parquet_without_the_package_is_a_clear_error(self):
+        with patch.object(parquet_rows, 'pq', None):
+            with self.assertRaisesRegex(ValueError, 'pyarrow'):
+                ParquetRows(io.BytesIO(b'PAR1'))
+
+@unittest.skipUnless(pyarrow, 'pyarrow is not installed')
+class TestParquetRows(unittest.TestCase):
+    def test_rows_are_validated_and_converted_a_column_at_a_time(self):
+        data = parquet_bytes({
+            'title': ['Lamp', '', 'Desk', None, 'Chair'],
+            'description': ['Desk lamp', 'x', 'Oak desk', 'x', 'Pine'],
+            'price': [10.99, 5.0, 99.0, 1.0, -1.0],
+            'count': [3, 1, -2, 1, 1],
+            'colour': ['brass', 'red', 'oak', 'blue', 'pine'],
+        })
+
+        rows = list(ParquetRows(io.BytesIO(data)))
+
+        self.assertIsInstance(rows[0], ValidatedRow)
+        self.assertEqual(rows[0], {'title': 'Lamp', 'description': 'Desk lamp', 'price': Decimal('10.99'), 'count': 3})
+        # Rejected rows keep their raw values, in file order, for the writer to report
+        self.assertEqual([validate_row(row)[1] for row in rows[1:]], [
+            'Missing required field: title', 'Count must be a non-negative integer',
+            'Missing required field: title', 'Price must be a positive number'
+        ])
+        self.assertEqual([row['title'] for row in rows], ['Lamp', '', 'Desk', None, 'Chair'])
+
+    def test_untyped_columns_take_the_row_by_row_path(self):
+        data = parquet_bytes({'title': ['Lamp'], 'description': ['Desk lamp'], 'price': ['10.50'], 'count': ['3']})
+
+        rows = list(ParquetRows(io.BytesIO(data)))
+
+        self.assertNotIsInstance(rows[0], ValidatedRow)
+        self.assertEqual(validate_row(rows[0])[0]['price'], Decimal('10.50'))
+
+    def test_float_counts_get_the_same_answer_as_other_formats(self):
+        data = parquet_bytes({'title': ['Lamp', 'Desk'], 'description': ['Desk lamp', 'Oak desk'],
+                              'price': [10.5, 99.0], 'count': [3.0, 2.5]})
+
+        rows = list(ParquetRows(io.BytesIO(data)))
+
+        # validate_row, and so create_product and CSV imports, reject 3.0 as a count
+        self.assertNotIsInstance(rows[0], ValidatedRow)
+        self.assertEqual([validate_row(row)[1] for row in rows], ['Count must be a non-negative integer'] * 2)
+
+    def test_resuming_skips_whole_row_groups(self):
+        rows = 20_000
+        data = parquet_bytes({
+            'title': [f'Product {index}' for index in range(rows)],
+            'description': [f'Description {index * 7919}' for index in range(rows)],
+            'price': pyarrow.array([Decimal(index + 1) for index in range(rows)], pyarrow.decimal128(10, 2)),
+            'count': list(range(rows)),
+        }, row_group_size=2000)
+        s3 = s3_for(data)
+
+        def fetched():
+            return sum(int(end) - int(start) + 1 for start, end in (r[6:].split('-') for r in s3.ranges))
+
+        everything = list(ParquetRows(S3File(s3, 'bucket', 'a.parquet', len(data), '"v1"')))
+        full_read = fetched()
+        s3.ranges.clear()
+        reader = open_reader(s3, 'bucket', 'uploaded/a.parquet', s3.head_object(), rows - 5)
+        resumed = list(reader)
+
+        self.assertEqual(resumed, everything[-5:])
+        self.assertEqual(reader.offset, rows)
+        # Only the footer and the last row group are fetched again
+        self.assertLess(fetched(), full_read / 3)
+
+    @patch.dict('os.environ', {'PRODUCTS_TABLE_NAME': 'products', 'STOCKS_TABLE_NAME': 'stocks'})
+    @patch('import_file_parser.get_resource')
+    def test_parquet_uploads_are_imported(self, mock_get_resource):
+        data = parquet_bytes({'title': ['Lamp', 'Desk'], 'description': ['Desk lamp', 'Oak desk'],
+                              'price': [10.5, 99.0], 'count': [3, 1]})
+        s3 = s3_for(data)
+        dynamodb = mock_get_resource.return_value.meta.client
+        dynamodb.batch_write_item.return_value = {'UnprocessedItems': {}}
+
+        stats = process_file(s3, 'bucket', 'uploaded/a.parquet')
+
+        self.assertEqual((stats['written'], stats['invalid']), (2, 0))
+        stocks = dynamodb.batch_write_item.call_args.kwargs['RequestItems']['stocks']
+        self.assertEqual([request['PutRequest']['Item']['count'] for request in stocks], [3, 1])
+        s3.copy_object.assert_called_once_with(
+            Bucket='bucket', CopySource={'Bucket': 'bucket', 'Key': 'uploaded/a.parquet'}, Key='parsed/a.parquet'
+        )
+
+    def test_missing_columns_name_the_format(self):
+        s3 = s3_for(parquet_bytes({'title': ['Lamp'], 'price': [1.0]}))
+
+        with self.assertRaisesRegex(ValueError, 'Parquet file is missing columns: description, count'):
+            process_file(s3, 'bucket', 'uploaded/a.parquet')
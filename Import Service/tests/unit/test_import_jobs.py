@@ -0,0 +1,166 @@
+import json
+import re
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+import catalog_writer
+from import_file_parser import lambda_handler
+from import_jobs import STOP_MARGIN_MILLIS
+
+ENV = {'PRODUCTS_TABLE_NAME': 'products', 'STOCKS_TABLE_NAME': 'stocks', 'IMPORT_JOBS_TABLE_NAME': 'import-jobs'}
+
+def catalog_csv(rows):
+    return b'title,description,price,count\n' + b''.join(
+        f'Product {index},"Line one\nline {index}",{index + 1}.50,{index}\n'.encode() for index in range(rows)
+    )
+
+class LocalS3:
+    """In-memory stand-in for the S3 client, honouring ranged GETs"""
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.ranges = []
+
+    def head_object(self, Bucket, Key):
+        return {'ContentLength': len(self.objects[Key]), 'ETag': '"v1"'}
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        data = self.objects[Key]
+        if Range:
+            self.ranges.append(Range)
+            start, end = re.match(r'bytes=(\d+)-(\d*)$', Range).groups()
+            data = data[int(start):int(end) + 1 if end else None]
+        return {'Body': MagicMock(
+            read=lambda: data,
+            iter_chunks=lambda chunk_size: (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+        )}
+
+    def copy_object(self, Bucket, CopySource, Key):
+        self.objects[Key] = self.objects[CopySource['Key']]
+
+    def delete_object(self, Bucket, Key):
+        del self.objects[Key]
+
+class LocalDynamoDB:
+    """In-memory stand-in for the DynamoDB client: the import jobs table and the catalog tables"""
+
+    def __init__(self, broken_title=None):
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.products = {}
+        self.puts = 0
+        self.broken_title = broken_title
+
+    def get_item(self, TableName, Key, ConsistentRead):
+        item = self.jobs.get(Key['import_id'])
+        return {'Item': dict(item)} if item else {}
+
+    def update_item(self, TableName, Key, ExpressionAttributeValues, **kwargs):
+        values = ExpressionAttributeValues
+        current = self.jobs.get(Key['import_id'])
+        if current and current['offset'] > values[':offset']:
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': ''}}, 'UpdateItem')
+        self.jobs[Key['import_id']] = {
+            'offset': values[':offset'], 'row_number': values[':row_number'],
+            'fieldnames': values[':fieldnames'], 'status': values[':status']
+        }
+
+    def batch_write_item(self, RequestItems):
+        with self.lock:
+            for request in RequestItems.get('products', []):
+                item = request['PutRequest']['Item']
+                if item['title'] == self.broken_title:
+                    raise ClientError({'Error': {'Code': 'ValidationException', 'Message': 'broken'}}, 'BatchWriteItem')
+                self.products[item['id']] = item['title']
+                self.puts += 1
+        return {'UnprocessedItems': {}}
+
+class FakeContext:
+    invoked_function_arn = 'arn:aws:lambda:us-east-1:123456789012:function:ImportFileParser'
+
+    def __init__(self, remaining_millis):
+        self.remaining_millis = remaining_millis
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_millis
+
+EVENT = {'Records': [{'s3': {'bucket': {'name': 'myimportservicebucket'}, 'object': {'key': 'uploaded/catalog.csv'}}}]}
+
+@patch.dict('os.environ', ENV)
+@patch.object(catalog_writer.time, 'sleep', lambda seconds: None)
+class TestImportJobs(unittest.TestCase):
+    def run_handler(self, event, context, s3, dynamodb, lambda_client=None):
+        clients = {'s3': s3, 'lambda': lambda_client or MagicMock()}
+        with patch('import_file_parser.get_client', side_effect=clients.get), \
+                patch('import_file_parser.get_resource') as get_resource:
+            get_resource.return_value.meta.client = dynamodb
+            return lambda_handler(event, context)
+
+    def test_stops_before_the_timeout_and_resumes_from_the_checkpoint(self):
+        s3 = LocalS3({'uploaded/catalog.csv': catalog_csv(50)})
+        dynamodb = LocalDynamoDB()
+        lambda_client = MagicMock()
+
+        # No time left beyond the stop margin: the import stops after its first row
+        response = self.run_handler(EVENT, FakeContext(STOP_MARGIN_MILLIS), s3, dynamodb, lambda_client)
+
+        self.assertEqual(response['statusCode'], 202)
+        checkpoint = next(iter(dynamodb.jobs.values()))
+        self.assertEqual((checkpoint['row_number'], checkpoint['status']), (1, 'in_progress'))
+        self.assertIn('uploaded/catalog.csv', s3.objects)
+        invoke = lambda_client.invoke.call_args.kwargs
+        self.assertEqual((invoke['FunctionName'], invoke['InvocationType']), (FakeContext.invoked_function_arn, 'Event'))
+        continuation = json.loads(invoke['Payload'])
+        self.assertEqual(continuation, {'Records': EVENT['Records'], 'checkpointResumes': 1})
+
+        response = self.run_handler(continuation, FakeContext(60000), s3, dynamodb)
+
+        self.assertEqual(response['statusCode'], 200)
+        # The magic bytes are checked before reading on from the checkpoint
+        self.assertEqual(s3.ranges, ['bytes=0-3', f"bytes={checkpoint['offset']}-"])
+        # Every row lands exactly once, with the ids a single uninterrupted run would give it
+        self.assertEqual(dynamodb.puts, 50)
+        self.assertEqual(sorted(dynamodb.products.values()), sorted(f'Product {index}' for index in range(50)))
+        self.assertEqual(next(iter(dynamodb.jobs.values()))['status'], 'parsed')
+        self.assertIn('parsed/catalog.csv', s3.objects)
+
+    @patch('import_file_parser.CHECKPOINT_INTERVAL_SECONDS', 0)
+    def test_a_failed_run_resumes_after_the_last_sent_row(self):
+        s3 = LocalS3({'uploaded/catalog.csv': catalog_csv(50)})
+        dynamodb = LocalDynamoDB(broken_title='Product 30')
+
+        response = self.run_handler(EVENT, FakeContext(60000), s3, dynamodb)
+
+        self.assertEqual(response['statusCode'], 500)
+        checkpoint = next(iter(dynamodb.jobs.values()))
+        self.assertLessEqual(checkpoint['row_number'], 30)
+        self.assertEqual(dynamodb.puts, checkpoint['row_number'])
+
+        dynamodb.broken_title = None
+        response = self.run_handler(EVENT, FakeContext(60000), s3, dynamodb)
+
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(dynamodb.puts, 50)
+        self.assertEqual(len(dynamodb.products), 50)
+
+    def test_a_parsed_import_only_moves_the_file(self):
+        s3 = LocalS3({'uploaded/catalog.csv': catalog_csv(3)})
+        dynamodb = LocalDynamoDB()
+        dynamodb.jobs['myimportservicebucket/uploaded/catalog.csv/"v1"'] = {
+            'offset': len(catalog_csv(3)), 'row_number': 3, 'fieldnames': [], 'status': 'parsed'
+        }
+
+        response = self.run_handler(EVENT, FakeContext(60000), s3, dynamodb)
+
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(dynamodb.puts, 0)
+        self.assertEqual(list(s3.objects), ['parsed/catalog.csv'])
+
+    def test_resumes_are_bounded(self):
+        event = {**EVENT, 'checkpointResumes': 50}
+
+        response = self.run_handler(event, FakeContext(60000), LocalS3({}), LocalDynamoDB())
+
+        self.assertEqual(response['statusCode'], 500)
+        self.assertIn('50 resumed invocations', json.loads(response['body'])['error'])
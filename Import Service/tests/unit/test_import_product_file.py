@@ -1,14 +1,15 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import json
-from lambda.import_product_file import lambda_handler
+from import_product_file import lambda_handler
 
+@patch.dict('os.environ', {'BUCKET_NAME': 'myimportservicebucket'})
 class TestImportProductFile(unittest.TestCase):
-    @patch('lambda.import_product_file.boto3.client')
-    def test_successful_url_generation(self, mock_boto3_client):
+    @patch('import_product_file.get_client')
+    def test_successful_url_generation(self, mock_get_client):
         # Mock S3 client and its generate_presigned_url method
         mock_s3_client = MagicMock()
-        mock_boto3_client.return_value = mock_s3_client
+        mock_get_client.return_value = mock_s3_client
         mock_s3_client.generate_presigned_url.return_value = 'https://test-signed-url'
 
         # Mock event and context
@@ -37,8 +38,8 @@ class TestImportProductFile(unittest.TestCase):
             ExpiresIn=3600
         )
 
-    @patch('lambda.import_product_file.boto3.client')
-    def test_missing_name_parameter(self, mock_boto3_client):
+    @patch('import_product_file.get_client')
+    def test_missing_name_parameter(self, mock_get_client):
         # Mock event without name parameter
         event = {
             'queryStringParameters': {}
@@ -52,11 +53,11 @@ class TestImportProductFile(unittest.TestCase):
         self.assertEqual(response['statusCode'], 400)
         self.assertIn('Missing name parameter', json.loads(response['body'])['error'])
 
-    @patch('lambda.import_product_file.boto3.client')
-    def test_s3_error_handling(self, mock_boto3_client):
+    @patch('import_product_file.get_client')
+    def test_s3_error_handling(self, mock_get_client):
         # Mock S3 client to raise an exception
         mock_s3_client = MagicMock()
-        mock_boto3_client.return_value = mock_s3_client
+        mock_get_client.return_value = mock_s3_client
         mock_s3_client.generate_presigned_url.side_effect = Exception('S3 Error')
 
         # Mock event and context
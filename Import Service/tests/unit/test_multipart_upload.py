@@ -0,0 +1,158 @@
+import json
+import random
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
+from complete_multipart_upload import lambda_handler as complete_upload
+from start_multipart_upload import lambda_handler as start_upload
+
+class LocalMultipartS3:
+    """In-memory stand-in for S3 multipart uploads, with URLs the test can 'PUT' to"""
+
+    def __init__(self):
+        self.uploads = {}
+        self.objects = {}
+
+    def create_multipart_upload(self, Bucket, Key, ContentType, ContentEncoding=None):
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = {'key': Key, 'headers': (ContentType, ContentEncoding), 'parts': {}}
+        return {'UploadId': upload_id}
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn):
+        assert ClientMethod == 'upload_part'
+        return (f"https://{Params['Bucket']}.s3.local/{Params['Key']}"
+                f"?partNumber={Params['PartNumber']}&uploadId={Params['UploadId']}")
+
+    def put(self, url, data):
+        """What a browser PUT to a presigned part URL does; returns the part's ETag"""
+        query = parse_qs(urlparse(url).query)
+        etag = f'"{uuid.uuid4().hex}"'
+        self.uploads[query['uploadId'][0]]['parts'][int(query['partNumber'][0])] = (etag, data)
+        return etag
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        upload = self.uploads.get(UploadId)
+        if upload is None:
+            raise ClientError({'Error': {'Code': 'NoSuchUpload', 'Message': 'The upload does not exist'}},
+                              'CompleteMultipartUpload')
+        parts = MultipartUpload['Parts']
+        if [part['PartNumber'] for part in parts] != sorted(part['PartNumber'] for part in parts):
+            raise ClientError({'Error': {'Code': 'InvalidPartOrder', 'Message': 'Parts out of order'}},
+                              'CompleteMultipartUpload')
+        for part in parts:
+            if upload['parts'].get(part['PartNumber'], (None,))[0] != part['ETag']:
+                raise ClientError({'Error': {'Code': 'InvalidPart', 'Message': 'A part is missing'}},
+                                  'CompleteMultipartUpload')
+        del self.uploads[UploadId]
+        self.objects[Key] = b''.join(upload['parts'][part['PartNumber']][1] for part in parts)
+        return {'ETag': '"assembled-3"'}
+
+@patch.dict('os.environ', {'BUCKET_NAME': 'myimportservicebucket'})
+class TestMultipartUpload(unittest.TestCase):
+    def setUp(self):
+        self.s3 = LocalMultipartS3()
+        patcher_start = patch('start_multipart_upload.get_client', return_value=self.s3)
+        patcher_complete = patch('complete_multipart_upload.get_client', return_value=self.s3)
+        patcher_start.start()
+        patcher_complete.start()
+        self.addCleanup(patcher_start.stop)
+        self.addCleanup(patcher_complete.stop)
+
+    def start(self, name='big%20catalog.csv', parts='3'):
+        return start_upload({'queryStringParameters': {'name': name, 'parts': parts}}, {})
+
+    def complete(self, body):
+        return complete_upload({'body': json.dumps(body)}, {})
+
+    def test_parts_upload_in_parallel_and_retry_independently(self):
+        response = self.start()
+
+        self.assertEqual(response['statusCode'], 200)
+        started = json.loads(response['body'])
+        self.assertEqual(started['key'], 'uploaded/big catalog.csv')
+        self.assertEqual([part['partNumber'] for part in started['parts']], [1, 2, 3])
+
+        chunks = {1: b'title,description,price,count\n', 2: b'Lamp,Desk lamp,10,2\n', 3: b'Desk,Oak desk,99,1\n'}
+        dropped = set()
+
+        def upload(part):
+            number = part['partNumber']
+            if number == 2 and not dropped:
+                dropped.add(number)
+                raise ConnectionError('connection reset')
+            return number, self.s3.put(part['url'], chunks[number])
+
+        def try_upload(part):
+            try:
+                return upload(part)
+            except ConnectionError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(try_upload, random.sample(started['parts'], 3)))
+        etags = dict(result for result in results if result)
+        # Only the failed part is sent again, to the same URL
+        self.assertEqual(sorted(etags), [1, 3])
+        etags.update([upload(started['parts'][1])])
+
+        response = self.complete({
+            'key': started['key'],
+            'uploadId': started['uploadId'],
+            'parts': [{'partNumber': number, 'etag': etag} for number, etag in sorted(etags.items(), reverse=True)]
+        })
+
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(self.s3.objects['uploaded/big catalog.csv'], b''.join(chunks[n] for n in (1, 2, 3)))
+
+    def test_compressed_uploads_are_started_with_their_encoding(self):
+        for name, encoding in (('a.csv', None), ('a.csv.gz', 'gzip'), ('a.csv.zst', 'zstd')):
+            with self.subTest(name=name):
+                started = json.loads(self.start(name=name)['body'])
+                self.assertEqual(self.s3.uploads[started['uploadId']]['headers'], ('text/csv', encoding))
+
+    def test_part_count_is_validated(self):
+        for parts in ('0', '1001', 'many', ''):
+            with self.subTest(parts=parts):
+                self.assertEqual(self.start(parts=parts)['statusCode'], 400)
+        self.assertEqual(start_upload({'queryStringParameters': {'parts': '2'}}, {})['statusCode'], 400)
+
+    def test_completion_errors_are_client_errors(self):
+        started = json.loads(self.start()['body'])
+
+        missing_part = self.complete({'key': started['key'], 'uploadId': started['uploadId'],
+                                      'parts': [{'partNumber': 1, 'etag': '"nope"'}]})
+        unknown_upload = self.complete({'key': started['key'], 'uploadId': 'gone',
+                                        'parts': [{'partNumber': 1, 'etag': '"x"'}]})
+        outside_prefix = self.complete({'key': 'parsed/a.csv', 'uploadId': started['uploadId'],
+                                        'parts': [{'partNumber': 1, 'etag': '"x"'}]})
+        no_etag = self.complete({'key': started['key'], 'uploadId': started['uploadId'],
+                                 'parts': [{'partNumber': 1}]})
+        not_json = complete_upload({'body': '{'}, {})
+
+        for response in (missing_part, unknown_upload, outside_prefix, no_etag, not_json):
+            self.assertEqual(response['statusCode'], 400)
+        self.assertIn('missing', json.loads(missing_part['body'])['error'])
+
+    def test_part_urls_are_sigv4_presigned_upload_part_requests(self):
+        s3 = boto3.client('s3', region_name='us-east-1', aws_access_key_id='AKIDEXAMPLE',
+                          aws_secret_access_key='secret', config=Config(signature_version='s3v4'))
+        with Stubber(s3) as stubber, patch('start_multipart_upload.get_client', return_value=s3):
+            stubber.add_response(
+                'create_multipart_upload',
+                {'UploadId': 'upload-1'},
+                {'Bucket': 'myimportservicebucket', 'Key': 'uploaded/a.csv', 'ContentType': 'text/csv'}
+            )
+            response = self.start(name='a.csv', parts='2')
+
+        url = urlparse(json.loads(response['body'])['parts'][1]['url'])
+        query = parse_qs(url.query)
+        self.assertTrue(url.path.endswith('/uploaded/a.csv'))
+        self.assertEqual((query['partNumber'], query['uploadId']), (['2'], ['upload-1']))
+        self.assertEqual(query['X-Amz-Algorithm'], ['AWS4-HMAC-SHA256'])
+        self.assertEqual(query['X-Amz-Expires'], ['3600'])
@@ -0,0 +1,127 @@
+import csv
+import io
+import re
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+import import_file_parser
+from ranged_csv import RangedCsvReader, row_boundaries
+
+TRICKY_CSV = (
+    '\ufefftitle,description,price,count\r\n'
+    'Lamp,"Desk lamp, brass",10.50,3\r\n'
+    '"Quoted ""title""","Line one\nline two\n\nline four",7,1\r\n'
+    '\r\n'
+    'Café,Crème brûlée torch — 🔥,12,4\r\n'
+    'Short,row\r\n'
+    'Long,row,1,2,extra\r\n'
+    '"""","\n""\n",3,0\r\n'
+    'Last,no newline at end,5,5'
+).encode('utf-8')
+
+class LocalS3:
+    """In-memory stand-in for the S3 client that honours Range and IfMatch"""
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.lock = threading.Lock()
+        self.ranges = []
+
+    def head_object(self, Bucket, Key):
+        return {'ContentLength': len(self.objects[Key]), 'ETag': '"v1"'}
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        data = self.objects[Key]
+        if IfMatch is not None and IfMatch != '"v1"':
+            raise Exception('PreconditionFailed')
+        if Range:
+            start, end = map(int, re.match(r'bytes=(\d+)-(\d+)', Range).groups())
+            with self.lock:
+                self.ranges.append((start, end))
+            data = data[start:end + 1]
+        return {'Body': MagicMock(
+            read=lambda: data,
+            iter_chunks=lambda chunk_size: (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+        ), 'ETag': '"v1"'}
+
+    def copy_object(self, **kwargs):
+        pass
+
+    def delete_object(self, **kwargs):
+        pass
+
+def ranged_rows(data, part_size, concurrency=4):
+    s3 = LocalS3({'uploaded/a.csv': data})
+    reader = RangedCsvReader(s3, 'bucket', 'uploaded/a.csv', len(data), '"v1"', part_size, concurrency)
+    return reader.fieldnames, list(reader), s3
+
+class TestRangedCsv(unittest.TestCase):
+    def test_row_boundaries_follow_quote_parity(self):
+        quotes, boundaries = row_boundaries(b'a,"b\nc",d\ne\n"f\ng')
+
+        self.assertEqual(quotes, 3)
+        # Starting outside quotes the last row ends after 'e'; starting inside, after the opening "f
+        self.assertEqual(boundaries, {0: 12, 1: 15})
+        self.assertEqual(row_boundaries(b'no newline here'), (0, {0: None, 1: None}))
+
+    def test_rows_match_a_single_stream_for_every_part_size(self):
+        expected = csv.DictReader(io.StringIO(TRICKY_CSV.decode('utf-8-sig'), newline=''))
+        expected_rows = list(expected)
+
+        for part_size in range(1, len(TRICKY_CSV) + 2):
+            with self.subTest(part_size=part_size):
+                fieldnames, rows, _ = ranged_rows(TRICKY_CSV, part_size)
+                self.assertEqual(fieldnames, expected.fieldnames)
+                self.assertEqual(rows, expected_rows)
+
+    def test_parts_are_fetched_as_pinned_byte_ranges(self):
+        data = b'title,description,price,count\n' + b''.join(
+            f'Product {index},Desc,1.{index % 100:02d},{index}\n'.encode() for index in range(2000)
+        )
+
+        _, rows, s3 = ranged_rows(data, 4096, concurrency=8)
+
+        self.assertEqual(len(rows), 2000)
+        self.assertEqual([row['count'] for row in rows], [str(index) for index in range(2000)])
+        self.assertEqual(sorted(s3.ranges), [
+            (start, min(start + 4096, len(data)) - 1) for start in range(0, len(data), 4096)
+        ])
+
+    def test_a_replaced_object_fails_the_read(self):
+        s3 = LocalS3({'uploaded/a.csv': TRICKY_CSV})
+        reader = RangedCsvReader(s3, 'bucket', 'uploaded/a.csv', len(TRICKY_CSV), '"v0"', 16)
+
+        with self.assertRaises(Exception):
+            list(reader)
+
+    @patch.dict('os.environ', {'PRODUCTS_TABLE_NAME': 'products', 'STOCKS_TABLE_NAME': 'stocks'})
+    @patch('import_file_parser.get_resource')
+    def test_large_files_import_the_same_rows_as_small_ones(self, mock_get_resource):
+        data = b'title,description,price,count\n' + b''.join(
+            f'Product {index},"Desc\n{index}",{index % 9},{index}\n'.encode() for index in range(500)
+        )
+        s3 = LocalS3({'uploaded/a.csv': data})
+        dynamodb = mock_get_resource.return_value.meta.client
+        dynamodb.batch_write_item.return_value = {'UnprocessedItems': {}}
+
+        def imported_items():
+            dynamodb.batch_write_item.reset_mock()
+            stats = import_file_parser.process_file(s3, 'bucket', 'uploaded/a.csv')
+            items = {
+                request['PutRequest']['Item']['id']: request['PutRequest']['Item']['title']
+                for call in dynamodb.batch_write_item.call_args_list
+                for request in call.kwargs['RequestItems']['products']
+            }
+            return stats, items
+
+        small_stats, small_items = imported_items()
+        with patch('import_file_parser.RANGE_THRESHOLD_BYTES', 1024), \
+                patch('import_file_parser.RangedCsvReader',
+                      lambda *args, **kwargs: RangedCsvReader(*args, part_size=256, **kwargs)):
+            ranged_stats, ranged_items = imported_items()
+
+        self.assertTrue(s3.ranges)
+        # Price 0 rows are invalid in both modes, and ids derive from the same row numbers
+        self.assertEqual((ranged_stats['written'], ranged_stats['invalid']), (small_stats['written'], small_stats['invalid']))
+        self.assertEqual(small_stats['invalid'], 56)
+        self.assertEqual(ranged_items, small_items)
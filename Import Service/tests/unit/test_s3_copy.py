@@ -0,0 +1,91 @@
+import re
+import threading
+import unittest
+import uuid
+from unittest.mock import patch
+import s3_copy
+from s3_copy import copy_object, part_ranges
+
+class LocalMultipartS3:
+    """In-memory stand-in for the S3 copy and multipart upload calls"""
+
+    def __init__(self, objects, fail_part=None):
+        self.objects = objects
+        self.fail_part = fail_part
+        self.lock = threading.Lock()
+        self.uploads = {}
+        self.headers = {}
+        self.calls = []
+
+    def copy_object(self, Bucket, CopySource, Key):
+        self.calls.append('copy_object')
+        self.objects[Key] = self.objects[CopySource['Key']]
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = str(uuid.uuid4())
+        self.uploads[upload_id] = {'key': Key, 'parts': {}, 'headers': kwargs}
+        return {'UploadId': upload_id}
+
+    def upload_part_copy(self, Bucket, Key, UploadId, PartNumber, CopySource, CopySourceRange, CopySourceIfMatch):
+        if PartNumber == self.fail_part:
+            raise Exception('SlowDown')
+        start, end = map(int, re.match(r'bytes=(\d+)-(\d+)', CopySourceRange).groups())
+        with self.lock:
+            self.uploads[UploadId]['parts'][PartNumber] = self.objects[CopySource['Key']][start:end + 1]
+        return {'CopyPartResult': {'ETag': f'"part-{PartNumber}"'}}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        upload = self.uploads.pop(UploadId)
+        numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+        assert numbers == sorted(upload['parts']), 'parts must be listed in order'
+        self.objects[Key] = b''.join(upload['parts'][number] for number in numbers)
+        self.headers[Key] = upload['headers']
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append('abort')
+        self.uploads.pop(UploadId)
+
+def head(data):
+    return {'ContentLength': len(data), 'ETag': '"v1"', 'ContentType': 'text/csv'}
+
+@patch.object(s3_copy, 'MIN_PART_SIZE', 1)
+class TestS3Copy(unittest.TestCase):
+    def test_small_objects_use_a_single_copy(self):
+        s3 = LocalMultipartS3({'uploaded/a.csv': b'title\nLamp\n'})
+
+        copy_object(s3, 'bucket', 'uploaded/a.csv', 'parsed/a.csv', head(b'title\nLamp\n'))
+
+        self.assertEqual(s3.calls, ['copy_object'])
+        self.assertEqual(s3.objects['parsed/a.csv'], b'title\nLamp\n')
+
+    @patch.object(s3_copy, 'COPY_THRESHOLD_BYTES', 100)
+    @patch.object(s3_copy, 'COPY_PART_SIZE', 64)
+    def test_large_objects_are_copied_in_parallel_parts(self):
+        data = bytes(range(256)) * 10
+        s3 = LocalMultipartS3({'uploaded/a.csv': data})
+
+        copy_object(s3, 'bucket', 'uploaded/a.csv', 'parsed/a.csv', head(data))
+
+        self.assertEqual(s3.calls, [])
+        self.assertEqual(s3.objects['parsed/a.csv'], data)
+        self.assertEqual(s3.uploads, {})
+        # Multipart copies do not inherit the source headers on their own
+        self.assertEqual(s3.headers['parsed/a.csv'], {'ContentType': 'text/csv'})
+
+    def test_failed_parts_abort_the_upload(self):
+        data = b'x' * 1000
+        s3 = LocalMultipartS3({'uploaded/a.csv': data}, fail_part=3)
+
+        with self.assertRaises(Exception):
+            s3_copy.multipart_copy(s3, 'bucket', 'uploaded/a.csv', 'parsed/a.csv', head(data), part_size=100)
+
+        self.assertEqual(s3.calls, ['abort'])
+        self.assertEqual(s3.uploads, {})
+        self.assertNotIn('parsed/a.csv', s3.objects)
+
+    def test_part_size_grows_to_stay_under_the_part_limit(self):
+        ranges = part_ranges(10001 * 10, 5)
+
+        self.assertLessEqual(len(ranges), 10000)
+        self.assertEqual(ranges[0], (0, 10))
+        self.assertEqual(ranges[-1][1], 10001 * 10 - 1)
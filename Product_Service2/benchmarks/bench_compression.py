@@ -0,0 +1,59 @@
+"""Payload size and latency of negotiated response compression for typical catalog sizes.
+
+Run from the Product_Service2 directory:
+
+    python benchmarks/bench_compression.py
+
+Brotli rows are skipped when the optional brotli package is not installed.
+"""
+import os
+import random
+import sys
+import timeit
+import uuid
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../product_service/lambda_func'))
+
+import compression  # noqa: E402
+from serialization import dumps  # noqa: E402
+
+SIZES = [50, 1_000, 10_000]
+REPEAT = 5
+
+WORDS = ('organic vegan protein almond butter quinoa pasta gluten free smooth natural '
+         'roasted raw seeds oats honey dark chocolate coconut oil snack bar pouch jar '
+         'blend powder crunchy salted unsweetened whole grain family pack').split()
+
+def make_products(n, seed=42):
+    """Products with random ids and varied text, so ratios are not inflated by repetition"""
+    rng = random.Random(seed)
+    return [
+        {
+            'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'title': ' '.join(rng.choice(WORDS) for _ in range(3)).title(),
+            'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 30))) + '.',
+            'price': Decimal(rng.randint(100, 9999)) / 100,
+            'count': Decimal(rng.randint(0, 200))
+        }
+        for _ in range(n)
+    ]
+
+def best(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=REPEAT)) / number
+
+def main():
+    print(f"{'products':>10} {'encoding':>9} {'bytes':>10} {'base64':>10} {'ratio':>7} {'time':>10}")
+    for n in SIZES:
+        body = dumps(make_products(n))
+        print(f"{n:>10} {'identity':>9} {len(body):>10} {'-':>10} {1:>7.2f} {'-':>10}")
+        for encoding in compression.supported_encodings():
+            number = max(1, 2_000 // n)
+            elapsed = best(lambda: compression.compress(body, encoding), number)
+            size = len(compression.compress(body, encoding))
+            encoded = len(compression.compress_body(body, {}, encoding)[0])
+            print(f"{n:>10} {encoding:>9} {size:>10} {encoded:>10} {len(body) / size:>7.2f} "
+                  f"{elapsed * 1000:>7.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""p50/p99 of GET /products/{productId}: two sequential get_item calls vs one batch_get_item.
+
+Runs against an in-process DynamoDB stand-in that sleeps for a sampled network
+round-trip on every request, so only the number of round-trips differs.
+
+Run from the Product_Service2 directory:
+
+    python benchmarks/bench_product_by_id.py [rtt_ms] [requests]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../product_service/lambda_func'))
+os.environ.setdefault('PRODUCTS_TABLE_NAME', 'products')
+os.environ.setdefault('STOCKS_TABLE_NAME', 'stocks')
+
+from product_by_id import get_product_with_stock  # noqa: E402
+
+class LatencyModel:
+    """Log-normal round-trip times with a median of rtt_ms"""
+
+    def __init__(self, rtt_ms: float, seed: int = 7):
+        self.rtt = rtt_ms / 1000
+        self.rng = random.Random(seed)
+
+    def wait(self):
+        time.sleep(self.rtt * self.rng.lognormvariate(0, 0.35))
+
+class FakeTable:
+    def __init__(self, db, name):
+        self.db, self.name = db, name
+
+    def get_item(self, Key, **kwargs):
+        self.db.latency.wait()
+        item = self.db.tables[self.name].get(tuple(Key.values()))
+        return {'Item': dict(item)} if item else {}
+
+class FakeDynamoDB:
+    def __init__(self, latency):
+        self.latency = latency
+        self.tables = {
+            'products': {(str(i),): {'id': str(i), 'title': f'Product {i}', 'price': Decimal('9.99')}
+                         for i in range(1000)},
+            'stocks': {(str(i),): {'product_id': str(i), 'count': Decimal(i % 20)} for i in range(1000)}
+        }
+
+    def Table(self, name):
+        return FakeTable(self, name)
+
+    def batch_get_item(self, RequestItems):
+        self.latency.wait()
+        responses = {}
+        for table_name, request in RequestItems.items():
+            responses[table_name] = [
+                dict(self.tables[table_name][tuple(key.values())])
+                for key in request['Keys'] if tuple(key.values()) in self.tables[table_name]
+            ]
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+def two_get_items(dynamodb, product_id):
+    """The previous implementation: product, then stock"""
+    product = dynamodb.Table('products').get_item(Key={'id': product_id}).get('Item')
+    if not product:
+        return None
+    stock = dynamodb.Table('stocks').get_item(Key={'product_id': product_id}).get('Item')
+    product['count'] = stock['count'] if stock else 0
+    return product
+
+def measure(fn, dynamodb, requests):
+    samples = []
+    for i in range(requests):
+        start = time.perf_counter()
+        fn(dynamodb, str(i % 1000))
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+def main():
+    rtt_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 4.0
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    print(f"stand-in round-trip median: {rtt_ms} ms, {requests} requests")
+    print(f"{'path':>16} {'p50':>9} {'p99':>9}")
+    for name, fn in (('2x get_item', two_get_items), ('batch_get_item', get_product_with_stock)):
+        p50, p99 = measure(fn, FakeDynamoDB(LatencyModel(rtt_ms)), requests)
+        print(f"{name:>16} {p50:>6.2f} ms {p99:>6.2f} ms")
+
+if __name__ == '__main__':
+    main()
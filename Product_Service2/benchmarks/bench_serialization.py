@@ -0,0 +1,54 @@
+"""Micro-benchmark: shared serializer vs the per-module DecimalEncoder it replaced.
+
+Run from the Product_Service2 directory:
+
+    python benchmarks/bench_serialization.py
+"""
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../product_service/lambda_func'))
+
+from serialization import dumps, iter_dumps  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+REPEAT = 5
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+def make_products(n):
+    return [
+        {
+            'id': f'{i:08d}-4f1c-4a8e-9c55-1b2f3c4d5e6f',
+            'title': f'Product {i}',
+            'description': 'Organic plant-based protein, 1 kg pouch. ' * 3,
+            'price': Decimal(f'{i % 500}.99'),
+            'count': Decimal(i % 50)
+        }
+        for i in range(n)
+    ]
+
+def best(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=REPEAT)) / number
+
+def main():
+    print(f"{'products':>10} {'DecimalEncoder':>16} {'dumps':>10} {'iter_dumps':>12} {'speedup':>8} {'bytes':>12}")
+    for n in SIZES:
+        products = make_products(n)
+        number = max(1, 10_000 // n)
+        legacy = best(lambda: json.dumps(products, cls=DecimalEncoder), number)
+        shared = best(lambda: dumps(products), number)
+        chunked = best(lambda: sum(len(chunk) for chunk in iter_dumps(products)), number)
+        assert json.loads(dumps(products)) == json.loads(json.dumps(products, cls=DecimalEncoder))
+        print(f"{n:>10} {legacy * 1000:>13.2f} ms {shared * 1000:>7.2f} ms {chunked * 1000:>9.2f} ms "
+              f"{legacy / shared:>7.2f}x {len(dumps(products)):>12}")
+
+if __name__ == '__main__':
+    main()
@@ -91,6 +91,8 @@ class ApiGatewayStack(Stack):
          api = apigw.RestApi(
              self, 'ProductsApi',
              rest_api_name='Products Service',
+             # Let Lambda return base64-encoded gzip/br bodies as binary
+             binary_media_types=['*/*'],
              default_cors_preflight_options=apigw.CorsOptions(
                  allow_origins=apigw.Cors.ALL_ORIGINS,
                  allow_methods=apigw.Cors.ALL_METHODS,
@@ -100,6 +102,8 @@ class ApiGatewayStack(Stack):
                      'Authorization',
                      'X-Api-Key',
                      'X-Amz-Security-Token',
+                     'If-None-Match',
+                     'Idempotency-Key',
                  ],
              )
          )
@@ -185,6 +189,25 @@ class ApiGatewayStack(Stack):
              ]
          )
  
+         # POST /products/batch
+         batch = products.add_resource('batch')
+         batch.add_method(
+             'POST',
+             apigw.LambdaIntegration(
+                 lambda_stack.products_batch_function,
+                 proxy=True
+             ),
+             method_responses=[
+                 {
+                     'statusCode': status_code,
+                     'responseParameters': {
+                         'method.response.header.Access-Control-Allow-Origin': True
+                     }
+                 }
+                 for status_code in ('201', '207')
+             ] + method_responses[1:]
+         )
+ 
          # GET /products/{productId}
          product = products.add_resource('{productId}')
          product.add_method(
@@ -212,6 +235,15 @@ class ApiGatewayStack(Stack):
              ]
          )
  
+         # With */* binary types every request body arrives as binary, so the
+         # CORS preflight MOCK integrations must convert it back to text for
+         # their request template to apply
+         for method in api.methods:
+             if method.http_method == 'OPTIONS':
+                 method.node.default_child.add_property_override(
+                     'Integration.ContentHandling', 'CONVERT_TO_TEXT'
+                 )
+ 
          # Output the API URL
          CfnOutput(
              self, "APIGatewayURL",
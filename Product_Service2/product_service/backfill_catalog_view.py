@@ -0,0 +1,87 @@
+import boto3
+import os
+import sys
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+#Load enviroment variable from  .env file
+load_dotenv()
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'lambda_func'))
+from catalog_stream import apply_change, snapshot_change  # noqa: E402
+
+REGION = os.getenv('AWS_REGION', 'us-east-1')
+PRODUCTS_TABLE = os.getenv('PRODUCTS_TABLE_NAME', 'products')
+STOCKS_TABLE = os.getenv('STOCKS_TABLE_NAME', 'stocks')
+CATALOG_TABLE = os.getenv('CATALOG_TABLE_NAME')
+BACKFILL_SEGMENTS = int(os.getenv('BACKFILL_SEGMENTS', '8'))
+
+# The stream handler needs old images to drop attributes removed from a product
+STREAM_SPECIFICATION = {'StreamEnabled': True, 'StreamViewType': 'NEW_AND_OLD_IMAGES'}
+
+def enable_stream(client, table_name: str) -> str:
+    """Turn on the table's stream if needed and return its ARN"""
+    table = client.describe_table(TableName=table_name)['Table']
+    specification = table.get('StreamSpecification', {})
+    if specification.get('StreamEnabled'):
+        if specification.get('StreamViewType') != STREAM_SPECIFICATION['StreamViewType']:
+            print(f"⚠️ Stream on {table_name} is {specification.get('StreamViewType')}; "
+                  f"NEW_AND_OLD_IMAGES is recommended")
+        print(f"✅ Stream already enabled on {table_name}")
+        return table['LatestStreamArn']
+
+    table = client.update_table(TableName=table_name, StreamSpecification=STREAM_SPECIFICATION)
+    print(f"🚀 Enabled stream on {table_name}")
+    return table['TableDescription']['LatestStreamArn']
+
+def backfill_segment(client, table_name: str, kind: str, segment: int, total_segments: int) -> int:
+    """Copy one scan segment into the view, leaving items the stream already wrote alone"""
+    written = 0
+    scan_kwargs = {'TableName': table_name, 'Segment': segment, 'TotalSegments': total_segments}
+    while True:
+        response = client.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            apply_change(client, snapshot_change(kind, item))
+            written += 1
+        if 'LastEvaluatedKey' not in response:
+            return written
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def backfill(session) -> int:
+    client = session.resource('dynamodb', region_name=REGION).meta.client
+    sources = [(PRODUCTS_TABLE, 'product'), (STOCKS_TABLE, 'stock')]
+    with ThreadPoolExecutor(max_workers=BACKFILL_SEGMENTS) as executor:
+        futures = [
+            executor.submit(backfill_segment, client, table_name, kind, segment, BACKFILL_SEGMENTS)
+            for table_name, kind in sources
+            for segment in range(BACKFILL_SEGMENTS)
+        ]
+        return sum(future.result() for future in futures)
+
+def backfill_catalog_view():
+    try:
+        session = boto3.session.Session()
+        client = session.client('dynamodb', region_name=REGION)
+
+        # Streams first: the stream processor can only be deployed against their ARNs
+        for table_name, context_key in [(PRODUCTS_TABLE, 'productsStreamArn'),
+                                        (STOCKS_TABLE, 'stocksStreamArn')]:
+            stream_arn = enable_stream(client, table_name)
+            print(f"   cdk deploy -c {context_key}={stream_arn}")
+
+        if not CATALOG_TABLE:
+            print("⚠️ CATALOG_TABLE_NAME is not set; deploy the stack, set it and run again to backfill")
+            return
+
+        # Run after the stream processor is live so no change falls between the two
+        written = backfill(session)
+        print(f"\n🎉 Backfilled {written} items into {CATALOG_TABLE}")
+
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        error_message = e.response['Error']['Message']
+        print(f"❌ AWS Error ({error_code}): {error_message}")
+
+if __name__ == "__main__":
+    backfill_catalog_view()
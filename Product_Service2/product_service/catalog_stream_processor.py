@@ -0,0 +1,16 @@
+from aws_cdk import (
+    Duration,
+    aws_lambda as _lambda,
+)
+from constructs import Construct
+
+def create_catalog_stream_lambda(scope: Construct, id: str,  environment: dict, role: None) -> _lambda.Function:
+    return _lambda.Function(
+        scope,
+        id,
+        runtime=_lambda.Runtime.PYTHON_3_9,
+        handler='catalog_stream.handler',
+        code=_lambda.Code.from_asset('product_service/lambda_func'),
+        timeout=Duration.seconds(60),
+        environment=environment or {}
+    )
@@ -0,0 +1,129 @@
+import boto3
+import os
+import sys
+import time
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'lambda_func'))
+from indexes import (  # noqa: E402
+    CATALOG_PARTITION_ATTRIBUTE,
+    PRICE_INDEX_NAME,
+    TITLE_INDEX_NAME,
+    TITLE_SORT_ATTRIBUTE,
+    index_attributes
+)
+
+#Load enviroment variable from  .env file
+load_dotenv()
+
+REGION = os.getenv('AWS_REGION', 'us-east-1')
+PRODUCTS_TABLE = os.getenv('PRODUCTS_TABLE_NAME', 'products')
+BACKFILL_SEGMENTS = int(os.getenv('BACKFILL_SEGMENTS', '8'))
+
+INDEXES = [
+    (PRICE_INDEX_NAME, 'price', 'N'),
+    (TITLE_INDEX_NAME, TITLE_SORT_ATTRIBUTE, 'S'),
+]
+
+def existing_indexes(client) -> dict:
+    """Map of GSI name -> status for the products table"""
+    table = client.describe_table(TableName=PRODUCTS_TABLE)['Table']
+    return {
+        index['IndexName']: index['IndexStatus']
+        for index in table.get('GlobalSecondaryIndexes', [])
+    }
+
+def wait_until_active(client, index_name: str, delay: int = 15) -> None:
+    while existing_indexes(client).get(index_name) != 'ACTIVE':
+        print(f"⏳ Waiting for index {index_name}...")
+        time.sleep(delay)
+
+def create_index(client, index_name: str, sort_key: str, sort_key_type: str) -> None:
+    """Create one GSI keyed on the catalog partition; UpdateTable accepts one GSI at a time"""
+    if index_name in existing_indexes(client):
+        print(f"✅ Index {index_name} already exists")
+        return
+
+    client.update_table(
+        TableName=PRODUCTS_TABLE,
+        AttributeDefinitions=[
+            {'AttributeName': CATALOG_PARTITION_ATTRIBUTE, 'AttributeType': 'S'},
+            {'AttributeName': sort_key, 'AttributeType': sort_key_type}
+        ],
+        GlobalSecondaryIndexUpdates=[{
+            'Create': {
+                'IndexName': index_name,
+                'KeySchema': [
+                    {'AttributeName': CATALOG_PARTITION_ATTRIBUTE, 'KeyType': 'HASH'},
+                    {'AttributeName': sort_key, 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        }]
+    )
+    print(f"🚀 Creating index {index_name}")
+    wait_until_active(client, index_name)
+
+def backfill_segment(table, segment: int, total_segments: int) -> int:
+    """Add index attributes to products written before the indexes existed"""
+    updated = 0
+    scan_kwargs = {
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        'FilterExpression': 'attribute_not_exists(#catalog)',
+        'ProjectionExpression': 'id, title',
+        'ExpressionAttributeNames': {'#catalog': CATALOG_PARTITION_ATTRIBUTE}
+    }
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            attributes = index_attributes(item.get('title', ''))
+            table.update_item(
+                Key={'id': item['id']},
+                UpdateExpression='SET #catalog = :catalog, #title_lower = :title_lower',
+                ExpressionAttributeNames={
+                    '#catalog': CATALOG_PARTITION_ATTRIBUTE,
+                    '#title_lower': TITLE_SORT_ATTRIBUTE
+                },
+                ExpressionAttributeValues={
+                    ':catalog': attributes[CATALOG_PARTITION_ATTRIBUTE],
+                    ':title_lower': attributes[TITLE_SORT_ATTRIBUTE]
+                }
+            )
+            updated += 1
+        if 'LastEvaluatedKey' not in response:
+            return updated
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def backfill(session) -> int:
+    # One resource per segment, since resources are not thread safe. They are built
+    # here on the main thread because the session they come from is not either.
+    tables = [session.resource('dynamodb', region_name=REGION).Table(PRODUCTS_TABLE)
+              for _ in range(BACKFILL_SEGMENTS)]
+
+    with ThreadPoolExecutor(max_workers=BACKFILL_SEGMENTS) as executor:
+        return sum(executor.map(lambda segment: backfill_segment(tables[segment], segment, BACKFILL_SEGMENTS),
+                                range(BACKFILL_SEGMENTS)))
+
+def create_indexes():
+    try:
+        session = boto3.session.Session()
+        client = session.client('dynamodb', region_name=REGION)
+
+        # Backfill first so the new indexes are built with every product in them
+        updated = backfill(session)
+        print(f"✅ Backfilled index attributes on {updated} products")
+
+        for index_name, sort_key, sort_key_type in INDEXES:
+            create_index(client, index_name, sort_key, sort_key_type)
+        print("\n🎉 Indexes are ready!")
+
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        error_message = e.response['Error']['Message']
+        print(f"❌ AWS Error ({error_code}): {error_message}")
+
+if __name__ == "__main__":
+    create_indexes()
@@ -0,0 +1,34 @@
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+BATCH_GET_MAX_ATTEMPTS = int(os.environ.get('BATCH_GET_MAX_ATTEMPTS', '8'))
+BATCH_GET_BASE_DELAY = float(os.environ.get('BATCH_GET_BASE_DELAY', '0.025'))
+BATCH_GET_MAX_DELAY = float(os.environ.get('BATCH_GET_MAX_DELAY', '1.0'))
+
+class UnprocessedKeysError(Exception):
+    """Raised when DynamoDB keeps returning UnprocessedKeys after every retry"""
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BATCH_GET_MAX_DELAY, BATCH_GET_BASE_DELAY * (2 ** attempt)))
+
+def batch_get(dynamodb, request_items: Dict[str, Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Run a BatchGetItem, retrying UnprocessedKeys with backoff; returns items per table"""
+    responses: Dict[str, List[Dict[str, Any]]] = {table_name: [] for table_name in request_items}
+    attempt = 0
+    while request_items:
+        response = dynamodb.batch_get_item(RequestItems=request_items)
+        for table_name, items in response.get('Responses', {}).items():
+            responses.setdefault(table_name, []).extend(items)
+
+        request_items = response.get('UnprocessedKeys') or {}
+        if request_items:
+            attempt += 1
+            if attempt >= BATCH_GET_MAX_ATTEMPTS:
+                raise UnprocessedKeysError(
+                    f'BatchGetItem left keys unprocessed after {attempt} attempts'
+                )
+            time.sleep(backoff_delay(attempt))
+    return responses
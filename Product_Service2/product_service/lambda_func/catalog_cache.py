@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from serialization import Body, body_length
+
+CATALOG_VERSION_KEY = {'id': 'catalog'}
+
+def get_catalog_version(dynamodb) -> Optional[int]:
+    """Read the catalog version counter, or None when no meta table is configured"""
+    table_name = os.environ.get('CATALOG_META_TABLE_NAME')
+    if not table_name:
+        return None
+    response = dynamodb.Table(table_name).get_item(
+        Key=CATALOG_VERSION_KEY,
+        ProjectionExpression='#version',
+        ExpressionAttributeNames={'#version': 'version'}
+    )
+    return int(response.get('Item', {}).get('version', 0))
+
+def catalog_version_bump() -> Optional[Dict[str, Any]]:
+    """Transaction item that increments the catalog version, or None when no meta table is configured"""
+    table_name = os.environ.get('CATALOG_META_TABLE_NAME')
+    if not table_name:
+        return None
+    return {
+        'Update': {
+            'TableName': table_name,
+            'Key': CATALOG_VERSION_KEY,
+            'UpdateExpression': 'ADD #version :one',
+            'ExpressionAttributeNames': {'#version': 'version'},
+            'ExpressionAttributeValues': {':one': 1}
+        }
+    }
+
+class CatalogCache:
+    """Size-bounded LRU cache of serialized responses with a TTL and a version tag"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, Tuple[Optional[int], float, Body, Dict[str, str]]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Optional[int]) -> Optional[Tuple[Body, Dict[str, str]]]:
+        """Return (body, headers) if cached for this version and not expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry_version, expires_at, body, headers = entry
+            if entry_version != version or expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return body, headers
+
+    def put(self, key: Hashable, version: Optional[int], body: Body, headers: Dict[str, str]) -> None:
+        """Store a serialized response, evicting least recently used entries to stay in bounds"""
+        size = body_length(body)
+        if self.ttl_seconds <= 0 or self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (version, time.monotonic() + self.ttl_seconds, body, headers)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= body_length(entry[2])
@@ -0,0 +1,170 @@
+import os
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from clients import get_dynamodb_resource
+from catalog_cache import catalog_version_bump
+from catalog_view import DELETED_ATTRIBUTE, PRODUCT_SEQ_ATTRIBUTE, STOCK_SEQ_ATTRIBUTE, view_reads_enabled
+
+STREAM_MAX_WORKERS = int(os.environ.get('STREAM_MAX_WORKERS', '8'))
+
+_deserializer = TypeDeserializer()
+
+# Stream sequence numbers run to 40 digits, past the 38 a DynamoDB Number holds, so they are
+# stored as zero-padded strings, whose lexical order is their numeric order
+SEQUENCE_DIGITS = 40
+
+def format_sequence(sequence: int) -> str:
+    return str(sequence).zfill(SEQUENCE_DIGITS)
+
+class Change:
+    """The net effect of one batch of stream records on one catalog item"""
+
+    def __init__(self, kind: str, product_id: str):
+        self.kind = kind  # 'product' or 'stock'
+        self.product_id = product_id
+        self.first_sequence: Optional[int] = None
+        self.sequence = 0
+        self.event_name = ''
+        self.new_image: Dict[str, Any] = {}
+        self.old_attributes = set()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        stream = record['dynamodb']
+        sequence = int(stream['SequenceNumber'])
+        if self.first_sequence is None:
+            self.first_sequence = sequence
+        self.sequence = sequence
+        self.event_name = record['eventName']
+        self.new_image = _deserialize(stream.get('NewImage'))
+        self.old_attributes.update(stream.get('OldImage', {}).keys())
+
+def snapshot_change(kind: str, item: Dict[str, Any]) -> Change:
+    """A change that writes an existing item into the view unless a stream record got there first"""
+    change = Change(kind, item['id'] if kind == 'product' else item['product_id'])
+    # Real sequence numbers are positive, so any streamed change wins over a snapshot
+    change.first_sequence = change.sequence = 0
+    change.event_name = 'INSERT'
+    change.new_image = item
+    return change
+
+def _deserialize(image: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {name: _deserializer.deserialize(value) for name, value in (image or {}).items()}
+
+def _source_table(record: Dict[str, Any]) -> str:
+    # arn:aws:dynamodb:<region>:<account>:table/<name>/stream/<label>
+    return record['eventSourceARN'].split(':table/', 1)[1].split('/', 1)[0]
+
+def coalesce(records: List[Dict[str, Any]]) -> List[Change]:
+    """Collapse the batch to one change per (source, product id), keeping record order"""
+    products_table = os.environ['PRODUCTS_TABLE_NAME']
+    stocks_table = os.environ['STOCKS_TABLE_NAME']
+    changes: Dict[Tuple[str, str], Change] = {}
+
+    for record in records:
+        table_name = _source_table(record)
+        keys = _deserialize(record['dynamodb']['Keys'])
+        if table_name == products_table:
+            kind, product_id = 'product', keys['id']
+        elif table_name == stocks_table:
+            kind, product_id = 'stock', keys['product_id']
+        else:
+            print(f"Skipping record from unexpected table: {table_name}")
+            continue
+        change = changes.get((kind, product_id))
+        if change is None:
+            change = changes[(kind, product_id)] = Change(kind, product_id)
+        change.add(record)
+
+    return list(changes.values())
+
+def build_update(change: Change) -> Dict[str, Any]:
+    """UpdateItem arguments that apply a change only if it is newer than what the item holds"""
+    seq_attribute = PRODUCT_SEQ_ATTRIBUTE if change.kind == 'product' else STOCK_SEQ_ATTRIBUTE
+    names = {'#seq': seq_attribute}
+    values: Dict[str, Any] = {':seq': format_sequence(change.sequence), ':number': 'N'}
+    set_clauses = ['#seq = :seq']
+    remove_names: List[str] = []
+
+    if change.kind == 'product':
+        names['#deleted'] = DELETED_ATTRIBUTE
+        if change.event_name == 'REMOVE':
+            values[':deleted'] = True
+            set_clauses.append('#deleted = :deleted')
+            stale = change.old_attributes
+        else:
+            remove_names.append('#deleted')
+            for index, (name, value) in enumerate(change.new_image.items()):
+                if name == 'id':
+                    continue
+                names[f'#a{index}'] = name
+                values[f':a{index}'] = value
+                set_clauses.append(f'#a{index} = :a{index}')
+            stale = change.old_attributes - set(change.new_image)
+        for index, name in enumerate(sorted(stale - {'id'})):
+            names[f'#r{index}'] = name
+            remove_names.append(f'#r{index}')
+    else:
+        names['#count'] = 'count'
+        count = 0 if change.event_name == 'REMOVE' else change.new_image.get('count', 0)
+        values[':count'] = count
+        set_clauses.append('#count = :count')
+
+    update_expression = 'SET ' + ', '.join(set_clauses)
+    if remove_names:
+        update_expression += ' REMOVE ' + ', '.join(remove_names)
+
+    return {
+        'TableName': os.environ['CATALOG_TABLE_NAME'],
+        'Key': {'id': change.product_id},
+        'UpdateExpression': update_expression,
+        # Items written before sequences were strings hold a Number, which any string supersedes
+        'ConditionExpression': 'attribute_not_exists(#seq) OR attribute_type(#seq, :number) OR #seq < :seq',
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+def apply_change(client, change: Change) -> bool:
+    """Apply a change to the view; False if the item already held it"""
+    try:
+        client.update_item(**build_update(change))
+    except ClientError as e:
+        # The item already reflects this or a later record: replays are no-ops
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+    return True
+
+def handler(event, context):
+    """Keep the catalog view in sync with the products and stocks streams"""
+    records = event.get('Records', [])
+    changes = coalesce(records)
+    print(f"Applying {len(changes)} catalog changes from {len(records)} stream records")
+
+    client = get_dynamodb_resource().meta.client
+    failed_sequences = []
+    applied = False
+    with ThreadPoolExecutor(max_workers=max(1, STREAM_MAX_WORKERS)) as executor:
+        futures = [(executor.submit(apply_change, client, change), change) for change in changes]
+        for future, change in futures:
+            try:
+                applied = future.result() or applied
+            except Exception as e:
+                print(f"Error applying {change.kind} change for {change.product_id}: {str(e)}")
+                failed_sequences.append(change.first_sequence)
+
+    # Writers bump the version before the view catches up, so a page read in between
+    # would be cached under the new version; bump again once the view holds the change
+    version_bump = catalog_version_bump()
+    if version_bump and applied and view_reads_enabled():
+        try:
+            client.update_item(**version_bump['Update'])
+        except ClientError as e:
+            # The view is updated; cached pages just live until their TTL
+            print(f"Failed to bump catalog version: {str(e)}")
+
+    # Lambda retries the shard from the earliest failed record; later records replay idempotently
+    if failed_sequences:
+        return {'batchItemFailures': [{'itemIdentifier': str(min(failed_sequences))}]}
+    return {'batchItemFailures': []}
@@ -0,0 +1,81 @@
+import os
+from typing import Any, Dict, List, Optional
+from projection import wants_stock
+from batch_get import batch_get
+
+# Bookkeeping attributes on catalog view items; stripped before items leave the API
+PRODUCT_SEQ_ATTRIBUTE = 'product_seq'
+STOCK_SEQ_ATTRIBUTE = 'stock_seq'
+DELETED_ATTRIBUTE = 'deleted'
+VIEW_ATTRIBUTES = (PRODUCT_SEQ_ATTRIBUTE, STOCK_SEQ_ATTRIBUTE, DELETED_ATTRIBUTE)
+
+def view_reads_enabled() -> bool:
+    """Whether reads go to the catalog view instead of joining products and stocks"""
+    return (bool(os.environ.get('CATALOG_TABLE_NAME'))
+            and os.environ.get('CATALOG_VIEW_READS', 'false').lower() == 'true')
+
+def view_projection_kwargs(fields: Optional[List[str]]) -> Dict[str, Any]:
+    """ProjectionExpression arguments for view reads; count lives on the view item"""
+    if fields is None:
+        return {}
+    # The bookkeeping attributes decide whether the item is a visible product
+    projected = list(fields) + [PRODUCT_SEQ_ATTRIBUTE, DELETED_ATTRIBUTE]
+    names = {f'#f{index}': field for index, field in enumerate(projected)}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names
+    }
+
+def view_scan_kwargs(fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Scan arguments that skip stock-only and deleted items"""
+    kwargs = view_projection_kwargs(fields)
+    names = dict(kwargs.get('ExpressionAttributeNames', {}))
+    names.update({'#product_seq': PRODUCT_SEQ_ATTRIBUTE, '#deleted': DELETED_ATTRIBUTE})
+    kwargs['ExpressionAttributeNames'] = names
+    kwargs['FilterExpression'] = 'attribute_exists(#product_seq) AND attribute_not_exists(#deleted)'
+    return kwargs
+
+def to_products(items: List[Dict[str, Any]], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Turn view items into API products, dropping items with no live product behind them"""
+    products = []
+    for item in items:
+        # Stock records can reach the view before their product does
+        if PRODUCT_SEQ_ATTRIBUTE not in item or item.get(DELETED_ATTRIBUTE):
+            continue
+        for name in VIEW_ATTRIBUTES:
+            item.pop(name, None)
+        if wants_stock(fields):
+            item.setdefault('count', 0)
+        products.append(item)
+    return products
+
+def get_view_product(dynamodb, product_id: str,
+                     fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Get a product with its stock count from the catalog view in one GetItem"""
+    table = dynamodb.Table(os.environ['CATALOG_TABLE_NAME'])
+    item = table.get_item(Key={'id': product_id}, **view_projection_kwargs(fields)).get('Item')
+    products = to_products([item] if item else [], fields)
+    return products[0] if products else None
+
+def get_view_products(client, product_ids: List[str],
+                      fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Get up to 100 products from the catalog view in one BatchGetItem"""
+    table_name = os.environ['CATALOG_TABLE_NAME']
+    request_items = {
+        table_name: {
+            'Keys': [{'id': product_id} for product_id in product_ids],
+            **view_projection_kwargs(fields)
+        }
+    }
+    return to_products(batch_get(client, request_items)[table_name], fields)
+
+def scan_view_page(dynamodb, limit: int, exclusive_start_key: Optional[Dict[str, Any]] = None,
+                   fields: Optional[List[str]] = None):
+    """Get one page of products from the catalog view"""
+    table = dynamodb.Table(os.environ['CATALOG_TABLE_NAME'])
+    # Limit counts items before the filter, so a page can come back short
+    scan_kwargs = {'Limit': limit, **view_scan_kwargs(fields)}
+    if exclusive_start_key:
+        scan_kwargs['ExclusiveStartKey'] = exclusive_start_key
+    response = table.scan(**scan_kwargs)
+    return to_products(response.get('Items', []), fields), response.get('LastEvaluatedKey')
@@ -0,0 +1,90 @@
+import base64
+import os
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from serialization import Body, body_chunks, body_length, join_body
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it we only offer gzip
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '4'))
+
+# Compress in slices so we never hold a second full-size copy of the encoded body
+_SLICE_SIZE = 256 * 1024
+
+def supported_encodings() -> List[str]:
+    """Encodings we can produce, in order of preference"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    weights = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+    return weights
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best content coding the client accepts, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights = _parse_accept_encoding(accept_encoding)
+    best, best_weight = None, 0.0
+    for coding in supported_encodings():
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+def _slices(body: Body):
+    for chunk in body_chunks(body):
+        for i in range(0, len(chunk), _SLICE_SIZE):
+            yield chunk[i:i + _SLICE_SIZE].encode('utf-8')
+
+def compress(body: Body, encoding: str) -> bytes:
+    """Compress a text body, or the chunks iter_dumps produced, with the given content coding"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        chunks = [compressor.process(piece) for piece in _slices(body)]
+        chunks.append(compressor.finish())
+    elif encoding == 'gzip':
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 = gzip container
+        chunks = [compressor.compress(piece) for piece in _slices(body)]
+        chunks.append(compressor.flush())
+    else:
+        raise ValueError(f'Unsupported encoding: {encoding}')
+    return b''.join(chunks)
+
+def response_encoding(body: Body, accept_encoding: Optional[str]) -> Optional[str]:
+    """The content coding compress_body will apply to this body, or None for identity"""
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None or body_length(body) < COMPRESSION_MIN_BYTES:
+        return None
+    return encoding
+
+def compress_body(body: Body, headers: Dict[str, str],
+                  accept_encoding: Optional[str]) -> Tuple[Any, Dict[str, str], bool]:
+    """Negotiate and apply response compression; returns (body, headers, is_base64_encoded)"""
+    # Also on bodiless 304s, whose ETag depends on the negotiated coding
+    headers = {**headers, 'Vary': 'Accept-Encoding'}
+    encoding = response_encoding(body, accept_encoding)
+    if encoding is None:
+        # Only an uncompressed response needs the JSON as one string
+        return join_body(body), headers, False
+    compressed = compress(body, encoding)
+    headers['Content-Encoding'] = encoding
+    return base64.b64encode(compressed).decode('ascii'), headers, True
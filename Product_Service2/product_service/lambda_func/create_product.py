@@ -1,28 +1,57 @@
 import json
 import os
-import boto3
+import base64
 import uuid
 from decimal import Decimal
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from clients import get_dynamodb_resource
+from serialization import dumps
+from catalog_cache import catalog_version_bump
+from indexes import index_attributes
+from http_cache import get_header
+from idempotency import (
+    IDEMPOTENCY_HEADER,
+    cancellation_codes,
+    get_record,
+    idempotency_enabled,
+    record_conflicted,
+    record_put,
+    request_fingerprint,
+    validate_key
+)
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
-
-def create_response(status_code: int, body: Any) -> Dict[str, Any]:
+def create_response(status_code: int, body: Any, headers: Optional[Dict[str, str]] = None,
+                    serialized: bool = False) -> Dict[str, Any]:
     return {
         'statusCode': status_code,
         'headers': {
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'OPTIONS,POST'
+            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Idempotency-Key',
+            'Access-Control-Allow-Methods': 'OPTIONS,POST',
+            **(headers or {})
         },
-        'body': json.dumps(body, cls=DecimalEncoder)
+        'body': body if serialized else dumps(body)
     }
 
+def replay_response(record: Dict[str, Any], fingerprint: str) -> Dict[str, Any]:
+    """Answer a retried request with the response stored for its idempotency key"""
+    if record['fingerprint'] != fingerprint:
+        return create_response(422, {'message': f'{IDEMPOTENCY_HEADER} was already used with a different request body'})
+    print(f"Replaying stored response for idempotency key: {record['key']}")
+    return create_response(int(record['status_code']), record['body'],
+                           headers={'Idempotent-Replayed': 'true'}, serialized=True)
+
+def parse_body(event: Dict[str, Any]) -> Any:
+    """Decode the JSON request body"""
+    body = event.get('body', '{}')
+    if event.get('isBase64Encoded') and isinstance(body, str):
+        # API Gateway base64-encodes payloads matching its binary media types
+        body = base64.b64decode(body).decode('utf-8')
+    if isinstance(body, str):
+        body = json.loads(body)
+    return body
+
 def validate_product_data(data: Dict) -> tuple[bool, str]:
     """Validate product data"""
     if not data:
@@ -41,16 +70,66 @@ def validate_product_data(data: Dict) -> tuple[bool, str]:
     
     return True, ""
 
+def product_transaction_items(data: Dict, product_id: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Build the product and stock Puts for validated data; returns the created product too"""
+    product_data = {
+        'id': product_id,
+        'title': data['title'],
+        'description': data['description'],
+        'price': Decimal(str(data['price']))
+    }
+
+    stock_data = {
+        'product_id': product_id,
+        'count': data['count']
+    }
+
+    transaction_items = [
+        {
+            'Put': {
+                'TableName': os.environ['PRODUCTS_TABLE_NAME'],
+                'Item': {**product_data, **index_attributes(data['title'])},
+                'ConditionExpression': 'attribute_not_exists(id)'
+            }
+        },
+        {
+            'Put': {
+                'TableName': os.environ['STOCKS_TABLE_NAME'],
+                'Item': stock_data,
+                'ConditionExpression': 'attribute_not_exists(product_id)'
+            }
+        }
+    ]
+
+    # Combine product and stock data for response
+    return {**product_data, 'count': stock_data['count']}, transaction_items
+
 
 def handler(event, context):
+    # Shared DynamoDB resource, reused across warm invocations
+    dynamodb = get_dynamodb_resource()
+    idempotency_key = None
+    transaction_items = []
+
     try:
         print(f"Received event: {event}")
         print(f"Context: RequestId: {context.aws_request_id}")
 
         # Parse request body
-        body = event.get('body', '{}')
-        if isinstance(body, str):
-            body = json.loads(body)
+        body = parse_body(event)
+
+        if idempotency_enabled():
+            idempotency_key = get_header(event, IDEMPOTENCY_HEADER)
+        if idempotency_key is not None:
+            key_error = validate_key(idempotency_key)
+            if key_error:
+                return create_response(400, {'message': key_error})
+            fingerprint = request_fingerprint(body)
+
+            # A retry of a request that already completed gets the stored response
+            record = get_record(dynamodb, idempotency_key)
+            if record:
+                return replay_response(record, fingerprint)
 
         print(f"Validating product data: {body}")
         
@@ -63,39 +142,22 @@ def handler(event, context):
         # Generate unique ID for the product
         product_id = str(uuid.uuid4())
 
-        # Prepare product data
-        product_data = {
-            'id': product_id,
-            'title': body['title'],
-            'description': body['description'],
-            'price': Decimal(str(body['price']))
-        }
+        # Create transaction items
+        response_data, transaction_items = product_transaction_items(body, product_id)
 
-        stock_data = {
-            'product_id': product_id,
-            'count': body['count']
-        }
+        # Bump the catalog version so warm readers drop their cached pages
+        version_bump = catalog_version_bump()
+        if version_bump:
+            transaction_items.append(version_bump)
 
-        # Initialize DynamoDB
-        dynamodb = boto3.resource('dynamodb', region_name=os.environ['REGION'])
+        response_body = {
+            'message': 'Product created successfully',
+            'product': response_data
+        }
 
-        # Create transaction items
-        transaction_items = [
-            {
-                'Put': {
-                    'TableName': os.environ['PRODUCTS_TABLE_NAME'],
-                    'Item': product_data,
-                    'ConditionExpression': 'attribute_not_exists(id)'
-                }
-            },
-            {
-                'Put': {
-                    'TableName': os.environ['STOCKS_TABLE_NAME'],
-                    'Item': stock_data,
-                    'ConditionExpression': 'attribute_not_exists(product_id)'
-                }
-            }
-        ]
+        # Store the response with the product so a retry can never write a second one
+        if idempotency_key is not None:
+            transaction_items.append(record_put(idempotency_key, fingerprint, 201, dumps(response_body)))
 
         # Execute transaction
         print(f"Executing transaction for product: {product_id}")
@@ -103,17 +165,24 @@ def handler(event, context):
             TransactItems=transaction_items
         )
 
-        # Combine product and stock data for response
-        response_data = {**product_data, 'count': stock_data['count']}
-        
         print(f"Successfully created product with ID: {product_id}")
-        return create_response(201, {
-            'message': 'Product created successfully',
-            'product': response_data
-        })
+        return create_response(201, response_body)
 
     except dynamodb.meta.client.exceptions.TransactionCanceledException as e:
         print(f"Transaction cancelled: {str(e)}")
+        if idempotency_key is not None and record_conflicted(e, len(transaction_items) - 1):
+            # A concurrent request with the same key got there first
+            try:
+                record = get_record(dynamodb, idempotency_key)
+            except Exception as lookup_error:
+                print(f"Error reading idempotency record: {str(lookup_error)}")
+                record = None
+            if record:
+                return replay_response(record, fingerprint)
+        if 'TransactionConflict' in cancellation_codes(e):
+            # A concurrent write held one of the items, e.g. the same key still in flight; nothing was written
+            return create_response(409, {'message': 'Conflicting concurrent request - please retry'},
+                                   headers={'Retry-After': '1'})
         return create_response(400, {'message': 'Failed to create product - transaction cancelled'})
     except json.JSONDecodeError as e:
         print(f"JSON decode error: {str(e)}")
@@ -0,0 +1,128 @@
+import json
+import os
+import uuid
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from clients import get_dynamodb_resource
+from serialization import dumps
+from catalog_cache import catalog_version_bump
+from create_product import parse_body, product_transaction_items, validate_product_data
+
+MAX_BATCH_PRODUCTS = int(os.environ.get('MAX_BATCH_PRODUCTS', '500'))
+TRANSACT_MAX_ITEMS = 100  # DynamoDB limit per TransactWriteItems request
+ITEMS_PER_PRODUCT = 2  # product Put + stock Put
+PRODUCTS_PER_TRANSACTION = TRANSACT_MAX_ITEMS // ITEMS_PER_PRODUCT
+BATCH_WRITE_MAX_WORKERS = int(os.environ.get('BATCH_WRITE_MAX_WORKERS', '4'))
+
+def create_response(status_code: int, body: Any) -> Dict[str, Any]:
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+            'Access-Control-Allow-Methods': 'OPTIONS,POST'
+        },
+        'body': dumps(body)
+    }
+
+def chunk_products(products: List[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+    """Split prepared products into groups that fit in one transaction"""
+    return [products[i:i + size] for i in range(0, len(products), size)]
+
+def _cancellation_message(reasons: List[Dict[str, Any]], position: int) -> str:
+    # One reason per transaction item, in order; 'None' means that item was fine
+    codes = [reasons[i].get('Code', 'None') for i in range(position, position + ITEMS_PER_PRODUCT)
+             if i < len(reasons)]
+    failed = [code for code in codes if code != 'None']
+    if failed:
+        return f'Transaction cancelled: {failed[0]}'
+    return 'Transaction cancelled by another product in the same chunk'
+
+def write_chunk(client, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Write one chunk in a single transaction and report a result per product"""
+    transaction_items = [item for prepared in chunk for item in prepared['items']]
+    try:
+        client.transact_write_items(TransactItems=transaction_items)
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'TransactionCanceledException':
+            reasons = e.response.get('CancellationReasons', [])
+            return [
+                {'index': prepared['index'], 'status': 'failed',
+                 'message': _cancellation_message(reasons, position * ITEMS_PER_PRODUCT)}
+                for position, prepared in enumerate(chunk)
+            ]
+        return [
+            {'index': prepared['index'], 'status': 'failed', 'message': e.response['Error']['Message']}
+            for prepared in chunk
+        ]
+    return [
+        {'index': prepared['index'], 'status': 'created', 'product': prepared['product']}
+        for prepared in chunk
+    ]
+
+def create_products(dynamodb, products: List[Any]) -> List[Dict[str, Any]]:
+    """Validate every product, write the valid ones in concurrent chunks; one result per input"""
+    results: List[Dict[str, Any]] = [None] * len(products)
+    prepared = []
+    for index, data in enumerate(products):
+        is_valid, error_message = validate_product_data(data) if isinstance(data, dict) \
+            else (False, 'Product must be an object')
+        if not is_valid:
+            results[index] = {'index': index, 'status': 'failed', 'message': error_message}
+            continue
+        product, items = product_transaction_items(data, str(uuid.uuid4()))
+        prepared.append({'index': index, 'product': product, 'items': items})
+
+    chunks = chunk_products(prepared, PRODUCTS_PER_TRANSACTION)
+    if chunks:
+        # Chunks run in parallel on the thread-safe client behind the resource
+        client = dynamodb.meta.client
+        with ThreadPoolExecutor(max_workers=max(1, min(BATCH_WRITE_MAX_WORKERS, len(chunks)))) as executor:
+            for chunk_results in executor.map(lambda chunk: write_chunk(client, chunk), chunks):
+                for result in chunk_results:
+                    results[result['index']] = result
+
+        # One bump after all chunks; bumping inside each transaction would make them conflict
+        version_bump = catalog_version_bump()
+        if version_bump and any(result['status'] == 'created' for result in results):
+            try:
+                client.update_item(**version_bump['Update'])
+            except ClientError as e:
+                # The products are written; cached pages just live until their TTL
+                print(f"Failed to bump catalog version: {str(e)}")
+
+    return results
+
+def handler(event, context):
+    # Shared DynamoDB resource, reused across warm invocations
+    dynamodb = get_dynamodb_resource()
+
+    try:
+        print(f"Context: RequestId: {context.aws_request_id}")
+
+        # Accept a bare array or {"products": [...]}
+        body = parse_body(event)
+        products = body.get('products') if isinstance(body, dict) else body
+        if not isinstance(products, list) or not products:
+            return create_response(400, {'message': 'Request body must be a non-empty list of products'})
+        if len(products) > MAX_BATCH_PRODUCTS:
+            return create_response(400, {'message': f'At most {MAX_BATCH_PRODUCTS} products can be created at once'})
+
+        print(f"Creating {len(products)} products")
+        results = create_products(dynamodb, products)
+
+        created = sum(1 for result in results if result['status'] == 'created')
+        failed = len(results) - created
+        print(f"Created {created} products, {failed} failed")
+
+        # 207 tells the caller to look at the per-item results
+        return create_response(201 if not failed else 207, {'created': created, 'failed': failed, 'results': results})
+
+    except json.JSONDecodeError as e:
+        print(f"JSON decode error: {str(e)}")
+        return create_response(400, {'message': 'Invalid JSON in request body'})
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return create_response(500, {'message': f'Internal server error: {str(e)}'})
@@ -0,0 +1,60 @@
+import hashlib
+import os
+from typing import Any, Dict, Optional, Tuple
+from serialization import Body, body_chunks
+
+# Sent with every cacheable 200/304; the default makes clients revalidate with If-None-Match
+CACHE_CONTROL = os.environ.get('CACHE_CONTROL', 'no-cache')
+
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """Case-insensitive request header lookup"""
+    headers = event.get('headers') or {}
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+def compute_etag(body: Body) -> str:
+    """Strong ETag derived from the serialized body, hashed a chunk at a time"""
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in body_chunks(body):
+        digest.update(chunk.encode('utf-8'))
+    return '"' + digest.hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 7232, 3.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque_tag = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque_tag:
+            return True
+    return False
+
+def coded_etag(etag: str, encoding: Optional[str]) -> str:
+    """Strong validators must differ per content-coding (RFC 7232, 2.3), so tag the coding on"""
+    if not encoding:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+def apply_conditional(status_code: int, body: Body, headers: Dict[str, str],
+                      if_none_match: Optional[str],
+                      encoding: Optional[str] = None) -> Tuple[int, Body, Dict[str, str]]:
+    """Tag successful responses with ETag/Cache-Control and turn matching requests into 304s.
+
+    `encoding` is the content coding the body will be sent with, if any.
+    """
+    if status_code != 200:
+        return status_code, body, headers
+
+    etag = coded_etag(headers.get('ETag') or compute_etag(body), encoding)
+    headers = {**headers, 'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return 304, '', headers
+    return status_code, body, headers
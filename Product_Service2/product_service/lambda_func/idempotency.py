@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', str(24 * 60 * 60)))
+MAX_KEY_LENGTH = 255
+
+def idempotency_enabled() -> bool:
+    return bool(os.environ.get('IDEMPOTENCY_TABLE_NAME'))
+
+def validate_key(key: str) -> Optional[str]:
+    """Error message for an unusable key, or None"""
+    if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        return f'{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} printable characters'
+    return None
+
+def request_fingerprint(body: Any) -> str:
+    """Hash of the parsed request body, independent of key order and whitespace"""
+    canonical = json.dumps(body, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def get_record(dynamodb, key: str) -> Optional[Dict[str, Any]]:
+    """Read a stored response; expired records may linger until TTL deletes them"""
+    response = dynamodb.Table(os.environ['IDEMPOTENCY_TABLE_NAME']).get_item(
+        Key={'key': key},
+        ConsistentRead=True
+    )
+    record = response.get('Item')
+    if not record or int(record['expires_at']) < int(time.time()):
+        return None
+    return record
+
+def record_put(key: str, fingerprint: str, status_code: int, body: str) -> Dict[str, Any]:
+    """Transaction item storing the response; fails if a live record already holds the key"""
+    now = int(time.time())
+    return {
+        'Put': {
+            'TableName': os.environ['IDEMPOTENCY_TABLE_NAME'],
+            'Item': {
+                'key': key,
+                'fingerprint': fingerprint,
+                'status_code': status_code,
+                'body': body,
+                'expires_at': now + IDEMPOTENCY_TTL_SECONDS
+            },
+            'ConditionExpression': 'attribute_not_exists(#key) OR #expires_at < :now',
+            'ExpressionAttributeNames': {'#key': 'key', '#expires_at': 'expires_at'},
+            'ExpressionAttributeValues': {':now': now}
+        }
+    }
+
+def cancellation_codes(error) -> List[str]:
+    """Why each item of a cancelled transaction failed, in TransactItems order"""
+    return [reason.get('Code', 'None') for reason in error.response.get('CancellationReasons', [])]
+
+def record_conflicted(error, position: int) -> bool:
+    """Whether a cancelled transaction failed on the idempotency record at position.
+
+    ConditionalCheckFailed means another request holds the key; TransactionConflict means
+    its transaction was still in flight, so the record may exist by the time we look.
+    """
+    codes = cancellation_codes(error)
+    return position < len(codes) and codes[position] in ('ConditionalCheckFailed', 'TransactionConflict')
@@ -0,0 +1,27 @@
+import os
+from typing import Any, Dict, List
+
+# Every product carries the same partition value so the GSIs can sort the whole catalog.
+# That puts all index writes in one partition (~1000 WCU/s); see "Loading products" in the README.
+CATALOG_PARTITION_ATTRIBUTE = 'catalog'
+CATALOG_PARTITION_VALUE = 'products'
+TITLE_SORT_ATTRIBUTE = 'title_lower'
+
+PRICE_INDEX_NAME = os.environ.get('PRICE_INDEX_NAME', 'price-index')
+TITLE_INDEX_NAME = os.environ.get('TITLE_INDEX_NAME', 'title-index')
+
+INDEX_ATTRIBUTES = (CATALOG_PARTITION_ATTRIBUTE, TITLE_SORT_ATTRIBUTE)
+
+def index_attributes(title: str) -> Dict[str, Any]:
+    """Attributes a product item needs to appear in the price and title indexes"""
+    return {
+        CATALOG_PARTITION_ATTRIBUTE: CATALOG_PARTITION_VALUE,
+        TITLE_SORT_ATTRIBUTE: title.lower()
+    }
+
+def strip_index_attributes(products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Remove index bookkeeping attributes before products leave the API"""
+    for product in products:
+        for name in INDEX_ATTRIBUTES:
+            product.pop(name, None)
+    return products
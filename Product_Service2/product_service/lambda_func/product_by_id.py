@@ -1,40 +1,135 @@
 import json
 import os
-import boto3
-from decimal import Decimal
-from typing import Dict, Any, Optional
-
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
-
-def get_product_by_id(dynamodb, product_id: str) -> Optional[Dict[str, Any]]:
-    """Get product from DynamoDB by ID"""
-    table = dynamodb.Table(os.environ['PRODUCTS_TABLE_NAME'])
-    response = table.get_item(
-        Key={'id': product_id}
-    )
-    return response.get('Item')
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from clients import get_dynamodb_resource
+from serialization import dumps
+from http_cache import apply_conditional, get_header
+from compression import compress_body, response_encoding
+from projection import parse_fields, projection_kwargs, wants_stock
+from indexes import strip_index_attributes
+from batch_get import batch_get
+from catalog_view import get_view_product, get_view_products, view_reads_enabled
 
-def get_stock_by_product_id(dynamodb, product_id: str) -> Optional[Dict[str, Any]]:
-    """Get stock information from DynamoDB by product ID"""
-    table = dynamodb.Table(os.environ['STOCKS_TABLE_NAME'])
-    response = table.get_item(
-        Key={'product_id': product_id}
-    )
-    return response.get('Item')
+MAX_BATCH_IDS = 100
+BATCH_GET_MAX_KEYS = 100  # DynamoDB limit per BatchGetItem request, across all tables
+BATCH_GET_MAX_WORKERS = int(os.environ.get('BATCH_GET_MAX_WORKERS', '4'))
+
+def get_product_with_stock(dynamodb, product_id: str,
+                           fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """Get a product and its stock count in a single BatchGetItem round-trip"""
+    if view_reads_enabled():
+        return get_view_product(dynamodb, product_id, fields)
+
+    products_table = os.environ['PRODUCTS_TABLE_NAME']
+    stocks_table = os.environ['STOCKS_TABLE_NAME']
+
+    request_items = {
+        products_table: {
+            'Keys': [{'id': product_id}],
+            **projection_kwargs(fields)
+        }
+    }
+    if wants_stock(fields):
+        request_items[stocks_table] = {
+            'Keys': [{'product_id': product_id}],
+            'ProjectionExpression': '#count',
+            'ExpressionAttributeNames': {'#count': 'count'}
+        }
+
+    responses = batch_get(dynamodb, request_items)
+    products = responses.get(products_table, [])
+    if not products:
+        return None
+
+    product = products[0]
+    if wants_stock(fields):
+        stocks = responses.get(stocks_table, [])
+        product['count'] = stocks[0]['count'] if stocks else 0
+    return product
+
+def parse_ids(value: Optional[str]) -> List[str]:
+    """Parse a comma-separated ids= query parameter"""
+    ids = [product_id.strip() for product_id in (value or '').split(',')]
+    if not ids or any(not product_id for product_id in ids):
+        raise ValueError('ids must be a comma-separated list of product IDs')
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f'At most {MAX_BATCH_IDS} ids can be requested at once')
+    return ids
+
+def _fetch_chunk(client, product_ids: List[str], fields: Optional[List[str]]) -> Dict[str, List[Dict[str, Any]]]:
+    products_table = os.environ['PRODUCTS_TABLE_NAME']
+    stocks_table = os.environ['STOCKS_TABLE_NAME']
+    request_items = {
+        products_table: {
+            'Keys': [{'id': product_id} for product_id in product_ids],
+            **projection_kwargs(fields)
+        }
+    }
+    if wants_stock(fields):
+        request_items[stocks_table] = {
+            'Keys': [{'product_id': product_id} for product_id in product_ids],
+            'ProjectionExpression': 'product_id, #count',
+            'ExpressionAttributeNames': {'#count': 'count'}
+        }
+    return batch_get(client, request_items)
+
+def get_products_by_ids(dynamodb, product_ids: List[str],
+                        fields: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+    """Get many products with their stock; results follow product_ids, None where missing"""
+    unique_ids = list(dict.fromkeys(product_ids))
+    from_view = view_reads_enabled()
+    keys_per_id = 2 if wants_stock(fields) and not from_view else 1
+    chunk_size = BATCH_GET_MAX_KEYS // keys_per_id
+    chunks = [unique_ids[i:i + chunk_size] for i in range(0, len(unique_ids), chunk_size)]
+
+    # Chunks run in parallel on the thread-safe client behind the resource
+    client = dynamodb.meta.client
+    with ThreadPoolExecutor(max_workers=max(1, min(BATCH_GET_MAX_WORKERS, len(chunks)))) as executor:
+        if from_view:
+            # View items already carry their count, so there is nothing to join
+            views = executor.map(lambda chunk: get_view_products(client, chunk, fields), chunks)
+            results = [{os.environ['CATALOG_TABLE_NAME']: products} for products in views]
+        else:
+            results = list(executor.map(lambda chunk: _fetch_chunk(client, chunk, fields), chunks))
+
+    source_table = os.environ['CATALOG_TABLE_NAME' if from_view else 'PRODUCTS_TABLE_NAME']
+    products_by_id, counts_by_id = {}, {}
+    for responses in results:
+        for product in responses.get(source_table, []):
+            products_by_id[product['id']] = product
+        for stock in responses.get(os.environ['STOCKS_TABLE_NAME'], []):
+            counts_by_id[stock['product_id']] = stock['count']
+
+    ordered = []
+    for product_id in product_ids:
+        product = products_by_id.get(product_id)
+        if product is not None:
+            product = dict(product)
+            if wants_stock(fields) and not from_view:
+                product['count'] = counts_by_id.get(product_id, 0)
+            strip_index_attributes([product])
+        ordered.append(product)
+    return ordered
 
-def create_response(status_code: int, body: Any) -> Dict[str, Any]:
+def create_response(status_code: int, body: Any, if_none_match: Optional[str] = None,
+                    accept_encoding: Optional[str] = None) -> Dict[str, Any]:
     """Create API Gateway response"""
+    body = dumps(body)
+    status_code, body, headers = apply_conditional(
+        status_code, body, {}, if_none_match, response_encoding(body, accept_encoding)
+    )
+    body, headers, is_base64_encoded = compress_body(body, headers, accept_encoding)
     return {
         'statusCode': status_code,
         'headers': {
             'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
+            'Access-Control-Expose-Headers': 'ETag',
+            'Content-Type': 'application/json',
+            **headers
         },
-        'body': json.dumps(body, cls=DecimalEncoder)
+        'body': body,
+        'isBase64Encoded': is_base64_encoded
     }
 
 def handler(event, context):
@@ -48,23 +143,25 @@ def handler(event, context):
         if not product_id:
             return create_response(400, {'message': 'Product ID is required'})
 
-        # Initialize DynamoDB client
-        dynamodb = boto3.resource('dynamodb', region_name=os.environ['REGION'])
+        try:
+            fields = parse_fields((event.get('queryStringParameters') or {}).get('fields'))
+        except ValueError as e:
+            return create_response(400, {'message': str(e)})
+
+        # Shared DynamoDB resource, reused across warm invocations
+        dynamodb = get_dynamodb_resource()
         
-        # Get product details
-        product = get_product_by_id(dynamodb, product_id)
+        # Get product details and stock count together
+        product = get_product_with_stock(dynamodb, product_id, fields)
         
         if not product:
             return create_response(404, {'message': 'Product not found'})
         
-        # Get stock information
-        stock = get_stock_by_product_id(dynamodb, product_id)
-        
-        # Add stock count to product
-        product['count'] = stock['count'] if stock else 0
-        
-        # Return successful response
-        return create_response(200, product)
+        strip_index_attributes([product])
+
+        # Return successful response, or 304 if the client already has it
+        return create_response(200, product, get_header(event, 'If-None-Match'),
+                               get_header(event, 'Accept-Encoding'))
         
     except Exception as e:
         print(f"Error: {str(e)}")  # Log the error
@@ -1,67 +1,399 @@
 import json
 import os
-import boto3
-from decimal import Decimal
-from typing import Dict, List, Any
-
-# Custom JSON encoder for Decimal types
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
-
-def get_products(dynamodb) -> List[Dict[str, Any]]:
-    """Get all products from DynamoDB"""
+import base64
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Any, Optional, Tuple
+from clients import get_dynamodb_resource
+from serialization import Body, body_length, dumps, iter_dumps
+from catalog_cache import CatalogCache, get_catalog_version
+from http_cache import apply_conditional, compute_etag, get_header
+from compression import compress_body, response_encoding
+from batch_get import batch_get
+from product_by_id import get_products_by_ids, parse_ids
+from projection import parse_fields, projection_kwargs, wants_stock
+from catalog_view import scan_view_page, to_products, view_reads_enabled, view_scan_kwargs
+from indexes import (
+    CATALOG_PARTITION_ATTRIBUTE,
+    CATALOG_PARTITION_VALUE,
+    PRICE_INDEX_NAME,
+    TITLE_INDEX_NAME,
+    TITLE_SORT_ATTRIBUTE,
+    strip_index_attributes
+)
+
+DEFAULT_PAGE_LIMIT = int(os.environ.get('DEFAULT_PAGE_LIMIT', '50'))
+MAX_PAGE_LIMIT = 100  # BatchGetItem accepts at most 100 keys per request
+
+# Parallel scan settings for full catalog reads
+PRODUCTS_SCAN_SEGMENTS = int(os.environ.get('PRODUCTS_SCAN_SEGMENTS', '4'))
+STOCKS_SCAN_SEGMENTS = int(os.environ.get('STOCKS_SCAN_SEGMENTS', '4'))
+SCAN_MAX_WORKERS = int(os.environ.get('SCAN_MAX_WORKERS', '8'))
+# Lambda proxy responses are capped at 6 MB; leave room for headers and base64 of compressed bodies
+FULL_CATALOG_MAX_BYTES = int(os.environ.get('FULL_CATALOG_MAX_BYTES', str(4 * 1024 * 1024)))
+
+SORT_OPTIONS = ('price', '-price', 'title', '-title')
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+# Joined, serialized catalog pages kept in memory between warm invocations
+catalog_cache = CatalogCache(
+    ttl_seconds=float(os.environ.get('CATALOG_CACHE_TTL_SECONDS', '60')),
+    max_entries=int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', '128')),
+    max_bytes=int(os.environ.get('CATALOG_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+)
+
+def encode_cursor(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Encode a DynamoDB LastEvaluatedKey as an opaque cursor"""
+    if not last_evaluated_key:
+        return None
+    # DynamoDB JSON keeps number keys (the price index's sort key) exact; plain
+    # JSON would turn the Decimal into a float, which boto3 refuses on the way back
+    typed = {name: _serializer.serialize(value) for name, value in last_evaluated_key.items()}
+    raw = json.dumps(typed, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Decode an opaque cursor back into an ExclusiveStartKey"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        typed = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(typed, dict) or not typed:
+            raise ValueError('empty key')
+        return {name: _deserializer.deserialize(value) for name, value in typed.items()}
+    except (ValueError, TypeError, AttributeError, ArithmeticError) as e:
+        raise ValueError('Invalid cursor') from e
+
+def parse_limit(value: Optional[str]) -> int:
+    """Parse the limit query parameter"""
+    if value is None or value == '':
+        return DEFAULT_PAGE_LIMIT
+    try:
+        limit = int(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError('limit must be an integer') from e
+    if limit < 1 or limit > MAX_PAGE_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_LIMIT}')
+    return limit
+
+def _parse_price(value: Optional[str], name: str) -> Optional[Decimal]:
+    if value is None or value == '':
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation as e:
+        raise ValueError(f'{name} must be a number') from e
+    if not price.is_finite() or price < 0:
+        raise ValueError(f'{name} must be a non-negative number')
+    return price
+
+def parse_filters(query: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Parse minPrice/maxPrice/sort/titlePrefix; None when no index query is needed"""
+    min_price = _parse_price(query.get('minPrice'), 'minPrice')
+    max_price = _parse_price(query.get('maxPrice'), 'maxPrice')
+    sort = query.get('sort') or None
+    title_prefix = query.get('titlePrefix') or None
+
+    if min_price is None and max_price is None and sort is None and title_prefix is None:
+        return None
+    if sort is not None and sort not in SORT_OPTIONS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_OPTIONS)}")
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise ValueError('minPrice must not be greater than maxPrice')
+    if title_prefix is not None and sort in ('price', '-price'):
+        raise ValueError('sort by price cannot be combined with titlePrefix')
+    return {
+        'min_price': min_price,
+        'max_price': max_price,
+        'sort': sort,
+        'title_prefix': title_prefix
+    }
+
+def _price_condition(condition_class, min_price: Optional[Decimal], max_price: Optional[Decimal]):
+    price = condition_class('price')
+    if min_price is not None and max_price is not None:
+        return price.between(min_price, max_price)
+    if min_price is not None:
+        return price.gte(min_price)
+    if max_price is not None:
+        return price.lte(max_price)
+    return None
+
+def index_name(filters: Dict[str, Any]) -> str:
+    """The index a filtered/sorted listing queries"""
+    sort = filters['sort'] or ''
+    if filters['title_prefix'] is not None or sort.endswith('title'):
+        return TITLE_INDEX_NAME
+    return PRICE_INDEX_NAME
+
+def cursor_key_attributes(filters: Optional[Dict[str, Any]]) -> set:
+    """Attributes of the LastEvaluatedKey, and so of a valid cursor, for this listing"""
+    if filters is None:
+        return {'id'}
+    sort_attribute = TITLE_SORT_ATTRIBUTE if index_name(filters) == TITLE_INDEX_NAME else 'price'
+    return {'id', CATALOG_PARTITION_ATTRIBUTE, sort_attribute}
+
+def query_products(dynamodb, filters: Dict[str, Any], limit: int = DEFAULT_PAGE_LIMIT,
+                   exclusive_start_key: Optional[Dict[str, Any]] = None,
+                   fields: Optional[List[str]] = None
+                   ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Get one page of filtered/sorted products with a Query on the price or title index"""
+    table = dynamodb.Table(os.environ['PRODUCTS_TABLE_NAME'])
+    key_condition = Key(CATALOG_PARTITION_ATTRIBUTE).eq(CATALOG_PARTITION_VALUE)
+    sort = filters['sort'] or ''
+    query_kwargs = {
+        'IndexName': index_name(filters),
+        'Limit': limit,
+        'ScanIndexForward': not sort.startswith('-'),
+        **projection_kwargs(fields)
+    }
+
+    if query_kwargs['IndexName'] == TITLE_INDEX_NAME:
+        # Title order; a price range can only narrow the page as a filter here
+        if filters['title_prefix'] is not None:
+            key_condition &= Key(TITLE_SORT_ATTRIBUTE).begins_with(filters['title_prefix'].lower())
+        price_filter = _price_condition(Attr, filters['min_price'], filters['max_price'])
+        if price_filter is not None:
+            query_kwargs['FilterExpression'] = price_filter
+    else:
+        # Price order; the range is part of the key condition
+        price_key = _price_condition(Key, filters['min_price'], filters['max_price'])
+        if price_key is not None:
+            key_condition &= price_key
+
+    query_kwargs['KeyConditionExpression'] = key_condition
+    if exclusive_start_key:
+        query_kwargs['ExclusiveStartKey'] = exclusive_start_key
+    response = table.query(**query_kwargs)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+def get_products(dynamodb, limit: int = DEFAULT_PAGE_LIMIT,
+                 exclusive_start_key: Optional[Dict[str, Any]] = None,
+                 fields: Optional[List[str]] = None
+                 ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Get one page of products from DynamoDB, reading only the requested fields"""
     table = dynamodb.Table(os.environ['PRODUCTS_TABLE_NAME'])
-    response = table.scan()
-    return response.get('Items', [])
+    scan_kwargs = {'Limit': limit, **projection_kwargs(fields)}
+    if exclusive_start_key:
+        scan_kwargs['ExclusiveStartKey'] = exclusive_start_key
+    response = table.scan(**scan_kwargs)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+def get_stocks(dynamodb, product_ids: List[str]) -> List[Dict[str, Any]]:
+    """Get stocks for the given product IDs from DynamoDB"""
+    if not product_ids:
+        return []
+
+    table_name = os.environ['STOCKS_TABLE_NAME']
+    request_items = {
+        table_name: {
+            'Keys': [{'product_id': product_id} for product_id in dict.fromkeys(product_ids)]
+        }
+    }
+    return batch_get(dynamodb, request_items)[table_name]
+
+def scan_segment(client, table_name: str, segment: int, total_segments: int,
+                 extra_kwargs: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Scan a single segment of a table to the end"""
+    items = []
+    scan_kwargs = {
+        'TableName': table_name,
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        **(extra_kwargs or {})
+    }
+    while True:
+        response = client.scan(**scan_kwargs)
+        items.extend(response.get('Items', []))
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return items
+        scan_kwargs['ExclusiveStartKey'] = last_evaluated_key
 
-def get_stocks(dynamodb) -> List[Dict[str, Any]]:
-    """Get all stocks from DynamoDB"""
-    table = dynamodb.Table(os.environ['STOCKS_TABLE_NAME'])
-    response = table.scan()
-    return response.get('Items', [])
+def submit_parallel_scan(executor, client, table_name: str, total_segments: int,
+                         extra_kwargs: Optional[Dict[str, Any]] = None) -> List:
+    """Submit one scan task per segment and return their futures"""
+    total_segments = max(1, total_segments)
+    return [
+        executor.submit(scan_segment, client, table_name, segment, total_segments, extra_kwargs)
+        for segment in range(total_segments)
+    ]
+
+def collect_segments(futures: List) -> List[Dict[str, Any]]:
+    """Concatenate the items of finished segment scans"""
+    items = []
+    for future in futures:
+        items.extend(future.result())
+    return items
+
+def get_all_products_and_stocks(dynamodb, fields: Optional[List[str]] = None
+                                ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Read both tables in full with parallel segmented scans running side by side"""
+    # The resource's client is thread safe (the resource is not) and still
+    # converts attribute values to Python types
+    client = dynamodb.meta.client
+    with ThreadPoolExecutor(max_workers=max(1, SCAN_MAX_WORKERS)) as executor:
+        product_futures = submit_parallel_scan(
+            executor, client, os.environ['PRODUCTS_TABLE_NAME'], PRODUCTS_SCAN_SEGMENTS,
+            projection_kwargs(fields)
+        )
+        stock_futures = []
+        if wants_stock(fields):
+            stock_futures = submit_parallel_scan(
+                executor, client, os.environ['STOCKS_TABLE_NAME'], STOCKS_SCAN_SEGMENTS
+            )
+        return collect_segments(product_futures), collect_segments(stock_futures)
 
 def join_products_with_stocks(products: List[Dict], stocks: List[Dict]) -> List[Dict]:
     """Join products with their stock information"""
     stocks_by_id = {stock['product_id']: stock['count'] for stock in stocks}
-    
+
     for product in products:
         product['count'] = stocks_by_id.get(product['id'], 0)
-    
+
     return products
 
-def create_response(status_code: int, body: Any) -> Dict[str, Any]:
-    """Create API Gateway response"""
+def create_response(status_code: int, body: Any, headers: Optional[Dict[str, str]] = None,
+                    serialized: bool = False, if_none_match: Optional[str] = None,
+                    accept_encoding: Optional[str] = None) -> Dict[str, Any]:
+    """Create API Gateway response; a serialized body may be the chunks of serialize_products"""
+    body = body if serialized else dumps(body)
+    status_code, body, headers = apply_conditional(
+        status_code, body, headers or {}, if_none_match, response_encoding(body, accept_encoding)
+    )
+    body, headers, is_base64_encoded = compress_body(body, headers, accept_encoding)
     return {
         'statusCode': status_code,
         'headers': {
             'Access-Control-Allow-Origin': '*',
-            'Content-Type': 'application/json'
+            'Access-Control-Expose-Headers': 'X-Next-Cursor,ETag',
+            'Content-Type': 'application/json',
+            **headers
         },
-        'body': json.dumps(body, cls=DecimalEncoder)  # Used DecimalEncoder here
+        'body': body,
+        'isBase64Encoded': is_base64_encoded
     }
 
+def serialize_products(products: List[Dict[str, Any]]) -> List[str]:
+    """Encode a product list chunk by chunk; the pieces are hashed, cached and compressed as they are"""
+    return list(iter_dumps(products))
+
+def get_all_view_products(dynamodb, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Read the whole catalog view with a parallel segmented scan"""
+    with ThreadPoolExecutor(max_workers=max(1, SCAN_MAX_WORKERS)) as executor:
+        futures = submit_parallel_scan(
+            executor, dynamodb.meta.client, os.environ['CATALOG_TABLE_NAME'],
+            PRODUCTS_SCAN_SEGMENTS, view_scan_kwargs(fields)
+        )
+        return to_products(collect_segments(futures), fields)
+
+def read_catalog_view(dynamodb, full: bool, limit: int, start_key: Optional[Dict[str, Any]],
+                      fields: Optional[List[str]] = None) -> Tuple[Body, Dict[str, str]]:
+    """Read and serialize a catalog page from the view, where no join is needed"""
+    if full:
+        return serialize_products(strip_index_attributes(get_all_view_products(dynamodb, fields))), {}
+
+    products, last_evaluated_key = scan_view_page(dynamodb, limit, start_key, fields)
+    headers = {}
+    next_cursor = encode_cursor(last_evaluated_key)
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    return serialize_products(strip_index_attributes(products)), headers
+
+def read_catalog(dynamodb, full: bool, limit: int, start_key: Optional[Dict[str, Any]],
+                 fields: Optional[List[str]] = None,
+                 filters: Optional[Dict[str, Any]] = None) -> Tuple[Body, Dict[str, str]]:
+    """Read the requested catalog page (or full catalog) and serialize it"""
+    if view_reads_enabled() and not filters:
+        return read_catalog_view(dynamodb, full, limit, start_key, fields)
+
+    if full:
+        # Full catalog dump
+        products, stocks = get_all_products_and_stocks(dynamodb, fields)
+        if wants_stock(fields):
+            products = join_products_with_stocks(products, stocks)
+        return serialize_products(strip_index_attributes(products)), {}
+
+    # Get one page of products and, if count is wanted, the stocks for that page only
+    if filters:
+        products, last_evaluated_key = query_products(dynamodb, filters, limit, start_key, fields)
+    else:
+        products, last_evaluated_key = get_products(dynamodb, limit, start_key, fields)
+    if wants_stock(fields):
+        stocks = get_stocks(dynamodb, [product['id'] for product in products])
+        products = join_products_with_stocks(products, stocks)
+
+    # Point at the next page if any
+    headers = {}
+    next_cursor = encode_cursor(last_evaluated_key)
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    return serialize_products(strip_index_attributes(products)), headers
+
 def handler(event, context):
     try:
 
          # Simple log for incoming request
         print(f"Incoming request: {json.dumps(event)}")
         print(f"Using DynamoDB table: {os.environ['PRODUCTS_TABLE_NAME']}")
-        # Initialize DynamoDB client
-        dynamodb = boto3.resource('dynamodb', region_name=os.environ['REGION'])
-        
-        # Get products and stocks
-        products = get_products(dynamodb)
-        stocks = get_stocks(dynamodb)
-        
-        # Join products with stocks
-        joined_products = join_products_with_stocks(products, stocks)
-        
-        # Return successful response
-        return create_response(200, joined_products)
-        
+
+        query = event.get('queryStringParameters') or {}
+        full = query.get('all', '').lower() == 'true'
+        try:
+            limit = parse_limit(query.get('limit'))
+            start_key = decode_cursor(query.get('cursor'))
+            fields = parse_fields(query.get('fields'))
+            ids = parse_ids(query['ids']) if 'ids' in query else None
+            filters = parse_filters(query)
+            if full and filters:
+                raise ValueError('all cannot be combined with filters or sort')
+            if start_key is not None and set(start_key) != cursor_key_attributes(filters):
+                # DynamoDB would reject another index's key as a ValidationException
+                raise ValueError('cursor belongs to a different sort or filter')
+        except ValueError as e:
+            return create_response(400, {'message': str(e)})
+
+        # Shared DynamoDB resource, reused across warm invocations
+        dynamodb = get_dynamodb_resource()
+
+        if ids is not None:
+            # Batch lookup for callers that need many specific products
+            products = get_products_by_ids(dynamodb, ids, fields)
+            missing = [product_id for product_id, product in zip(ids, products) if product is None]
+            return create_response(200, {'products': products, 'missing': missing},
+                                   if_none_match=get_header(event, 'If-None-Match'),
+                                   accept_encoding=get_header(event, 'Accept-Encoding'))
+
+        # Serve from memory unless the catalog changed since the page was cached.
+        # The version is read before the tables so a concurrent write can only
+        # make the cached copy look older than it is, never newer.
+        cache_key = (full, limit, query.get('cursor'), tuple(fields or ()),
+                     tuple(sorted((filters or {}).items())))
+        version = get_catalog_version(dynamodb)
+        cached = catalog_cache.get(cache_key, version)
+        if cached:
+            body, headers = cached
+        else:
+            body, headers = read_catalog(dynamodb, full, limit, start_key, fields, filters)
+            if full and body_length(body) > FULL_CATALOG_MAX_BYTES:
+                # API Gateway would answer a 502 for a body this large
+                return create_response(413, {
+                    'message': 'The catalog is too large to return at once; page through it with limit and cursor'
+                })
+            # Hash once per cached page rather than once per request
+            headers['ETag'] = compute_etag(body)
+            catalog_cache.put(cache_key, version, body, headers)
+
+        # Return successful response, or 304 if the client already has this page
+        return create_response(200, body, headers, serialized=True,
+                               if_none_match=get_header(event, 'If-None-Match'),
+                               accept_encoding=get_header(event, 'Accept-Encoding'))
+
     except Exception as e:
         print(f"Error: {str(e)}")  # Log the error
         return create_response(500, {'message': f'Internal server error: {str(e)}'})
@@ -0,0 +1,39 @@
+import re
+from typing import Any, Dict, List, Optional
+
+# Attributes that live in the stocks table rather than on the product item
+STOCK_FIELDS = ('count',)
+MAX_FIELDS = 20
+
+_FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]{0,63}$')
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated fields= query parameter; None means every field"""
+    if value is None or not value.strip():
+        return None
+    fields = list(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    if len(fields) > MAX_FIELDS:
+        raise ValueError(f'At most {MAX_FIELDS} fields can be requested')
+    for field in fields:
+        if not _FIELD_NAME.match(field):
+            raise ValueError(f'Invalid field name: {field}')
+    # The product id is always returned; it is the join key for stock counts
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields
+
+def wants_stock(fields: Optional[List[str]]) -> bool:
+    """Whether the stock table has to be read for these fields"""
+    return fields is None or any(field in STOCK_FIELDS for field in fields)
+
+def projection_kwargs(fields: Optional[List[str]]) -> Dict[str, Any]:
+    """ProjectionExpression arguments for the product attributes among fields"""
+    if fields is None:
+        return {}
+    product_fields = [field for field in fields if field not in STOCK_FIELDS]
+    # Placeholders avoid clashes with reserved words such as "count" or "name"
+    names = {f'#f{index}': field for index, field in enumerate(product_fields)}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names
+    }
@@ -0,0 +1,69 @@
+import base64
+import json
+from decimal import Decimal
+from typing import Any, Iterator, List, Union
+from boto3.dynamodb.types import Binary
+
+# Number of list items handed to the C encoder per chunk in iter_dumps
+DEFAULT_CHUNK_SIZE = 500
+
+# A serialized body: one string, or the pieces iter_dumps produced
+Body = Union[str, List[str]]
+
+def _encode_binary(value) -> str:
+    raw = value.value if isinstance(value, Binary) else bytes(value)
+    return base64.b64encode(raw).decode('ascii')
+
+def _encode_set(value) -> list:
+    # DynamoDB sets are homogeneous; sort them so the output is deterministic
+    try:
+        return sorted(value)
+    except TypeError:
+        return sorted(value, key=_encode_binary)
+
+# Converters for the types DynamoDB hands back, looked up by exact type
+_CONVERTERS = {
+    Decimal: float,
+    set: _encode_set,
+    frozenset: _encode_set,
+    Binary: _encode_binary,
+    bytes: _encode_binary,
+    bytearray: _encode_binary,
+}
+
+def _default(obj: Any) -> Any:
+    converter = _CONVERTERS.get(type(obj))
+    if converter is None:
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+    return converter(obj)
+
+# Built once per container: json.dumps(cls=...) constructs a new encoder on every call
+_encoder = json.JSONEncoder(default=_default, check_circular=False, separators=(',', ':'))
+
+def dumps(obj: Any) -> str:
+    """Serialize a response body containing DynamoDB types to JSON"""
+    return _encoder.encode(obj)
+
+def iter_dumps(obj: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Serialize to JSON in pieces; lists are encoded chunk_size items at a time"""
+    if not isinstance(obj, list) or len(obj) <= chunk_size:
+        yield _encoder.encode(obj)
+        return
+
+    yield '['
+    for start in range(0, len(obj), chunk_size):
+        if start:
+            yield ','
+        # Each chunk goes through the C encoder in one call; drop its brackets
+        yield _encoder.encode(obj[start:start + chunk_size])[1:-1]
+    yield ']'
+
+def body_chunks(body: Body) -> List[str]:
+    """The pieces of a serialized body, for hashing and compressing without joining them"""
+    return [body] if isinstance(body, str) else body
+
+def body_length(body: Body) -> int:
+    return sum(len(chunk) for chunk in body_chunks(body))
+
+def join_body(body: Body) -> str:
+    return body if isinstance(body, str) else ''.join(body)
@@ -1,6 +1,8 @@
 from aws_cdk import (
+    Duration,
     Stack,
     aws_lambda as _lambda,
+    aws_lambda_event_sources as event_sources,
      aws_iam as iam,
     aws_dynamodb as dynamodb,
 )
@@ -8,22 +10,63 @@ from constructs import Construct
 from product_service.get_products import create_list_products_lambda
 from product_service.get_product_by_id import create_get_product_lambda
 from product_service.post_create_product import create_product_lambda
+from product_service.post_create_products_batch import create_products_batch_lambda
+from product_service.catalog_stream_processor import create_catalog_stream_lambda
 
 class LambdaStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         #Referencing DynamoDB
-        products_table = dynamodb.Table.from_table_name(
+        products_table = dynamodb.Table.from_table_attributes(
             self,
             'ProductsTable',
-            table_name='products'
+            table_name='products',
+            # price-index / title-index, created by create_indexes.py
+            grant_index_permissions=True,
+            # Streams are enabled by backfill_catalog_view.py, which prints the ARNs
+            table_stream_arn=self.node.try_get_context('productsStreamArn')
         )
 
-        stocks_table = dynamodb.Table.from_table_name(
+        stocks_table = dynamodb.Table.from_table_attributes(
             self,
             'StocksTable',
-            table_name='stocks'
+            table_name='stocks',
+            table_stream_arn=self.node.try_get_context('stocksStreamArn')
+        )
+
+        # Single-item table holding the catalog version counter
+        catalog_meta_table = dynamodb.Table(
+            self,
+            'CatalogMetaTable',
+            partition_key=dynamodb.Attribute(
+                name='id',
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST
+        )
+
+        # Responses stored per Idempotency-Key for POST /products retries
+        idempotency_table = dynamodb.Table(
+            self,
+            'IdempotencyTable',
+            partition_key=dynamodb.Attribute(
+                name='key',
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute='expires_at'
+        )
+
+        # Denormalized products + stock counts, kept in sync from the table streams
+        catalog_table = dynamodb.Table(
+            self,
+            'CatalogTable',
+            partition_key=dynamodb.Attribute(
+                name='id',
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST
         )
 
         print(f"Products Table Name: {products_table.table_name}")
@@ -60,6 +103,11 @@ class LambdaStack(Stack):
         common_env = {
             'PRODUCTS_TABLE_NAME': products_table.table_name,
             'STOCKS_TABLE_NAME': stocks_table.table_name,
+            'CATALOG_META_TABLE_NAME': catalog_meta_table.table_name,
+            'CATALOG_TABLE_NAME': catalog_table.table_name,
+            'IDEMPOTENCY_TABLE_NAME': idempotency_table.table_name,
+            # Switch reads to the view once it has been backfilled
+            'CATALOG_VIEW_READS': str(self.node.try_get_context('catalogViewReads') or 'false').lower(),
             'REGION' : Stack.of(self).region
         }
 
@@ -70,6 +118,13 @@ class LambdaStack(Stack):
             role = lambda_role
         )
 
+        self.products_batch_lambda = create_products_batch_lambda(
+            self,
+            'CreateProductsBatchFunction',
+            environment = common_env,
+            role = lambda_role
+        )
+
         self.list_products_lambda = create_list_products_lambda(
             self, 
             'GetProductsFunction',
@@ -91,6 +146,39 @@ class LambdaStack(Stack):
         stocks_table.grant_read_data(self.get_product_lambda)
         products_table.grant_write_data(self.product_lambda)
         stocks_table.grant_write_data(self.product_lambda)
+        catalog_meta_table.grant_read_data(self.list_products_lambda)
+        catalog_meta_table.grant_write_data(self.product_lambda)
+        idempotency_table.grant_read_write_data(self.product_lambda)
+        products_table.grant_write_data(self.products_batch_lambda)
+        stocks_table.grant_write_data(self.products_batch_lambda)
+        catalog_meta_table.grant_write_data(self.products_batch_lambda)
+        catalog_table.grant_read_data(self.list_products_lambda)
+        catalog_table.grant_read_data(self.get_product_lambda)
+
+        self.catalog_stream_lambda = create_catalog_stream_lambda(
+            self,
+            'CatalogStreamFunction',
+            environment = common_env,
+            role = lambda_role
+        )
+        catalog_table.grant_write_data(self.catalog_stream_lambda)
+        catalog_meta_table.grant_write_data(self.catalog_stream_lambda)
+
+        for table in (products_table, stocks_table):
+            if not table.table_stream_arn:
+                print(f"No stream ARN for {table.table_name}; catalog view will not be updated")
+                continue
+            self.catalog_stream_lambda.add_event_source(
+                event_sources.DynamoEventSource(
+                    table,
+                    starting_position=_lambda.StartingPosition.TRIM_HORIZON,
+                    batch_size=100,
+                    max_batching_window=Duration.seconds(1),
+                    # The handler reports the first failed record; later ones replay harmlessly
+                    report_batch_item_failures=True,
+                    retry_attempts=10
+                )
+            )
 
     @property
     def list_products_function(self):
@@ -104,5 +192,13 @@ class LambdaStack(Stack):
     def product_function(self):
         return self.product_lambda
 
+    @property
+    def products_batch_function(self):
+        return self.products_batch_lambda
+
+    @property
+    def catalog_stream_function(self):
+        return self.catalog_stream_lambda
+
 
 
@@ -1,10 +1,24 @@
+import argparse
 import boto3
+import csv
+import json
+import os
+import sys
+import threading
+import time
 import uuid
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import List, Dict
-import os
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(__file__), 'lambda_func'))
+from indexes import index_attributes  # noqa: E402
+from batch_get import backoff_delay  # noqa: E402
+from catalog_cache import catalog_version_bump  # noqa: E402
+
 #Load enviroment variable from  .env file
 load_dotenv()
 
@@ -13,80 +27,260 @@ REGION = os.getenv('AWS_REGION', 'us-east-1')
 PRODUCTS_TABLE = os.getenv('PRODUCTS_TABLE_NAME', 'products')
 STOCKS_TABLE = os.getenv('STOCKS_TABLE_NAME', 'stocks')
 
-def get_dynamodb_resource():
-    """Initialize DynamoDB resource with credentials from environment"""
-    return boto3.resource('dynamodb', region_name=REGION)
+BATCH_WRITE_MAX_ITEMS = 25  # DynamoDB limit per BatchWriteItem request
+BATCH_WRITE_MAX_ATTEMPTS = 10
+DEFAULT_COUNT = 10
+REPORT_EVERY_SECONDS = 5
+
+# Sample product data, loaded when no file is given
+SAMPLE_PRODUCTS = [
+    {"title": "Vegan Protein Powder", "description": "Organic plant-based protein.", "price": 29},
+    {"title": "Almond Butter", "description": "Smooth and natural almond butter.", "price": 12},
+    {"title": "Quinoa Pasta", "description": "Gluten-free quinoa pasta.", "price": 8}
+]
+
+class UnprocessedItemsError(Exception):
+    """Raised when DynamoDB keeps returning UnprocessedItems after every retry"""
+
+class InvalidLine:
+    """A line that could not be parsed; it is skipped and reported like any other bad row"""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+
+class LoadStats:
+    """Thread-safe progress counters"""
 
-def verify_tables(tables: List[str], dynamodb) -> bool:
-    """Verify if all required tables exist"""
-    existing_tables = list(dynamodb.tables.all())
-    existing_table_names = [table.name for table in existing_tables]
-    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.last_report = self.started
+        self.products = 0
+        self.retries = 0
+        self.skipped = 0
+        self.capacity: Dict[str, float] = {}
+
+    def record(self, products: int, consumed: List[Dict[str, Any]], retried: bool) -> None:
+        with self.lock:
+            self.products += products
+            self.retries += int(retried)
+            for entry in consumed:
+                table_name = entry['TableName']
+                self.capacity[table_name] = self.capacity.get(table_name, 0) + entry.get('CapacityUnits', 0)
+
+    def skip(self, line: int, reason: str) -> None:
+        with self.lock:
+            self.skipped += 1
+        print(f"⚠️ Skipping line {line}: {reason}")
+
+    def report(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.last_report < REPORT_EVERY_SECONDS:
+                return
+            self.last_report = now
+            elapsed = max(now - self.started, 1e-9)
+            capacity = ', '.join(f'{name}: {units:.0f} WCU' for name, units in self.capacity.items())
+            print(f"📦 {self.products} products in {elapsed:.1f}s "
+                  f"({self.products / elapsed:.0f} rows/s, {self.retries} retried batches, "
+                  f"{self.skipped} skipped rows) {capacity}")
+
+def get_dynamodb_resource(workers: int):
+    """DynamoDB resource whose client can serve every worker thread"""
+    config = Config(
+        max_pool_connections=max(10, workers * 2),
+        retries={'max_attempts': 10, 'mode': 'adaptive'}
+    )
+    return boto3.resource('dynamodb', region_name=REGION, config=config)
+
+def verify_tables(client, tables: List[str]) -> bool:
+    """Verify that each required table exists"""
     for table in tables:
-        if table not in existing_table_names:
-            print(f"❌ Table {table} does not exist")
-            return False
+        try:
+            client.describe_table(TableName=table)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                print(f"❌ Table {table} does not exist")
+                return False
+            raise
     return True
 
-def create_products_with_transactions(dynamodb, products):
-    """Create products and stocks using transactions"""
+def read_products(path: str, file_format: Optional[str] = None) -> Iterator[Tuple[int, Any]]:
+    """Stream (line number, row) pairs from a CSV (with a header row) or JSONL file"""
+    file_format = file_format or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_format == 'jsonl':
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, InvalidLine(f'Invalid JSON: {e.msg}')
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                # line_num is the row's last line, which is where a quoted field spanning lines ends
+                yield reader.line_num, row
+
+def _parse_price(value: Any) -> Decimal:
+    """The create_product rule: a positive number"""
     try:
-        for product in products:
-            product_id = str(uuid.uuid4())
-            
-            # Create transaction items
-            transaction_items = [
-                {
-                    'Put': {
-                        'TableName': PRODUCTS_TABLE,
-                        'Item': {
-                            'id': product_id,
-                            'title': product['title'],
-                            'description': product['description'],
-                            'price': product['price']
-                        }
-                    }
-                },
-                {
-                    'Put': {
-                        'TableName': STOCKS_TABLE,
-                        'Item': {
-                            'product_id': product_id,
-                            'count': 10
-                        }
-                    }
-                }
-            ]
-            
-            # Execute transaction
-            dynamodb.meta.client.transact_write_items(
-                TransactItems=transaction_items
-            )
-            print(f"✅ Created product and stock for {product['title']}")
+        price = Decimal(str(value).strip())
+    except InvalidOperation:
+        price = None
+    if price is None or not price.is_finite() or price <= 0:
+        raise ValueError(f'Price must be a positive number: {value!r}')
+    return price
 
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'TransactionCanceledException':
-            print("❌ Transaction cancelled:", e.response['CancellationReasons'])
-        raise
+def _parse_count(value: Any, default_count: int) -> int:
+    """The create_product rule: a non-negative integer, never truncated; blank takes the default"""
+    if value is None or value == '':
+        return default_count
+    if isinstance(value, int) and not isinstance(value, bool):
+        count = value
+    elif isinstance(value, str) and value.strip().isascii() and value.strip().isdigit():
+        count = int(value)
+    else:
+        # 3.7 and "3.0" alike, rather than writing a count nobody entered
+        raise ValueError(f'Count must be a non-negative integer: {value!r}')
+    if count < 0:
+        raise ValueError(f'Count must be a non-negative integer: {value!r}')
+    return count
 
-def populate_tables():
+def to_write_requests(product: Dict[str, Any], default_count: int) -> List[Dict[str, Any]]:
+    """Product and stock PutRequests for one input row; ValueError if the row is unusable"""
+    if isinstance(product, InvalidLine):
+        raise ValueError(product.reason)
+    if not isinstance(product, dict):
+        raise ValueError('Row must be an object')
+    title = product.get('title')
+    if not title or not isinstance(title, str):
+        raise ValueError('Missing required field: title')
+    if product.get('price') in (None, ''):
+        raise ValueError('Missing required field: price')
+    price = _parse_price(product['price'])
+    count = _parse_count(product.get('count'), default_count)
+
+    product_id = product.get('id') or str(uuid.uuid4())
+    return [
+        {'PutRequest': {'Item': {
+            'id': product_id,
+            'title': title,
+            'description': product.get('description', ''),
+            'price': price,
+            **index_attributes(title)
+        }}},
+        {'PutRequest': {'Item': {
+            'product_id': product_id,
+            'count': count
+        }}}
+    ]
+
+def iter_batches(products: Iterable[Tuple[int, Any]], default_count: int,
+                 stats: Optional[LoadStats] = None) -> Iterator[List[tuple]]:
+    """Group (line number, row) pairs into BatchWriteItem-sized lists of (table, request) pairs,
+    skipping unusable rows"""
+    batch: List[tuple] = []
+    batch_ids = set()
+    for line, product in products:
+        try:
+            product_request, stock_request = to_write_requests(product, default_count)
+        except ValueError as e:
+            # One bad row should not stop a load of millions
+            if stats is None:
+                raise
+            stats.skip(line, str(e))
+            continue
+        product_id = product_request['PutRequest']['Item']['id']
+        # Keep a product and its stock in the same batch; a repeated id must go in a new one
+        if len(batch) + 2 > BATCH_WRITE_MAX_ITEMS or product_id in batch_ids:
+            yield batch
+            batch, batch_ids = [], set()
+        batch.extend([(PRODUCTS_TABLE, product_request), (STOCKS_TABLE, stock_request)])
+        batch_ids.add(product_id)
+    if batch:
+        yield batch
+
+def write_batch(client, batch: List[tuple], stats: LoadStats) -> None:
+    """BatchWriteItem with retries of UnprocessedItems"""
+    request_items: Dict[str, List[Dict[str, Any]]] = {}
+    for table_name, request in batch:
+        request_items.setdefault(table_name, []).append(request)
+
+    attempt = 0
+    consumed: List[Dict[str, Any]] = []
+    while request_items:
+        response = client.batch_write_item(RequestItems=request_items, ReturnConsumedCapacity='TOTAL')
+        consumed.extend(response.get('ConsumedCapacity', []))
+        request_items = response.get('UnprocessedItems') or {}
+        if request_items:
+            attempt += 1
+            if attempt >= BATCH_WRITE_MAX_ATTEMPTS:
+                raise UnprocessedItemsError(f'BatchWriteItem left items unprocessed after {attempt} attempts')
+            time.sleep(backoff_delay(attempt))
+
+    stats.record(sum(1 for table_name, _ in batch if table_name == PRODUCTS_TABLE), consumed, attempt > 0)
+    stats.report()
+
+def load_products(client, products: Iterable[Tuple[int, Any]], workers: int,
+                  default_count: int = DEFAULT_COUNT) -> LoadStats:
+    """Write products and stocks with a pool of workers, keeping only a few batches in memory"""
+    stats = LoadStats()
+    # Bounds the batches read ahead of the writers, so memory stays flat for any file size
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    errors: List[BaseException] = []
+
+    def run(batch):
+        try:
+            write_batch(client, batch, stats)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in iter_batches(products, default_count, stats):
+            if errors:
+                break
+            in_flight.acquire()
+            executor.submit(run, batch)
+
+    if errors:
+        raise errors[0]
+    stats.report(force=True)
+    return stats
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Bulk load products and stocks into DynamoDB')
+    parser.add_argument('file', nargs='?', help='CSV or JSONL file of products; loads sample data if omitted')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='input format (default: from extension)')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent BatchWriteItem calls (default: 8)')
+    parser.add_argument('--default-count', type=int, default=DEFAULT_COUNT,
+                        help=f'stock count for rows without one (default: {DEFAULT_COUNT})')
+    return parser.parse_args(argv)
+
+def populate_tables(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
     try:
-        dynamodb = get_dynamodb_resource()
-        
+        dynamodb = get_dynamodb_resource(args.workers)
+        client = dynamodb.meta.client
+
         # Verify tables exist
-        if not verify_tables([PRODUCTS_TABLE, STOCKS_TABLE], dynamodb):
+        if not verify_tables(client, [PRODUCTS_TABLE, STOCKS_TABLE]):
             return
-        
-        # Sample product data
-        products = [
-            {"title": "Vegan Protein Powder", "description": "Organic plant-based protein.", "price": 29},
-            {"title": "Almond Butter", "description": "Smooth and natural almond butter.", "price": 12},
-            {"title": "Quinoa Pasta", "description": "Gluten-free quinoa pasta.", "price": 8}
-        ]
-
-        # Create products using transactions
-        create_products_with_transactions(dynamodb, products)
-        print("\n🎉 All data inserted successfully!")
+
+        products = read_products(args.file, args.format) if args.file else enumerate(SAMPLE_PRODUCTS, 1)
+        stats = load_products(client, products, max(1, args.workers), args.default_count)
+
+        # Drop cached catalog pages in warm Lambdas
+        version_bump = catalog_version_bump()
+        if version_bump:
+            client.update_item(**version_bump['Update'])
+
+        print(f"\n🎉 Inserted {stats.products} products!")
+        if stats.skipped:
+            print(f"⚠️ Skipped {stats.skipped} invalid rows")
 
     except ClientError as e:
         error_code = e.response['Error']['Code']
@@ -0,0 +1,17 @@
+from aws_cdk import (
+    Duration,
+    aws_lambda as _lambda,
+)
+from constructs import Construct
+
+def create_products_batch_lambda(scope: Construct, id: str,  environment: dict, role: None) -> _lambda.Function:
+    return _lambda.Function(
+        scope,
+        id,
+        runtime=_lambda.Runtime.PYTHON_3_9,
+        handler='create_products_batch.handler',
+        code=_lambda.Code.from_asset('product_service/lambda_func'),
+        # Hundreds of products take several transaction round-trips
+        timeout=Duration.seconds(29),
+        environment=environment or {}
+    )
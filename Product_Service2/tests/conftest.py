@@ -2,5 +2,24 @@ import pytest
 import os
 import sys
 
+from unittest.mock import MagicMock
+
 # Add the lambda_func directory to Python path
-sys.path.append(os.path.join(os.path.dirname(__file__), '../../lambda_func'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '../product_service/lambda_func'))
+import clients  # noqa: E402
+
+
+@pytest.fixture
+def env(monkeypatch):
+    monkeypatch.setenv('PRODUCTS_TABLE_NAME', 'products')
+    monkeypatch.setenv('STOCKS_TABLE_NAME', 'stocks')
+    monkeypatch.setenv('REGION', 'us-east-1')
+
+
+@pytest.fixture
+def dynamodb(env):
+    """MagicMock registered as the shared DynamoDB resource; modules override this to add behaviour"""
+    resource = MagicMock()
+    clients.set_resource('dynamodb', resource)
+    yield resource
+    clients.reset()
@@ -0,0 +1,48 @@
+from catalog_cache import CatalogCache, catalog_version_bump
+
+
+def test_entry_expires_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('catalog_cache.time.monotonic', lambda: now[0])
+    cache = CatalogCache(ttl_seconds=30, max_entries=10, max_bytes=1024)
+
+    cache.put('page', 1, '[]', {})
+    assert cache.get('page', 1) == ('[]', {})
+
+    now[0] += 31
+    assert cache.get('page', 1) is None
+    assert len(cache) == 0
+
+
+def test_entry_is_dropped_on_version_change():
+    cache = CatalogCache(ttl_seconds=30, max_entries=10, max_bytes=1024)
+    cache.put('page', 1, '[]', {})
+
+    assert cache.get('page', 2) is None
+    assert cache.get('page', 1) is None
+
+
+def test_size_bounds_evict_least_recently_used():
+    cache = CatalogCache(ttl_seconds=30, max_entries=2, max_bytes=10)
+    cache.put('a', 1, 'xxxx', {})
+    cache.put('b', 1, 'yyyy', {})
+    cache.get('a', 1)
+    cache.put('c', 1, 'zz', {})
+
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) == ('xxxx', {})
+
+    cache.put('d', 1, 'wwwwwwww', {})
+    assert len(cache) == 1
+    cache.put('too-big', 1, 'x' * 11, {})
+    assert cache.get('too-big', 1) is None
+
+
+def test_version_bump_targets_meta_table(monkeypatch):
+    monkeypatch.delenv('CATALOG_META_TABLE_NAME', raising=False)
+    assert catalog_version_bump() is None
+
+    monkeypatch.setenv('CATALOG_META_TABLE_NAME', 'catalog_meta')
+    update = catalog_version_bump()['Update']
+    assert update['TableName'] == 'catalog_meta'
+    assert update['UpdateExpression'] == 'ADD #version :one'
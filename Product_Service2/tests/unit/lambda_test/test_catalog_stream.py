@@ -0,0 +1,190 @@
+import json
+import os
+import pytest
+from decimal import Decimal
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+import clients
+from product_service.lambda_func import catalog_stream, catalog_view, product_by_id
+
+EVENTS_DIR = os.path.join(os.path.dirname(__file__), 'events')
+PRODUCT_ID = '7567ec4b-b10c-48c5-9345-fc73c48a80aa'
+REMOVED_ID = '7567ec4b-b10c-48c5-9345-fc73c48a80a1'
+
+
+def load_event(name):
+    with open(os.path.join(EVENTS_DIR, name)) as f:
+        return json.load(f)
+
+
+class FakeCatalogClient:
+    """Applies the handler's SET/REMOVE updates and sequence conditions to a dict"""
+
+    def __init__(self):
+        self.items = {}
+        self.calls = 0
+
+    def update_item(self, TableName, Key, UpdateExpression, ConditionExpression,
+                    ExpressionAttributeNames, ExpressionAttributeValues):
+        self.calls += 1
+        item = self.items.get(Key['id'], dict(Key))
+        seq_name = ExpressionAttributeNames['#seq']
+        if seq_name in item and item[seq_name] >= ExpressionAttributeValues[':seq']:
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+
+        set_part, _, remove_part = UpdateExpression[len('SET '):].partition(' REMOVE ')
+        for clause in set_part.split(', '):
+            name, value = clause.split(' = ')
+            item[ExpressionAttributeNames[name]] = ExpressionAttributeValues[value]
+        for name in filter(None, remove_part.split(', ')):
+            item.pop(ExpressionAttributeNames[name], None)
+        self.items[Key['id']] = item
+
+
+@pytest.fixture
+def catalog(dynamodb, monkeypatch):
+    monkeypatch.setenv('CATALOG_TABLE_NAME', 'catalog')
+    dynamodb.meta.client = FakeCatalogClient()
+    return dynamodb.meta.client
+
+
+def test_stream_records_build_joined_view_items(catalog):
+    assert catalog_stream.handler(load_event('catalog_stream.json'), {}) == {'batchItemFailures': []}
+    assert catalog_stream.handler(load_event('stock_stream.json'), {}) == {'batchItemFailures': []}
+
+    item = catalog.items[PRODUCT_ID]
+    assert item['title'] == 'ProductOne'
+    assert item['price'] == Decimal('19.5')
+    assert item['count'] == 7
+    # Removed by the MODIFY record
+    assert 'description' not in item
+    # Product removed, stock removed: the item is a tombstone
+    assert catalog.items[REMOVED_ID]['deleted'] is True
+    assert catalog.items[REMOVED_ID]['count'] == 0
+    assert 'title' not in catalog.items[REMOVED_ID]
+
+
+def test_records_are_coalesced_to_one_write_per_item(catalog):
+    changes = catalog_stream.coalesce(load_event('stock_stream.json')['Records'])
+
+    assert [(change.kind, change.product_id) for change in changes] == [
+        ('stock', PRODUCT_ID), ('stock', REMOVED_ID)
+    ]
+    assert changes[0].new_image['count'] == 7
+    assert changes[0].first_sequence == 222100000000009876543201
+
+    catalog_stream.handler(load_event('stock_stream.json'), {})
+    assert catalog.calls == 2
+
+
+def test_replayed_and_out_of_order_batches_are_no_ops(catalog):
+    catalog_stream.handler(load_event('stock_stream.json'), {})
+    catalog_stream.handler(load_event('catalog_stream.json'), {})
+    expected = json.loads(json.dumps(catalog.items, default=str))
+
+    # Lambda redelivers a batch after a partial failure
+    assert catalog_stream.handler(load_event('catalog_stream.json'), {}) == {'batchItemFailures': []}
+    first_record_only = {'Records': load_event('catalog_stream.json')['Records'][:1]}
+    catalog_stream.handler(first_record_only, {})
+
+    assert json.loads(json.dumps(catalog.items, default=str)) == expected
+
+
+def test_failed_write_reports_earliest_record_of_failed_item(catalog, monkeypatch):
+    update_item = catalog.update_item
+
+    def flaky_update_item(**kwargs):
+        if kwargs['Key']['id'] == REMOVED_ID:
+            raise ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'UpdateItem')
+        return update_item(**kwargs)
+
+    monkeypatch.setattr(catalog, 'update_item', flaky_update_item)
+
+    response = catalog_stream.handler(load_event('catalog_stream.json'), {})
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': '111300000000001234567803'}]}
+    assert PRODUCT_ID in catalog.items
+
+
+def test_catalog_version_is_bumped_after_the_view_is_updated(catalog, monkeypatch):
+    monkeypatch.setenv('CATALOG_META_TABLE_NAME', 'catalog-meta')
+    monkeypatch.setenv('CATALOG_VIEW_READS', 'true')
+    update_item = catalog.update_item
+    bumps = []
+
+    def recording_update_item(**kwargs):
+        if kwargs['TableName'] == 'catalog-meta':
+            # Pages cached under the new version must already see the change
+            bumps.append(dict(catalog.items))
+            return
+        return update_item(**kwargs)
+
+    monkeypatch.setattr(catalog, 'update_item', recording_update_item)
+
+    catalog_stream.handler(load_event('stock_stream.json'), {})
+    assert [bump[PRODUCT_ID]['count'] for bump in bumps] == [7]
+
+    # A replay changes nothing in the view, so cached pages stay valid
+    catalog_stream.handler(load_event('stock_stream.json'), {})
+    assert len(bumps) == 1
+
+    monkeypatch.setenv('CATALOG_VIEW_READS', 'false')
+    catalog_stream.handler(load_event('catalog_stream.json'), {})
+    assert len(bumps) == 1
+
+
+def test_sequence_numbers_are_stored_as_fixed_width_strings(catalog):
+    change = catalog_stream.Change('stock', PRODUCT_ID)
+    change.add({'eventName': 'MODIFY', 'dynamodb': {'SequenceNumber': '9' * 40, 'NewImage': {'count': {'N': '1'}}}})
+
+    update = catalog_stream.build_update(change)
+
+    # 40 digits do not fit a DynamoDB Number
+    assert update['ExpressionAttributeValues'][':seq'] == '9' * 40
+    # Padding keeps lexical order numeric when the digit count grows
+    assert catalog_stream.format_sequence(10 ** 21 - 1) < catalog_stream.format_sequence(10 ** 21)
+    assert catalog_stream.format_sequence(0) < catalog_stream.format_sequence(1)
+
+
+def test_snapshot_never_overwrites_streamed_changes(catalog):
+    catalog_stream.handler(load_event('stock_stream.json'), {})
+
+    catalog_stream.apply_change(catalog, catalog_stream.snapshot_change(
+        'stock', {'product_id': PRODUCT_ID, 'count': Decimal('99')}
+    ))
+    catalog_stream.apply_change(catalog, catalog_stream.snapshot_change(
+        'product', {'id': PRODUCT_ID, 'title': 'ProductOne', 'price': Decimal('24')}
+    ))
+
+    assert catalog.items[PRODUCT_ID]['count'] == 7
+    assert catalog.items[PRODUCT_ID]['price'] == Decimal('24')
+
+
+def test_view_reads_use_a_single_get_item(monkeypatch):
+    monkeypatch.setenv('CATALOG_TABLE_NAME', 'catalog')
+    monkeypatch.setenv('CATALOG_VIEW_READS', 'true')
+    resource = MagicMock()
+    resource.Table.return_value.get_item.return_value = {'Item': {
+        'id': '1', 'title': 'A', 'price': Decimal('10'), 'count': Decimal('4'),
+        'catalog': 'products', 'title_lower': 'a',
+        'product_seq': Decimal('5'), 'stock_seq': Decimal('6')
+    }}
+    clients.set_resource('dynamodb', resource)
+    try:
+        response = product_by_id.handler({'pathParameters': {'productId': '1'}}, {})
+    finally:
+        clients.reset()
+
+    assert json.loads(response['body']) == {'id': '1', 'title': 'A', 'price': 10, 'count': 4}
+    resource.Table.assert_called_once_with('catalog')
+    resource.batch_get_item.assert_not_called()
+
+
+def test_stock_only_and_deleted_items_are_not_products():
+    items = [
+        {'id': '1', 'count': Decimal('3'), 'stock_seq': Decimal('1')},
+        {'id': '2', 'product_seq': Decimal('2'), 'deleted': True},
+        {'id': '3', 'title': 'C', 'product_seq': Decimal('3')}
+    ]
+
+    assert catalog_view.to_products(items) == [{'id': '3', 'title': 'C', 'count': 0}]
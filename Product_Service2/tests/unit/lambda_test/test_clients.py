@@ -0,0 +1,38 @@
+from unittest.mock import MagicMock, patch
+import pytest
+import clients
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(monkeypatch):
+    monkeypatch.setenv('REGION', 'eu-west-1')
+    clients.reset()
+    yield
+    clients.reset()
+
+
+def test_resource_is_created_once_per_container():
+    with patch.object(clients.boto3, 'resource') as resource_factory:
+        first = clients.get_dynamodb_resource()
+        second = clients.get_resource('dynamodb')
+
+    assert first is second
+    resource_factory.assert_called_once_with(
+        'dynamodb', region_name='eu-west-1', config=clients.CLIENT_CONFIG
+    )
+
+
+def test_client_config_is_tuned():
+    assert clients.CLIENT_CONFIG.tcp_keepalive is True
+    assert clients.CLIENT_CONFIG.retries['mode'] == 'adaptive'
+    assert clients.CLIENT_CONFIG.max_pool_connections >= 10
+
+
+def test_stubs_can_be_injected():
+    stub = MagicMock()
+    clients.set_client('s3', stub)
+
+    with patch.object(clients.boto3, 'client') as client_factory:
+        assert clients.get_client('s3') is stub
+
+    client_factory.assert_not_called()
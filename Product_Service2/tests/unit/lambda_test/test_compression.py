@@ -0,0 +1,59 @@
+import base64
+import gzip
+import pytest
+import compression
+from compression import compress_body, negotiate_encoding
+from serialization import iter_dumps
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('gzip;q=0', None),
+    ('deflate, *;q=0.5', 'gzip'),
+])
+def test_negotiate_gzip_only(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, 'brotli', None)
+    assert negotiate_encoding(header) == expected
+
+
+def test_brotli_preferred_when_available():
+    if compression.brotli is None:
+        pytest.skip('brotli is not installed')
+    assert negotiate_encoding('gzip, deflate, br') == 'br'
+    assert negotiate_encoding('gzip;q=1, br;q=0.5') == 'gzip'
+
+
+def test_large_body_is_gzipped_and_base64_encoded(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    body = '[' + ','.join('{"id":"%d","title":"Product"}' % i for i in range(500)) + ']'
+
+    encoded, headers, is_base64 = compress_body(body, {'ETag': '"x"'}, 'gzip')
+
+    assert is_base64 is True
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['Vary'] == 'Accept-Encoding'
+    assert headers['ETag'] == '"x"'
+    assert gzip.decompress(base64.b64decode(encoded)).decode('utf-8') == body
+
+
+def test_small_body_is_left_alone():
+    body, headers, is_base64 = compress_body('{"id":"1"}', {}, 'gzip, br')
+
+    assert body == '{"id":"1"}'
+    assert 'Content-Encoding' not in headers
+    assert is_base64 is False
+
+
+def test_iter_dumps_chunks_are_compressed_without_joining(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    products = [{'id': str(i), 'title': 'Product'} for i in range(2000)]
+    chunks = list(iter_dumps(products, chunk_size=100))
+
+    encoded, headers, is_base64 = compress_body(chunks, {}, 'gzip')
+
+    assert is_base64 is True
+    assert gzip.decompress(base64.b64decode(encoded)).decode('utf-8') == ''.join(chunks)
+    # Without a coding the client accepts, the chunks are joined into one body
+    assert compress_body(chunks, {}, None)[0] == ''.join(chunks)
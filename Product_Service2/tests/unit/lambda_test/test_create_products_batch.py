@@ -0,0 +1,103 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from product_service.lambda_func import create_products_batch
+
+
+@pytest.fixture
+def dynamodb(dynamodb, monkeypatch):
+    monkeypatch.setenv('CATALOG_META_TABLE_NAME', 'catalog_meta')
+    return dynamodb
+
+
+def product(index):
+    return {'title': f'Product {index}', 'description': 'Description', 'price': 10 + index, 'count': index}
+
+
+def event(body):
+    return {'body': json.dumps(body)}
+
+
+def context():
+    return MagicMock(aws_request_id='request-1')
+
+
+def test_products_are_packed_into_transactions_within_the_item_limit(dynamodb):
+    client = dynamodb.meta.client
+
+    response = create_products_batch.handler(event([product(i) for i in range(120)]), context())
+
+    assert response['statusCode'] == 201
+    body = json.loads(response['body'])
+    assert body['created'] == 120 and body['failed'] == 0
+    sizes = sorted(len(call.kwargs['TransactItems']) for call in client.transact_write_items.call_args_list)
+    assert sizes == [40, 100, 100]
+    # Results follow the request order
+    assert [result['index'] for result in body['results']] == list(range(120))
+    assert body['results'][5]['product']['title'] == 'Product 5'
+    # A single catalog version bump for the whole batch
+    client.update_item.assert_called_once()
+    assert client.update_item.call_args.kwargs['TableName'] == 'catalog_meta'
+
+
+def test_invalid_products_are_reported_and_valid_ones_written(dynamodb):
+    client = dynamodb.meta.client
+    products = [product(1), {'title': 'No price', 'description': 'x', 'count': 1}, 'oops', product(2)]
+
+    response = create_products_batch.handler(event({'products': products}), context())
+
+    assert response['statusCode'] == 207
+    results = json.loads(response['body'])['results']
+    assert [result['status'] for result in results] == ['created', 'failed', 'failed', 'created']
+    assert results[1]['message'] == 'Missing required field: price'
+    assert len(client.transact_write_items.call_args.kwargs['TransactItems']) == 4
+
+
+def test_cancelled_chunk_fails_only_its_products(dynamodb, monkeypatch):
+    monkeypatch.setattr(create_products_batch, 'PRODUCTS_PER_TRANSACTION', 2)
+    client = dynamodb.meta.client
+    calls = []
+
+    def transact_write_items(TransactItems):
+        calls.append(TransactItems)
+        if len(calls) == 1:
+            raise ClientError({
+                'Error': {'Code': 'TransactionCanceledException', 'Message': 'cancelled'},
+                'CancellationReasons': [
+                    {'Code': 'None'}, {'Code': 'None'},
+                    {'Code': 'ConditionalCheckFailed'}, {'Code': 'None'}
+                ]
+            }, 'TransactWriteItems')
+
+    client.transact_write_items.side_effect = transact_write_items
+    # Run chunks in order so the first call is the first chunk
+    monkeypatch.setattr(create_products_batch, 'BATCH_WRITE_MAX_WORKERS', 1)
+
+    response = create_products_batch.handler(event([product(i) for i in range(4)]), context())
+
+    results = json.loads(response['body'])['results']
+    assert response['statusCode'] == 207
+    assert [result['status'] for result in results] == ['failed', 'failed', 'created', 'created']
+    assert results[0]['message'] == 'Transaction cancelled by another product in the same chunk'
+    assert results[1]['message'] == 'Transaction cancelled: ConditionalCheckFailed'
+
+
+def test_chunk_size_default_fills_a_transaction():
+    assert create_products_batch.PRODUCTS_PER_TRANSACTION * create_products_batch.ITEMS_PER_PRODUCT == 100
+
+
+@pytest.mark.parametrize('body', [[], {'products': []}, {'title': 'single'}])
+def test_body_must_be_a_non_empty_list(dynamodb, body):
+    response = create_products_batch.handler(event(body), context())
+
+    assert response['statusCode'] == 400
+    dynamodb.meta.client.transact_write_items.assert_not_called()
+
+
+def test_too_many_products_is_400(dynamodb, monkeypatch):
+    monkeypatch.setattr(create_products_batch, 'MAX_BATCH_PRODUCTS', 3)
+
+    response = create_products_batch.handler(event([product(i) for i in range(4)]), context())
+
+    assert response['statusCode'] == 400
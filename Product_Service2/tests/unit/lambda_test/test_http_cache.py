@@ -0,0 +1,51 @@
+import pytest
+from http_cache import apply_conditional, compute_etag, etag_matches, get_header
+
+
+def test_etag_is_strong_and_content_based():
+    etag = compute_etag('[{"id":"1"}]')
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == compute_etag('[{"id":"1"}]')
+    assert etag != compute_etag('[{"id":"2"}]')
+    # Chunks from iter_dumps hash the same as the joined body
+    assert etag == compute_etag(['[', '{"id":"1"}', ']'])
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", "abc"', True),
+    ('*', True),
+    ('"other"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+def test_matching_request_becomes_304_without_body():
+    etag = compute_etag('[]')
+
+    status, body, headers = apply_conditional(200, '[]', {}, etag)
+
+    assert (status, body) == (304, '')
+    assert headers['ETag'] == etag
+    assert 'Cache-Control' in headers
+
+
+def test_compressed_representations_get_their_own_etag():
+    etag = compute_etag('[]')
+
+    status, _, headers = apply_conditional(200, '[]', {}, etag, 'gzip')
+
+    assert status == 200
+    assert headers['ETag'] == etag[:-1] + '-gzip"'
+
+
+def test_errors_are_not_tagged():
+    assert apply_conditional(404, '{}', {}, '*') == (404, '{}', {})
+
+
+def test_header_lookup_is_case_insensitive():
+    assert get_header({'headers': {'if-none-match': '"a"'}}, 'If-None-Match') == '"a"'
+    assert get_header({'headers': None}, 'If-None-Match') is None
@@ -0,0 +1,149 @@
+import json
+import time
+import pytest
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from product_service.lambda_func import create_product, idempotency
+
+
+class TransactionCanceledException(ClientError):
+    pass
+
+
+PRODUCT = {'title': 'Lamp', 'description': 'Desk lamp', 'price': 25, 'count': 3}
+
+
+@pytest.fixture
+def dynamodb(dynamodb, monkeypatch):
+    monkeypatch.setenv('IDEMPOTENCY_TABLE_NAME', 'idempotency')
+    monkeypatch.delenv('CATALOG_META_TABLE_NAME', raising=False)
+    dynamodb.meta.client.exceptions.TransactionCanceledException = TransactionCanceledException
+    dynamodb.Table.return_value.get_item.return_value = {}
+    return dynamodb
+
+
+def event(body, key='retry-key-1'):
+    return {'body': json.dumps(body), 'headers': {'idempotency-key': key}}
+
+
+def context():
+    return MagicMock(aws_request_id='request-1')
+
+
+def stored_record(body=PRODUCT, status_code=201, response=None):
+    return {
+        'key': 'retry-key-1',
+        'fingerprint': idempotency.request_fingerprint(body),
+        'status_code': status_code,
+        'body': response or json.dumps({'message': 'Product created successfully', 'product': {'id': 'abc'}}),
+        'expires_at': int(time.time()) + 60
+    }
+
+
+def test_first_request_stores_response_in_the_same_transaction(dynamodb):
+    response = create_product.handler(event(PRODUCT), context())
+
+    assert response['statusCode'] == 201
+    items = dynamodb.meta.client.transact_write_items.call_args.kwargs['TransactItems']
+    assert [item['Put']['TableName'] for item in items] == ['products', 'stocks', 'idempotency']
+    record = items[-1]['Put']
+    assert record['Item']['key'] == 'retry-key-1'
+    assert record['Item']['status_code'] == 201
+    assert record['Item']['body'] == response['body']
+    assert 'attribute_not_exists(#key)' in record['ConditionExpression']
+    dynamodb.Table.return_value.get_item.assert_called_once_with(
+        Key={'key': 'retry-key-1'}, ConsistentRead=True
+    )
+
+
+def test_retry_replays_stored_response_without_writing(dynamodb):
+    dynamodb.Table.return_value.get_item.return_value = {'Item': stored_record()}
+
+    # Same body with different key order and whitespace
+    retry = {'body': '{"count": 3, "price": 25, "description": "Desk lamp", "title": "Lamp"}',
+             'headers': {'Idempotency-Key': 'retry-key-1'}}
+    response = create_product.handler(retry, context())
+
+    assert response['statusCode'] == 201
+    assert response['headers']['Idempotent-Replayed'] == 'true'
+    assert json.loads(response['body'])['product']['id'] == 'abc'
+    dynamodb.meta.client.transact_write_items.assert_not_called()
+
+
+def test_key_reused_with_different_body_is_422(dynamodb):
+    dynamodb.Table.return_value.get_item.return_value = {'Item': stored_record()}
+
+    response = create_product.handler(event({**PRODUCT, 'price': 30}), context())
+
+    assert response['statusCode'] == 422
+    dynamodb.meta.client.transact_write_items.assert_not_called()
+
+
+def test_expired_record_is_ignored(dynamodb):
+    record = stored_record()
+    record['expires_at'] = int(time.time()) - 1
+    dynamodb.Table.return_value.get_item.return_value = {'Item': record}
+
+    response = create_product.handler(event(PRODUCT), context())
+
+    assert response['statusCode'] == 201
+    dynamodb.meta.client.transact_write_items.assert_called_once()
+
+
+def test_concurrent_duplicate_replays_the_winner(dynamodb):
+    winner = stored_record()
+    dynamodb.Table.return_value.get_item.side_effect = [{}, {'Item': winner}]
+    dynamodb.meta.client.transact_write_items.side_effect = TransactionCanceledException({
+        'Error': {'Code': 'TransactionCanceledException', 'Message': 'cancelled'},
+        'CancellationReasons': [{'Code': 'None'}, {'Code': 'None'}, {'Code': 'ConditionalCheckFailed'}]
+    }, 'TransactWriteItems')
+
+    response = create_product.handler(event(PRODUCT), context())
+
+    assert response['statusCode'] == 201
+    assert response['body'] == winner['body']
+    assert response['headers']['Idempotent-Replayed'] == 'true'
+
+
+def test_duplicate_still_in_flight_is_a_retryable_409(dynamodb):
+    dynamodb.meta.client.transact_write_items.side_effect = TransactionCanceledException({
+        'Error': {'Code': 'TransactionCanceledException', 'Message': 'cancelled'},
+        'CancellationReasons': [{'Code': 'None'}, {'Code': 'None'}, {'Code': 'TransactionConflict'}]
+    }, 'TransactWriteItems')
+
+    response = create_product.handler(event(PRODUCT), context())
+
+    assert response['statusCode'] == 409
+    assert response['headers']['Retry-After'] == '1'
+    # The record was looked up again in case the other request had committed meanwhile
+    assert dynamodb.Table.return_value.get_item.call_count == 2
+
+
+def test_duplicate_committed_during_the_conflict_is_replayed(dynamodb):
+    winner = stored_record()
+    dynamodb.Table.return_value.get_item.side_effect = [{}, {'Item': winner}]
+    dynamodb.meta.client.transact_write_items.side_effect = TransactionCanceledException({
+        'Error': {'Code': 'TransactionCanceledException', 'Message': 'cancelled'},
+        'CancellationReasons': [{'Code': 'None'}, {'Code': 'None'}, {'Code': 'TransactionConflict'}]
+    }, 'TransactWriteItems')
+
+    response = create_product.handler(event(PRODUCT), context())
+
+    assert response['statusCode'] == 201
+    assert response['body'] == winner['body']
+
+
+def test_invalid_key_is_400(dynamodb):
+    response = create_product.handler(event(PRODUCT, key='x' * 256), context())
+
+    assert response['statusCode'] == 400
+    dynamodb.meta.client.transact_write_items.assert_not_called()
+
+
+def test_requests_without_key_are_unchanged(dynamodb):
+    response = create_product.handler({'body': json.dumps(PRODUCT)}, context())
+
+    assert response['statusCode'] == 201
+    items = dynamodb.meta.client.transact_write_items.call_args.kwargs['TransactItems']
+    assert len(items) == 2
+    dynamodb.Table.return_value.get_item.assert_not_called()
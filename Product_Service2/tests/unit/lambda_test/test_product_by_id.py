@@ -0,0 +1,118 @@
+import json
+import pytest
+from decimal import Decimal
+import batch_get
+from product_service.lambda_func import product_by_id
+
+
+@pytest.fixture
+def dynamodb(dynamodb, monkeypatch):
+    monkeypatch.setattr(batch_get.time, 'sleep', lambda seconds: None)
+    return dynamodb
+
+
+def event(product_id, **query):
+    return {'pathParameters': {'productId': product_id}, 'queryStringParameters': query or None}
+
+
+def test_product_and_stock_in_one_round_trip(dynamodb):
+    dynamodb.batch_get_item.return_value = {
+        'Responses': {
+            'products': [{'id': '1', 'title': 'A', 'price': Decimal('10')}],
+            'stocks': [{'count': Decimal('4')}]
+        }
+    }
+
+    response = product_by_id.handler(event('1'), {})
+
+    assert response['statusCode'] == 200
+    assert json.loads(response['body']) == {'id': '1', 'title': 'A', 'price': 10, 'count': 4}
+    dynamodb.batch_get_item.assert_called_once()
+    request_items = dynamodb.batch_get_item.call_args.kwargs['RequestItems']
+    assert request_items['products']['Keys'] == [{'id': '1'}]
+    assert request_items['stocks']['Keys'] == [{'product_id': '1'}]
+
+
+def test_missing_product_is_404(dynamodb):
+    dynamodb.batch_get_item.return_value = {'Responses': {'products': [], 'stocks': []}}
+
+    response = product_by_id.handler(event('999'), {})
+
+    assert response['statusCode'] == 404
+    assert json.loads(response['body'])['message'] == 'Product not found'
+
+
+def test_unprocessed_keys_are_retried(dynamodb):
+    stocks_request = {'Keys': [{'product_id': '1'}]}
+    dynamodb.batch_get_item.side_effect = [
+        {'Responses': {'products': [{'id': '1'}]}, 'UnprocessedKeys': {'stocks': stocks_request}},
+        {'Responses': {'stocks': [{'count': Decimal('2')}]}, 'UnprocessedKeys': {}}
+    ]
+
+    response = product_by_id.handler(event('1'), {})
+
+    assert json.loads(response['body']) == {'id': '1', 'count': 2}
+    assert dynamodb.batch_get_item.call_args_list[1].kwargs == {'RequestItems': {'stocks': stocks_request}}
+
+
+def test_fields_project_product_and_skip_stock_lookup(dynamodb):
+    dynamodb.batch_get_item.return_value = {'Responses': {'products': [{'id': '1', 'title': 'A'}]}}
+
+    response = product_by_id.handler(event('1', fields='title'), {})
+
+    assert response['statusCode'] == 200
+    assert json.loads(response['body']) == {'id': '1', 'title': 'A'}
+    dynamodb.batch_get_item.assert_called_once_with(RequestItems={
+        'products': {
+            'Keys': [{'id': '1'}],
+            'ProjectionExpression': '#f0, #f1',
+            'ExpressionAttributeNames': {'#f0': 'id', '#f1': 'title'}
+        }
+    })
+
+
+def fake_batch_get_item(existing):
+    def batch_get_item(RequestItems):
+        responses = {}
+        for table_name, request in RequestItems.items():
+            key = 'id' if table_name == 'products' else 'product_id'
+            found = [k[key] for k in request['Keys'] if k[key] in existing]
+            if table_name == 'products':
+                responses[table_name] = [{'id': product_id, 'title': f'T{product_id}'} for product_id in found]
+            else:
+                responses[table_name] = [{'product_id': product_id, 'count': Decimal('1')} for product_id in found]
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+    return batch_get_item
+
+
+def test_batch_lookup_keeps_request_order_and_marks_missing(dynamodb):
+    dynamodb.meta.client.batch_get_item.side_effect = fake_batch_get_item({'a', 'c'})
+
+    products = product_by_id.get_products_by_ids(dynamodb, ['c', 'missing', 'a', 'c'])
+
+    assert [product and product['id'] for product in products] == ['c', None, 'a', 'c']
+    assert products[0] == {'id': 'c', 'title': 'Tc', 'count': 1}
+
+
+def test_batch_lookup_chunks_to_100_keys_per_request(dynamodb):
+    ids = [str(i) for i in range(100)]
+    dynamodb.meta.client.batch_get_item.side_effect = fake_batch_get_item(set(ids))
+
+    products = product_by_id.get_products_by_ids(dynamodb, ids)
+
+    calls = dynamodb.meta.client.batch_get_item.call_args_list
+    assert len(calls) == 2
+    for c in calls:
+        assert sum(len(request['Keys']) for request in c.kwargs['RequestItems'].values()) <= 100
+    assert [product['id'] for product in products] == ids
+
+
+def test_batch_lookup_gives_up_on_persistent_unprocessed_keys(dynamodb, monkeypatch):
+    monkeypatch.setattr(batch_get, 'BATCH_GET_MAX_ATTEMPTS', 3)
+    dynamodb.meta.client.batch_get_item.side_effect = lambda RequestItems: {
+        'Responses': {}, 'UnprocessedKeys': RequestItems
+    }
+
+    with pytest.raises(batch_get.UnprocessedKeysError):
+        product_by_id.get_products_by_ids(dynamodb, ['a'])
+    assert dynamodb.meta.client.batch_get_item.call_count == 3
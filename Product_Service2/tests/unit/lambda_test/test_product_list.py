@@ -0,0 +1,310 @@
+import json
+import pytest
+from decimal import Decimal
+from unittest.mock import MagicMock
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeSerializer
+from product_service.lambda_func import product_list
+
+
+@pytest.fixture
+def dynamodb(dynamodb):
+    product_list.catalog_cache.clear()
+    yield dynamodb
+    product_list.catalog_cache.clear()
+
+
+def test_cursor_round_trip():
+    key = {'id': 'abc-123'}
+    cursor = product_list.encode_cursor(key)
+    assert product_list.decode_cursor(cursor) == key
+    assert product_list.encode_cursor(None) is None
+
+
+def test_invalid_cursor_returns_400(dynamodb):
+    event = {'queryStringParameters': {'cursor': 'not-a-cursor!'}}
+
+    response = product_list.handler(event, {})
+
+    assert response['statusCode'] == 400
+    dynamodb.Table.return_value.scan.assert_not_called()
+
+
+@pytest.mark.parametrize('limit', ['0', '101', 'ten'])
+def test_invalid_limit_returns_400(dynamodb, limit):
+    response = product_list.handler({'queryStringParameters': {'limit': limit}}, {})
+    assert response['statusCode'] == 400
+
+
+def test_list_products_page_joins_only_page_stocks(dynamodb):
+    # ARRANGE
+    table = dynamodb.Table.return_value
+    table.scan.return_value = {
+        'Items': [{'id': '1', 'title': 'A', 'price': 10}, {'id': '2', 'title': 'B', 'price': 20}],
+        'LastEvaluatedKey': {'id': '2'}
+    }
+    dynamodb.batch_get_item.return_value = {
+        'Responses': {'stocks': [{'product_id': '1', 'count': 3}]},
+        'UnprocessedKeys': {}
+    }
+    start_cursor = product_list.encode_cursor({'id': '0'})
+    event = {'queryStringParameters': {'limit': '2', 'cursor': start_cursor}}
+
+    # ACT
+    response = product_list.handler(event, {})
+
+    # ASSERT
+    assert response['statusCode'] == 200
+    table.scan.assert_called_once_with(Limit=2, ExclusiveStartKey={'id': '0'})
+    dynamodb.batch_get_item.assert_called_once_with(RequestItems={
+        'stocks': {'Keys': [{'product_id': '1'}, {'product_id': '2'}]}
+    })
+    body = json.loads(response['body'])
+    assert [product['count'] for product in body] == [3, 0]
+    assert product_list.decode_cursor(response['headers']['X-Next-Cursor']) == {'id': '2'}
+
+
+def test_last_page_has_no_cursor(dynamodb):
+    dynamodb.Table.return_value.scan.return_value = {'Items': []}
+
+    response = product_list.handler({'queryStringParameters': None}, {})
+
+    assert response['statusCode'] == 200
+    assert json.loads(response['body']) == []
+    assert 'X-Next-Cursor' not in response['headers']
+    dynamodb.batch_get_item.assert_not_called()
+
+
+def test_full_catalog_uses_parallel_segmented_scans(dynamodb, monkeypatch):
+    # ARRANGE
+    monkeypatch.setattr(product_list, 'PRODUCTS_SCAN_SEGMENTS', 3)
+    monkeypatch.setattr(product_list, 'STOCKS_SCAN_SEGMENTS', 2)
+    client = dynamodb.meta.client
+
+    def scan(TableName, Segment, TotalSegments, **kwargs):
+        if TableName == 'products':
+            if Segment == 0 and 'ExclusiveStartKey' not in kwargs:
+                return {'Items': [{'id': '0a'}], 'LastEvaluatedKey': {'id': '0a'}}
+            return {'Items': [{'id': f'{Segment}b', 'price': Decimal('5')}]}
+        return {'Items': [{'product_id': f'{Segment}b', 'count': Decimal('7')}]}
+
+    client.scan.side_effect = scan
+
+    # ACT
+    response = product_list.handler({'queryStringParameters': {'all': 'true'}}, {})
+
+    # ASSERT
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert [product['id'] for product in body] == ['0a', '0b', '1b', '2b']
+    assert [product['count'] for product in body] == [0, 7, 7, 0]
+    segments = {(c.kwargs['TableName'], c.kwargs['Segment'], c.kwargs['TotalSegments'])
+                for c in client.scan.call_args_list}
+    assert segments == {('products', 0, 3), ('products', 1, 3), ('products', 2, 3),
+                        ('stocks', 0, 2), ('stocks', 1, 2)}
+
+
+def test_full_catalog_over_the_size_limit_is_413(dynamodb, monkeypatch):
+    monkeypatch.setattr(product_list, 'FULL_CATALOG_MAX_BYTES', 200)
+    products = [{'id': f'id-{index}', 'title': 'Product', 'price': Decimal('5')} for index in range(10)]
+    dynamodb.meta.client.scan.side_effect = lambda TableName, **kwargs: {
+        'Items': products if TableName == 'products' else []
+    }
+
+    response = product_list.handler({'queryStringParameters': {'all': 'true'}}, {})
+
+    assert response['statusCode'] == 413
+    assert 'limit and cursor' in json.loads(response['body'])['message']
+    assert len(product_list.catalog_cache._entries) == 0
+
+
+def test_warm_invocation_served_from_cache_until_version_changes(dynamodb, monkeypatch):
+    # ARRANGE
+    monkeypatch.setenv('CATALOG_META_TABLE_NAME', 'catalog_meta')
+    products_table, meta_table = MagicMock(), MagicMock()
+    dynamodb.Table.side_effect = lambda name: meta_table if name == 'catalog_meta' else products_table
+    products_table.scan.return_value = {'Items': [{'id': '1', 'title': 'A', 'price': 10}]}
+    dynamodb.batch_get_item.return_value = {'Responses': {'stocks': [{'product_id': '1', 'count': 2}]}}
+    meta_table.get_item.return_value = {'Item': {'id': 'catalog', 'version': Decimal('4')}}
+    event = {'queryStringParameters': {'limit': '10'}}
+
+    # ACT
+    first = product_list.handler(event, {})
+    second = product_list.handler(event, {})
+    meta_table.get_item.return_value = {'Item': {'id': 'catalog', 'version': Decimal('5')}}
+    third = product_list.handler(event, {})
+
+    # ASSERT
+    assert first['body'] == second['body'] == third['body']
+    assert products_table.scan.call_count == 2
+
+
+def test_unchanged_page_returns_304(dynamodb):
+    dynamodb.Table.return_value.scan.return_value = {'Items': [{'id': '1', 'title': 'A', 'price': 10}]}
+    dynamodb.batch_get_item.return_value = {'Responses': {'stocks': []}}
+
+    first = product_list.handler({'queryStringParameters': None}, {})
+    etag = first['headers']['ETag']
+    second = product_list.handler({'queryStringParameters': None, 'headers': {'If-None-Match': etag}}, {})
+
+    assert first['statusCode'] == 200
+    assert second['statusCode'] == 304
+    assert second['body'] == ''
+    assert second['headers']['ETag'] == etag
+
+
+def test_compressed_pages_have_their_own_etag(dynamodb):
+    items = [{'id': str(i), 'title': 'Product', 'price': 10} for i in range(100)]
+    dynamodb.Table.return_value.scan.return_value = {'Items': items}
+    dynamodb.batch_get_item.return_value = {'Responses': {'stocks': []}}
+
+    plain = product_list.handler({'queryStringParameters': None}, {})
+    gzipped = product_list.handler({'queryStringParameters': None, 'headers': {'Accept-Encoding': 'gzip'}}, {})
+    revalidated = product_list.handler({'queryStringParameters': None, 'headers': {
+        'Accept-Encoding': 'gzip', 'If-None-Match': gzipped['headers']['ETag']
+    }}, {})
+
+    assert gzipped['headers']['Content-Encoding'] == 'gzip'
+    assert gzipped['headers']['ETag'] == plain['headers']['ETag'][:-1] + '-gzip"'
+    assert revalidated['statusCode'] == 304
+    assert revalidated['headers']['Vary'] == 'Accept-Encoding'
+    # The identity tag does not validate the gzip representation
+    mismatched = product_list.handler({'queryStringParameters': None, 'headers': {
+        'Accept-Encoding': 'gzip', 'If-None-Match': plain['headers']['ETag']
+    }}, {})
+    assert mismatched['statusCode'] == 200
+
+
+def test_fields_project_scan_and_skip_stock_lookup(dynamodb):
+    table = dynamodb.Table.return_value
+    table.scan.return_value = {'Items': [{'id': '1', 'title': 'A', 'price': Decimal('10')}]}
+
+    response = product_list.handler({'queryStringParameters': {'fields': 'title,price'}}, {})
+
+    assert response['statusCode'] == 200
+    table.scan.assert_called_once_with(
+        Limit=product_list.DEFAULT_PAGE_LIMIT,
+        ProjectionExpression='#f0, #f1, #f2',
+        ExpressionAttributeNames={'#f0': 'id', '#f1': 'title', '#f2': 'price'}
+    )
+    dynamodb.batch_get_item.assert_not_called()
+    assert json.loads(response['body']) == [{'id': '1', 'title': 'A', 'price': 10}]
+
+
+@pytest.mark.parametrize('query', [
+    {'minPrice': 'cheap'},
+    {'minPrice': '10', 'maxPrice': '5'},
+    {'sort': 'colour'},
+    {'titlePrefix': 'Alm', 'sort': 'price'},
+    {'all': 'true', 'sort': 'price'},
+])
+def test_invalid_filters_return_400(dynamodb, query):
+    assert product_list.handler({'queryStringParameters': query}, {})['statusCode'] == 400
+
+
+def test_price_range_queries_price_index(dynamodb):
+    table = dynamodb.Table.return_value
+    table.query.return_value = {
+        'Items': [{'id': '1', 'title': 'A', 'price': Decimal('12'), 'catalog': 'products', 'title_lower': 'a'}]
+    }
+    dynamodb.batch_get_item.return_value = {'Responses': {'stocks': []}}
+    query = {'minPrice': '10', 'maxPrice': '20', 'sort': '-price', 'limit': '5'}
+
+    response = product_list.handler({'queryStringParameters': query}, {})
+
+    assert response['statusCode'] == 200
+    table.scan.assert_not_called()
+    kwargs = table.query.call_args.kwargs
+    assert kwargs['IndexName'] == 'price-index'
+    assert kwargs['ScanIndexForward'] is False
+    assert kwargs['Limit'] == 5
+    assert kwargs['KeyConditionExpression'] == (
+        Key('catalog').eq('products') & Key('price').between(Decimal('10'), Decimal('20'))
+    )
+    assert json.loads(response['body']) == [{'id': '1', 'title': 'A', 'price': 12, 'count': 0}]
+
+
+def test_price_index_cursor_resumes_with_an_exact_decimal(dynamodb):
+    table = dynamodb.Table.return_value
+    last_key = {'id': 'abc', 'catalog': 'products', 'price': Decimal('19.99')}
+    table.query.return_value = {'Items': [], 'LastEvaluatedKey': last_key}
+    query = {'minPrice': '10', 'sort': 'price'}
+
+    first = product_list.handler({'queryStringParameters': query}, {})
+    cursor = first['headers']['X-Next-Cursor']
+    second = product_list.handler({'queryStringParameters': {**query, 'cursor': cursor}}, {})
+
+    assert second['statusCode'] == 200
+    start_key = table.query.call_args.kwargs['ExclusiveStartKey']
+    assert start_key == last_key
+    assert isinstance(start_key['price'], Decimal)
+    # What boto3 does with the key before sending it
+    assert TypeSerializer().serialize(start_key)['M']['price'] == {'N': '19.99'}
+
+
+@pytest.mark.parametrize('query', [
+    {'sort': 'title'},
+    {'titlePrefix': 'Alm'},
+    {},
+])
+def test_cursor_from_another_index_is_400(dynamodb, query):
+    cursor = product_list.encode_cursor({'id': 'abc', 'catalog': 'products', 'price': Decimal('19.99')})
+
+    response = product_list.handler({'queryStringParameters': {**query, 'cursor': cursor}}, {})
+
+    assert response['statusCode'] == 400
+    assert 'different sort or filter' in json.loads(response['body'])['message']
+    dynamodb.Table.return_value.query.assert_not_called()
+
+
+def test_title_prefix_queries_title_index(dynamodb):
+    table = dynamodb.Table.return_value
+    table.query.return_value = {'Items': []}
+
+    product_list.handler({'queryStringParameters': {'titlePrefix': 'Alm', 'maxPrice': '9'}}, {})
+
+    kwargs = table.query.call_args.kwargs
+    assert kwargs['IndexName'] == 'title-index'
+    assert kwargs['KeyConditionExpression'] == (
+        Key('catalog').eq('products') & Key('title_lower').begins_with('alm')
+    )
+    assert kwargs['FilterExpression'] == Attr('price').lte(Decimal('9'))
+
+
+def test_ids_query_returns_batch_lookup(dynamodb):
+    dynamodb.meta.client.batch_get_item.return_value = {
+        'Responses': {'products': [{'id': '2', 'title': 'B'}], 'stocks': []}
+    }
+
+    response = product_list.handler({'queryStringParameters': {'ids': '1,2'}}, {})
+
+    assert response['statusCode'] == 200
+    assert json.loads(response['body']) == {
+        'products': [None, {'id': '2', 'title': 'B', 'count': 0}],
+        'missing': ['1']
+    }
+    dynamodb.Table.return_value.scan.assert_not_called()
+
+
+@pytest.mark.parametrize('ids', ['', '1,,2', ','.join(str(i) for i in range(101))])
+def test_invalid_ids_return_400(dynamodb, ids):
+    assert product_list.handler({'queryStringParameters': {'ids': ids}}, {})['statusCode'] == 400
+
+
+def test_page_from_catalog_view_needs_no_join(dynamodb, monkeypatch):
+    monkeypatch.setenv('CATALOG_TABLE_NAME', 'catalog')
+    monkeypatch.setenv('CATALOG_VIEW_READS', 'true')
+    table = dynamodb.Table.return_value
+    table.scan.return_value = {
+        'Items': [{'id': '1', 'title': 'A', 'count': 3, 'product_seq': 7, 'stock_seq': 9}],
+        'LastEvaluatedKey': {'id': '1'}
+    }
+
+    response = product_list.handler({'queryStringParameters': {'limit': '1'}}, {})
+
+    dynamodb.Table.assert_called_once_with('catalog')
+    assert table.scan.call_args.kwargs['Limit'] == 1
+    assert 'attribute_not_exists(#deleted)' in table.scan.call_args.kwargs['FilterExpression']
+    dynamodb.batch_get_item.assert_not_called()
+    assert json.loads(response['body']) == [{'id': '1', 'title': 'A', 'count': 3}]
+    assert product_list.decode_cursor(response['headers']['X-Next-Cursor']) == {'id': '1'}
@@ -0,0 +1,30 @@
+import pytest
+from projection import parse_fields, projection_kwargs, wants_stock
+
+
+def test_no_fields_means_everything():
+    assert parse_fields(None) is None
+    assert parse_fields('') is None
+    assert projection_kwargs(None) == {}
+    assert wants_stock(None) is True
+
+
+def test_fields_always_include_id_and_drop_duplicates():
+    assert parse_fields('title, price,title') == ['id', 'title', 'price']
+
+
+@pytest.mark.parametrize('value', ['title,pr ice', 'a.b', '#f0', ','.join(f'f{i}' for i in range(21))])
+def test_invalid_fields_are_rejected(value):
+    with pytest.raises(ValueError):
+        parse_fields(value)
+
+
+def test_projection_uses_placeholders_and_skips_stock_fields():
+    fields = parse_fields('title,count')
+
+    assert projection_kwargs(fields) == {
+        'ProjectionExpression': '#f0, #f1',
+        'ExpressionAttributeNames': {'#f0': 'id', '#f1': 'title'}
+    }
+    assert wants_stock(fields) is True
+    assert wants_stock(parse_fields('title,price')) is False
@@ -0,0 +1,38 @@
+import json
+import pytest
+from decimal import Decimal
+from boto3.dynamodb.types import Binary
+from serialization import dumps, iter_dumps
+
+
+def test_dynamodb_types_are_serialized():
+    body = {
+        'price': Decimal('10.99'),
+        'count': Decimal('3'),
+        'tags': {'b', 'a'},
+        'sizes': {Decimal('2'), Decimal('1')},
+        'blob': Binary(b'\x00\x01')
+    }
+
+    assert json.loads(dumps(body)) == {
+        'price': 10.99,
+        'count': 3,
+        'tags': ['a', 'b'],
+        'sizes': [1, 2],
+        'blob': 'AAE='
+    }
+
+
+def test_unknown_types_are_rejected():
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
+
+
+@pytest.mark.parametrize('size', [0, 1, 3, 7])
+def test_iter_dumps_matches_dumps(size):
+    products = [{'id': str(i), 'price': Decimal(i)} for i in range(size)]
+
+    chunks = list(iter_dumps(products, chunk_size=3))
+
+    assert ''.join(chunks) == dumps(products)
+    assert len(chunks) == (1 if size <= 3 else 2 * -(-size // 3) + 1)
@@ -0,0 +1,147 @@
+import pytest
+from decimal import Decimal
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from product_service import populate_dynamoDB as loader
+
+
+def product(index, **fields):
+    return {'title': f'Product {index}', 'description': 'x', 'price': '9.99', **fields}
+
+
+def numbered(rows):
+    return enumerate(rows, 1)
+
+
+def unprocessed(batch):
+    request_items = {}
+    for table_name, request in batch:
+        request_items.setdefault(table_name, []).append(request)
+    return {'UnprocessedItems': request_items}
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(loader.time, 'sleep', lambda seconds: None)
+
+
+def test_batches_stay_within_the_item_limit_with_each_product_beside_its_stock():
+    batches = list(loader.iter_batches(numbered([product(index, id=f'id-{index}') for index in range(30)]), 10))
+
+    assert [len(batch) for batch in batches] == [24, 24, 12]
+    for batch in batches:
+        product_ids = [request['PutRequest']['Item']['id'] for table_name, request in batch
+                       if table_name == loader.PRODUCTS_TABLE]
+        stock_ids = [request['PutRequest']['Item']['product_id'] for table_name, request in batch
+                     if table_name == loader.STOCKS_TABLE]
+        assert product_ids == stock_ids
+
+
+def test_repeated_id_starts_a_new_batch():
+    batches = list(loader.iter_batches(numbered([product(1, id='same'), product(2, id='same')]), 10))
+
+    assert [len(batch) for batch in batches] == [2, 2]
+
+
+def test_rows_are_converted_to_typed_items():
+    [batch] = loader.iter_batches(numbered([product(1, id='a', count='3'), product(2, id='b')]), 10)
+    items = [request['PutRequest']['Item'] for _, request in batch]
+
+    assert items[0]['price'] == Decimal('9.99')
+    assert items[1] == {'product_id': 'a', 'count': 3}
+    assert items[3] == {'product_id': 'b', 'count': 10}
+
+
+def test_bad_rows_are_skipped_and_reported(capsys):
+    stats = loader.LoadStats()
+    rows = [product(1), {'description': 'no title', 'price': 1}, product(3, price='abc'),
+            product(4, count='many'), ['not', 'an', 'object'], product(6)]
+
+    batches = list(loader.iter_batches(numbered(rows), 10, stats))
+
+    titles = [request['PutRequest']['Item']['title'] for table_name, request in batches[0]
+              if table_name == loader.PRODUCTS_TABLE]
+    assert titles == ['Product 1', 'Product 6']
+    assert stats.skipped == 4
+    output = capsys.readouterr().out
+    assert 'Skipping line 2: Missing required field: title' in output
+    assert "Skipping line 3: Price must be a positive number: 'abc'" in output
+
+
+@pytest.mark.parametrize('fields, error', [
+    ({'price': '0'}, 'Price must be a positive number'),
+    ({'price': -5}, 'Price must be a positive number'),
+    ({'price': 'NaN'}, 'Price must be a positive number'),
+    ({'count': '-1'}, 'Count must be a non-negative integer'),
+    ({'count': -1}, 'Count must be a non-negative integer'),
+    ({'count': 3.7}, 'Count must be a non-negative integer'),
+    ({'count': 3.0}, 'Count must be a non-negative integer'),
+    ({'count': '3.0'}, 'Count must be a non-negative integer'),
+    ({'count': True}, 'Count must be a non-negative integer'),
+])
+def test_rows_post_products_would_refuse_are_skipped(fields, error):
+    with pytest.raises(ValueError, match=error):
+        loader.to_write_requests(product(1, **fields), 10)
+
+
+def test_broken_json_lines_are_skipped_with_their_line_number(tmp_path, capsys):
+    path = tmp_path / 'products.jsonl'
+    path.write_text('{"title": "Lamp", "price": 10, "count": 1}\n'
+                    '\n'
+                    '{"title": "Desk", "price": \n'
+                    '{"title": "Chair", "price": 20, "count": 2}\n', encoding='utf-8')
+    stats = loader.LoadStats()
+
+    [batch] = loader.iter_batches(loader.read_products(str(path)), 10, stats)
+
+    assert [request['PutRequest']['Item']['title'] for table_name, request in batch
+            if table_name == loader.PRODUCTS_TABLE] == ['Lamp', 'Chair']
+    assert stats.skipped == 1
+    assert 'Skipping line 3: Invalid JSON' in capsys.readouterr().out
+
+
+def test_unprocessed_items_are_retried():
+    batch = next(loader.iter_batches(numbered([product(1)]), 10))
+    client = MagicMock()
+    client.batch_write_item.side_effect = [unprocessed(batch[1:]), {'UnprocessedItems': {}}]
+    stats = loader.LoadStats()
+
+    loader.write_batch(client, batch, stats)
+
+    retried = client.batch_write_item.call_args_list[1].kwargs['RequestItems']
+    assert list(retried) == [loader.STOCKS_TABLE]
+    assert (stats.products, stats.retries) == (1, 1)
+
+
+def test_write_gives_up_after_the_attempt_limit():
+    batch = next(loader.iter_batches(numbered([product(1)]), 10))
+    client = MagicMock()
+    client.batch_write_item.return_value = unprocessed(batch)
+
+    with pytest.raises(loader.UnprocessedItemsError):
+        loader.write_batch(client, batch, loader.LoadStats())
+
+    assert client.batch_write_item.call_count == loader.BATCH_WRITE_MAX_ATTEMPTS
+
+
+def test_load_writes_every_batch():
+    client = MagicMock()
+    client.batch_write_item.return_value = {'UnprocessedItems': {}}
+
+    stats = loader.load_products(client, numbered(product(index) for index in range(100)), workers=4)
+
+    assert stats.products == 100
+    assert client.batch_write_item.call_count == 9
+
+
+def test_load_stops_and_raises_the_first_write_error():
+    client = MagicMock()
+    client.batch_write_item.side_effect = ClientError(
+        {'Error': {'Code': 'ResourceNotFoundException', 'Message': 'missing'}}, 'BatchWriteItem'
+    )
+
+    with pytest.raises(ClientError):
+        loader.load_products(client, numbered(product(index) for index in range(1000)), workers=2)
+
+    # The reader stops feeding batches once a worker has failed
+    assert client.batch_write_item.call_count < 1000 // 12